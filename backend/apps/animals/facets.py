@@ -0,0 +1,343 @@
+"""
+Facet counts for the listing search page.
+
+Active listings are counted per combination of facet values in
+ListingFacetBucket. The table is adjusted by one on each listing
+save/delete (signals.py) and rebuilt by `manage.py refresh_listing_facets`,
+so rendering the facets is a handful of small GROUP BY queries over that
+table rather than over the listing table.
+
+Each facet is counted under all current filters except its own, so the
+UI can show how many results every alternative value would give.
+Filters the table cannot express (search, weight, date window, legacy
+location, price/age bounds that don't fall on a bucket edge) switch the
+engine to counting the listing table directly.
+"""
+
+from types import SimpleNamespace
+from django.db import transaction
+from django.db.models import Case, CharField, F, IntegerField, Max, Q, Sum, Count, Value, When
+from django.db.models.functions import Coalesce, Upper
+from django.http import QueryDict
+from .filters import AnimalListingFilter
+from .models import AnimalListing, ListingFacetBucket
+from .search import fold_turkish, get_search_backend
+
+# [min, max) ranges; None means unbounded
+PRICE_BUCKETS = [(0, 5000), (5000, 10000), (10000, 20000), (20000, 40000), (40000, 75000), (75000, 150000), (150000, None)]
+AGE_BUCKETS = [(0, 6), (6, 12), (12, 24), (24, 36), (36, 60), (60, None)]
+UNKNOWN_AGE = -1
+
+TYPE_GROUPS = {
+    'SMALL': 'KUCUKBAS', 'KUCUKBAS': 'KUCUKBAS', 'SMALL_GROUP': 'KUCUKBAS',
+    'LARGE': 'BUYUKBAS', 'BUYUKBAS': 'BUYUKBAS', 'LARGE_GROUP': 'BUYUKBAS',
+}
+TYPE_LABELS = {'KUCUKBAS': 'Küçükbaş', 'BUYUKBAS': 'Büyükbaş'}
+GENDER_LABELS = dict(AnimalListing.GENDER_CHOICES)
+
+# Query params belonging to each facet
+FACET_PARAMS = {
+    'animal_type': ['animal_type'],
+    'city': ['city'],
+    'district': ['district'],
+    'gender': ['gender'],
+    'price': ['min_price', 'max_price'],
+    'age': ['min_age', 'max_age'],
+}
+# Filters the bucket table cannot answer
+LIVE_ONLY_PARAMS = ['search', 'min_weight', 'max_weight', 'date_posted', 'location']
+
+# Fields a facet key is computed from
+KEY_FIELDS = ['is_active', 'animal_type', 'city', 'district', 'city_normalized', 'district_normalized',
+              'gender', 'price', 'age_months']
+
+
+def bucket_index(value, buckets):
+    for index, (low, high) in enumerate(buckets):
+        if high is None or value < high:
+            return index
+    return len(buckets) - 1
+
+
+def facet_key(listing):
+    """
+    Return the bucket key of a listing, or None if it is not counted.
+
+    Must agree with annotate_facets(), which computes the same key in SQL.
+    """
+    if not listing.is_active:
+        return None
+    return (
+        TYPE_GROUPS.get(listing.animal_type, listing.animal_type),
+        listing.city_normalized,
+        listing.district_normalized,
+        (listing.gender or '').upper(),
+        bucket_index(listing.price, PRICE_BUCKETS),
+        UNKNOWN_AGE if listing.age_months is None else bucket_index(listing.age_months, AGE_BUCKETS),
+    )
+
+
+def loaded_facet_key(listing):
+    """
+    Return the bucket key of a listing as it was loaded (or last saved),
+    from the baseline behind AnimalListing.get_changes(). Fields without a
+    baseline (new listings, listings built with a pk) use their current
+    value. Inside post_save this is the key before the save.
+    """
+    changes = listing.get_changes(KEY_FIELDS)
+    return facet_key(SimpleNamespace(**{
+        name: changes[name][0] if name in changes else getattr(listing, name)
+        for name in KEY_FIELDS
+    }))
+
+
+def _key_filter(key):
+    animal_type, city, district, gender, price_bucket, age_bucket = key
+    return {
+        'animal_type': animal_type, 'city': city, 'district': district,
+        'gender': gender, 'price_bucket': price_bucket, 'age_bucket': age_bucket,
+    }
+
+
+def apply_change(old_key, new_key, listing):
+    """Move one listing from the old bucket to the new one."""
+    if old_key == new_key:
+        return
+    with transaction.atomic():
+        if old_key is not None:
+            ListingFacetBucket.objects.filter(**_key_filter(old_key)).update(count=F('count') - 1)
+        if new_key is not None:
+            bucket, created = ListingFacetBucket.objects.get_or_create(
+                **_key_filter(new_key),
+                defaults={
+                    'count': 1,
+                    'city_label': (listing.city or '').strip(),
+                    'district_label': (listing.district or '').strip(),
+                }
+            )
+            if not created:
+                ListingFacetBucket.objects.filter(pk=bucket.pk).update(count=F('count') + 1)
+
+
+def _bucket_case(field, buckets, null_value=None):
+    whens = []
+    if null_value is not None:
+        whens.append(When(**{f'{field}__isnull': True}, then=Value(null_value)))
+    for index, (low, high) in enumerate(buckets[:-1]):
+        whens.append(When(**{f'{field}__lt': high}, then=Value(index)))
+    return Case(*whens, default=Value(len(buckets) - 1), output_field=IntegerField())
+
+
+def annotate_facets(queryset):
+    """Annotate listings with their facet values (f_* columns), mirroring facet_key()."""
+    return queryset.annotate(
+        f_animal_type=Case(
+            *[When(animal_type=raw, then=Value(group)) for raw, group in TYPE_GROUPS.items()],
+            default=F('animal_type'), output_field=CharField()
+        ),
+        f_city=F('city_normalized'),
+        f_district=F('district_normalized'),
+        f_city_label=Coalesce('city', Value(''), output_field=CharField()),
+        f_district_label=Coalesce('district', Value(''), output_field=CharField()),
+        f_gender=Upper(Coalesce('gender', Value(''), output_field=CharField())),
+        f_price=_bucket_case('price', PRICE_BUCKETS),
+        f_age=_bucket_case('age_months', AGE_BUCKETS, null_value=UNKNOWN_AGE),
+    )
+
+
+def rebuild_facets(listing_model=AnimalListing, bucket_model=ListingFacetBucket):
+    """
+    Recount every bucket from the listing table.
+
+    Returns:
+        Number of bucket rows written
+    """
+    rows = annotate_facets(listing_model.objects.filter(is_active=True)).order_by().values(
+        'f_animal_type', 'f_city', 'f_district', 'f_gender', 'f_price', 'f_age'
+    ).annotate(
+        n=Count('id'), city_label=Max('f_city_label'), district_label=Max('f_district_label')
+    )
+    buckets = [
+        bucket_model(
+            animal_type=row['f_animal_type'], city=row['f_city'], district=row['f_district'],
+            gender=row['f_gender'], price_bucket=row['f_price'], age_bucket=row['f_age'],
+            city_label=row['city_label'].strip(), district_label=row['district_label'].strip(),
+            count=row['n'],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        bucket_model.objects.all().delete()
+        bucket_model.objects.bulk_create(buckets, batch_size=500)
+    return len(buckets)
+
+
+def _range_buckets(low, high, buckets):
+    """Indexes of buckets overlapping [low, high]."""
+    return [
+        index for index, (bucket_low, bucket_high) in enumerate(buckets)
+        if (low is None or bucket_high is None or bucket_high > low)
+        and (high is None or bucket_low <= high)
+    ]
+
+
+class FacetEngine:
+    """
+    Computes facet counts under a set of listing filters.
+
+    Usage:
+        FacetEngine(request.query_params).get_facets()
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self.ranges = {}
+        self.use_buckets = self._parse_ranges() and not any(params.get(p) for p in LIVE_ONLY_PARAMS)
+
+    def _parse_ranges(self):
+        """
+        Parse price/age bounds. Returns False if a bound is invalid or
+        doesn't fall on a bucket edge (the bucket table can't answer it).
+        """
+        aligned = True
+        for facet, buckets in (('price', PRICE_BUCKETS), ('age', AGE_BUCKETS)):
+            low_param, high_param = FACET_PARAMS[facet]
+            bounds = []
+            for param in (low_param, high_param):
+                value = self.params.get(param)
+                if value in (None, ''):
+                    bounds.append(None)
+                    continue
+                try:
+                    bounds.append(float(value))
+                except ValueError:
+                    return False
+            low, high = bounds
+            edges = {edge for bucket in buckets for edge in bucket if edge is not None}
+            # min is inclusive (>=), max is inclusive (<=) in AnimalListingFilter;
+            # a max of edge - 1 covers whole buckets for integer values
+            if (low is not None and low not in edges) or (high is not None and high + 1 not in edges):
+                aligned = False
+            self.ranges[facet] = (low, high)
+        return aligned
+
+    def get_facets(self):
+        """
+        Returns:
+            {
+                'total': int,
+                'source': 'buckets' | 'listings',
+                'facets': {
+                    'animal_type': [{'value', 'label', 'count'}],
+                    'city': [{'value', 'count'}],
+                    'district': [{'value', 'count'}],
+                    'gender': [{'value', 'label', 'count'}],
+                    'price': [{'min', 'max', 'count'}],
+                    'age': [{'min', 'max', 'count'}],
+                }
+            }
+        """
+        counts = {}
+        for facet, column, label_column in (
+            ('animal_type', 'f_animal_type', None),
+            ('city', 'f_city', 'f_city_label'),
+            ('district', 'f_district', 'f_district_label'),
+            ('gender', 'f_gender', None),
+            ('price', 'f_price', None),
+            ('age', 'f_age', None),
+        ):
+            counts[facet] = self._group(self._queryset(exclude=facet), column, label_column)
+
+        return {
+            'total': self._total(),
+            'source': 'buckets' if self.use_buckets else 'listings',
+            'facets': self._format(counts),
+        }
+
+    def _total(self):
+        queryset = self._queryset()
+        if self.use_buckets:
+            return queryset.aggregate(n=Sum('count'))['n'] or 0
+        return queryset.count()
+
+    def _queryset(self, exclude=None):
+        """Filtered bucket rows or listings, ignoring the filters of `exclude`."""
+        if self.use_buckets:
+            return self._bucket_queryset(exclude)
+        return self._listing_queryset(exclude)
+
+    def _bucket_queryset(self, exclude):
+        q = Q()
+        value = self.params.get('animal_type')
+        if value and exclude != 'animal_type':
+            v = value.upper().strip()
+            q &= Q(animal_type=TYPE_GROUPS.get(v, value))
+        for facet in ('city', 'district'):
+            value = self.params.get(facet)
+            if value and value.strip() and exclude != facet:
+                q &= Q(**{facet: fold_turkish(value.strip())})
+        value = self.params.get('gender')
+        if value and exclude != 'gender':
+            q &= Q(gender=value.upper())
+        for facet, field, buckets in (('price', 'price_bucket', PRICE_BUCKETS), ('age', 'age_bucket', AGE_BUCKETS)):
+            low, high = self.ranges.get(facet, (None, None))
+            if (low is not None or high is not None) and exclude != facet:
+                q &= Q(**{f'{field}__in': _range_buckets(low, high, buckets)})
+
+        return ListingFacetBucket.objects.filter(q, count__gt=0).annotate(
+            f_animal_type=F('animal_type'), f_city=F('city'), f_district=F('district'),
+            f_city_label=F('city_label'), f_district_label=F('district_label'),
+            f_gender=F('gender'), f_price=F('price_bucket'), f_age=F('age_bucket'),
+        )
+
+    def _listing_queryset(self, exclude):
+        params = QueryDict(mutable=True)
+        for key, values in self.params.lists():
+            if exclude is None or key not in FACET_PARAMS[exclude]:
+                params.setlist(key, values)
+        queryset = AnimalListingFilter(params, queryset=AnimalListing.objects.filter(is_active=True)).qs
+        if params.get('search'):
+            queryset = get_search_backend().search(queryset, params['search'])
+        return annotate_facets(queryset)
+
+    def _group(self, queryset, column, label_column):
+        """Return {value: {'count', 'label'}} for one facet column."""
+        aggregate = Sum('count') if self.use_buckets else Count('id')
+        annotations = {'n': aggregate}
+        if label_column:
+            annotations['label'] = Max(label_column)
+        rows = queryset.order_by().values(column).annotate(**annotations)
+        return {
+            row[column]: {'count': row['n'], 'label': row.get('label')}
+            for row in rows if row['n']
+        }
+
+    def _format(self, counts):
+        def categorical(facet, labels=None):
+            items = []
+            for value, row in counts[facet].items():
+                if not value:
+                    continue
+                item = {'value': value, 'count': row['count']}
+                if labels is not None:
+                    item['label'] = labels.get(value, value)
+                elif row['label']:
+                    # Send back the display spelling; filters fold it anyway
+                    item['value'] = row['label'].strip()
+                items.append(item)
+            return sorted(items, key=lambda item: (-item['count'], item['value']))
+
+        def ranges(facet, buckets):
+            return [
+                {'min': low, 'max': high, 'count': counts[facet].get(index, {}).get('count', 0)}
+                for index, (low, high) in enumerate(buckets)
+            ]
+
+        return {
+            'animal_type': categorical('animal_type', TYPE_LABELS),
+            'city': categorical('city'),
+            'district': categorical('district'),
+            'gender': categorical('gender', GENDER_LABELS),
+            'price': ranges('price', PRICE_BUCKETS),
+            'age': ranges('age', AGE_BUCKETS),
+        }
@@ -2,8 +2,13 @@
 Filters for animals app.
 """
 
+import logging
 import django_filters
+from rest_framework.filters import BaseFilterBackend
 from .models import AnimalListing
+from .search import fold_turkish, get_search_backend
+
+logger = logging.getLogger(__name__)
 
 
 class AnimalListingFilter(django_filters.FilterSet):
@@ -13,7 +18,9 @@ class AnimalListingFilter(django_filters.FilterSet):
     Provides filtering by:
     - animal_type (supports both legacy and Turkish codes, grouping)
     - price range (min_price, max_price)
-    - location (case-insensitive partial match)
+    - city, district (exact match on the folded city_normalized /
+      district_normalized columns, ignoring case and Turkish characters)
+    - location (free-text field, case-insensitive partial match)
     - age range (min_age, max_age)
     - weight range (min_weight, max_weight)
     """
@@ -36,26 +43,34 @@ class AnimalListingFilter(django_filters.FilterSet):
             return queryset
         
         v = value.upper().strip()
-        print(f"[DEBUG] Animal type filter received: '{value}' → normalized: '{v}'")
+        logger.debug(f"Animal type filter received: '{value}' → normalized: '{v}'")
         
         # Map to small group (Küçükbaş)
         if v in ('SMALL_GROUP', 'KUCUKBAS', 'SMALL'):
-            print(f"[DEBUG] Filtering for SMALL group: ['SMALL', 'KUCUKBAS']")
             return queryset.filter(animal_type__in=['SMALL', 'KUCUKBAS'])
         
         # Map to large group (Büyükbaş)
         if v in ('LARGE_GROUP', 'BUYUKBAS', 'LARGE'):
-            print(f"[DEBUG] Filtering for LARGE group: ['LARGE', 'BUYUKBAS']")
             return queryset.filter(animal_type__in=['LARGE', 'BUYUKBAS'])
         
         # Fallback: exact match (shouldn't normally happen)
-        print(f"[DEBUG] Using exact match fallback for: '{v}'")
+        logger.debug(f"Using exact match fallback for: '{v}'")
         return queryset.filter(animal_type=value)
     
     # New filters for Home Redesign
     gender = django_filters.CharFilter(lookup_expr='iexact')
-    city = django_filters.CharFilter(lookup_expr='icontains')
-    district = django_filters.CharFilter(lookup_expr='icontains')
+    city = django_filters.CharFilter(method='filter_normalized')
+    district = django_filters.CharFilter(method='filter_normalized')
+    
+    def filter_normalized(self, queryset, name, value):
+        """
+        Case- and accent-insensitive exact match on the folded column
+        (city -> city_normalized), so the location index can be used.
+        """
+        value = fold_turkish(value.strip())
+        if not value:
+            return queryset
+        return queryset.filter(**{f'{name}_normalized': value})
     
     date_posted = django_filters.CharFilter(method='filter_date_posted')
     
@@ -65,7 +80,9 @@ class AnimalListingFilter(django_filters.FilterSet):
         
         now = timezone.now()
         if value == 'today':
-            return queryset.filter(created_at__date=now.date())
+            # Range instead of created_at__date so the index applies
+            start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+            return queryset.filter(created_at__gte=start)
         elif value == 'week':
             return queryset.filter(created_at__gte=now - timedelta(days=7))
         elif value == 'month':
@@ -121,3 +138,18 @@ class AnimalListingFilter(django_filters.FilterSet):
             'city', 'district', 'gender', 'date_posted',
             'min_age', 'max_age', 'min_weight', 'max_weight'
         ]
+
+
+class ListingSearchFilter(BaseFilterBackend):
+    """
+    Full-text search over listings with ?search=.
+
+    Replaces DRF's SearchFilter (an OR of ILIKE scans) with the indexed
+    backend from apps.animals.search. Results are ordered by relevance.
+    """
+    
+    search_param = 'search'
+    
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return get_search_backend().search(queryset, query)
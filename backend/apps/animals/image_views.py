@@ -111,18 +111,16 @@ class AnimalImageViewSet(viewsets.ModelViewSet):
             )
         
         orders = request.data.get('orders', [])
+        new_orders = {item.get('id'): item.get('order') for item in orders}
         
-        # Update each image's order
-        for item in orders:
-            image_id = item.get('id')
-            new_order = item.get('order')
-            
-            try:
-                image = AnimalImage.objects.get(id=image_id, listing=listing)
-                image.order = new_order
-                image.save()
-            except AnimalImage.DoesNotExist:
-                continue
+        # Update all orders in one query; ids from other listings are ignored
+        images = list(AnimalImage.objects.filter(listing=listing, id__in=new_orders.keys()))
+        for image in images:
+            image.order = new_orders[image.id]
+        AnimalImage.objects.bulk_update(images, ['order'])
+        
+        # The fallback cover image depends on order
+        AnimalListing.refresh_primary_image(listing.id)
         
         # Return updated images
         images = AnimalImage.objects.filter(listing=listing)
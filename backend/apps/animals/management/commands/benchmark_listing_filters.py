@@ -0,0 +1,200 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import QueryDict
+from django.utils import timezone
+from apps.animals.filters import AnimalListingFilter
+from apps.animals.models import AnimalListing
+from apps.animals.pagination import LISTING_ORDERINGS, order_listings
+from apps.animals.search import build_search_document, fold_turkish, get_search_backend
+
+User = get_user_model()
+
+BENCHMARK_EMAIL = 'benchmark-seller@kurbanlink.local'
+BENCHMARK_COMPANY = '__benchmark__'
+PAGE_SIZE = 10
+
+CITIES = {
+    'Ankara': ['Çankaya', 'Keçiören', 'Polatlı'],
+    'İstanbul': ['Kadıköy', 'Üsküdar', 'Silivri'],
+    'İzmir': ['Bornova', 'Ödemiş', 'Tire'],
+    'Konya': ['Selçuklu', 'Ereğli', 'Akşehir'],
+    'Şanlıurfa': ['Siverek', 'Viranşehir', 'Suruç'],
+}
+BREEDS = {
+    'KUCUKBAS': ['Kıvırcık', 'Merinos', 'Akkaraman', 'Saanen'],
+    'BUYUKBAS': ['Simental', 'Holstein', 'Angus', 'Montofon'],
+}
+
+# Filter combinations mirroring what the search page sends
+SCENARIOS = [
+    ('default', {}),
+    ('type', {'animal_type': 'KUCUKBAS'}),
+    ('type+price', {'animal_type': 'BUYUKBAS', 'min_price': '20000', 'max_price': '60000'}),
+    ('city', {'city': 'ankara'}),
+    ('city+district', {'city': 'İzmir', 'district': 'bornova'}),
+    ('type+city+age', {'animal_type': 'KUCUKBAS', 'city': 'Konya', 'min_age': '6', 'max_age': '24'}),
+    ('weight', {'min_weight': '300', 'max_weight': '500'}),
+    ('week', {'date_posted': 'week'}),
+    ('order:price', {'ordering': 'price'}),
+    ('order:-view_count', {'ordering': '-view_count'}),
+    ('search', {'search': 'kivircik'}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds benchmark listings and reports p50/p95 latency of the public '
+        'listing query (filter + order + count + one page) per filter combination. '
+        'Use --compare for a before/after view of the listing indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=0,
+                            help='Seed this many benchmark listings before measuring')
+        parser.add_argument('--runs', type=int, default=50, help='Measurements per scenario')
+        parser.add_argument('--page', type=int, default=1,
+                            help='Page number to fetch (OFFSET = (page - 1) * 10)')
+        parser.add_argument('--explain', action='store_true', help='Print the query plan of each scenario')
+        parser.add_argument('--compare', action='store_true',
+                            help='Measure without the AnimalListing indexes (dropped in a rolled back '
+                                 'transaction), then with them')
+        parser.add_argument('--cleanup', action='store_true', help='Delete benchmark listings and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            deleted, _ = AnimalListing.objects.filter(company=BENCHMARK_COMPANY).delete()
+            get_search_backend().rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} benchmark rows.'))
+            return
+
+        if options['listings']:
+            self.seed(options['listings'])
+
+        total = AnimalListing.objects.filter(is_active=True).count()
+        self.stdout.write(f'{total} active listings, {options["runs"]} runs per scenario, '
+                          f'page {options["page"]}, database: {connection.vendor}\n')
+
+        if options['compare']:
+            with transaction.atomic():
+                # DDL is transactional on PostgreSQL and SQLite, the
+                # rollback below restores the indexes
+                with connection.cursor() as cursor:
+                    for index in AnimalListing._meta.indexes:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+                before = self.measure(options)
+                transaction.set_rollback(True)
+            after = self.measure(options)
+
+            self.stdout.write(f'{"scenario":<20}{"rows":>8}{"p50 before":>12}{"p95 before":>12}'
+                              f'{"p50 after":>12}{"p95 after":>12}')
+            for name, _ in SCENARIOS:
+                count, p50_before, p95_before = before[name]
+                _, p50_after, p95_after = after[name]
+                self.stdout.write(f'{name:<20}{count:>8}{p50_before:>12.2f}{p95_before:>12.2f}'
+                                  f'{p50_after:>12.2f}{p95_after:>12.2f}')
+            return
+
+        results = self.measure(options)
+        self.stdout.write(f'{"scenario":<20}{"rows":>8}{"p50 ms":>10}{"p95 ms":>10}')
+        for name, params in SCENARIOS:
+            count, p50, p95 = results[name]
+            self.stdout.write(f'{name:<20}{count:>8}{p50:>10.2f}{p95:>10.2f}')
+            if options['explain']:
+                self.stdout.write(self.build_queryset(params).explain())
+                self.stdout.write('')
+
+    def measure(self, options):
+        """Return {scenario: (rows, p50 ms, p95 ms)}."""
+        results = {}
+        for name, params in SCENARIOS:
+            timings = []
+            for _ in range(options['runs']):
+                started = time.perf_counter()
+                count, page = self.run_query(params, options['page'])
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            results[name] = (count, statistics.median(timings), p95)
+        return results
+
+    def build_queryset(self, params):
+        """Apply the same filters, search and ordering as AnimalListingViewSet.list."""
+        query = QueryDict(mutable=True)
+        query.update(params)
+        queryset = AnimalListing.objects.filter(is_active=True).select_related('seller', 'primary_image')
+        queryset = AnimalListingFilter(query, queryset=queryset).qs
+        if params.get('search'):
+            return get_search_backend().search(queryset, params['search'])
+        field, descending = LISTING_ORDERINGS[params.get('ordering', '-created_at')]
+        return order_listings(queryset, field, descending)
+
+    def run_query(self, params, page):
+        queryset = self.build_queryset(params)
+        count = queryset.count()
+        offset = (page - 1) * PAGE_SIZE
+        return count, list(queryset[offset:offset + PAGE_SIZE])
+
+    def seed(self, n):
+        """Bulk insert n listings with a realistic spread of filter values."""
+        seller, _ = User.objects.get_or_create(
+            email=BENCHMARK_EMAIL,
+            defaults={'username': 'benchmark-seller'}
+        )
+        rng = random.Random(42)
+        now = timezone.now()
+        cities = list(CITIES)
+
+        batch = []
+        with transaction.atomic():
+            for i in range(n):
+                animal_type = rng.choice(list(BREEDS))
+                city = rng.choice(cities)
+                district = rng.choice(CITIES[city])
+                large = animal_type == 'BUYUKBAS'
+                listing = AnimalListing(
+                    seller=seller,
+                    animal_type=animal_type,
+                    title=f'Satılık {rng.choice(BREEDS[animal_type])} #{i}',
+                    breed=rng.choice(BREEDS[animal_type]),
+                    gender=rng.choice(['ERKEK', 'DISI']),
+                    age_months=rng.randint(3, 60),
+                    weight=Decimal(rng.randint(250, 700) if large else rng.randint(30, 90)),
+                    price=Decimal(rng.randint(25000, 150000) if large else rng.randint(4000, 20000)),
+                    city=city,
+                    district=district,
+                    location=f'{city}, {district}',
+                    company=BENCHMARK_COMPANY,
+                    is_active=rng.random() > 0.1,
+                    view_count=rng.randint(0, 500),
+                    city_normalized=fold_turkish(city),
+                    district_normalized=fold_turkish(district),
+                )
+                listing.search_document = build_search_document(listing)
+                batch.append(listing)
+                if len(batch) >= 1000:
+                    self.insert(batch, rng, now)
+                    batch = []
+            if batch:
+                self.insert(batch, rng, now)
+
+            # bulk_create skips the signals that maintain the FTS table
+            get_search_backend().rebuild()
+
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(AnimalListing._meta.db_table)}')
+
+        self.stdout.write(self.style.SUCCESS(f'Seeded {n} listings.'))
+
+    def insert(self, batch, rng, now):
+        AnimalListing.objects.bulk_create(batch)
+        # auto_now_add overrides created_at on insert, spread it over 90 days afterwards
+        for listing in batch:
+            listing.created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        AnimalListing.objects.bulk_update(batch, ['created_at'])
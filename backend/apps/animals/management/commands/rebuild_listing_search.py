@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.animals.models import AnimalListing
+from apps.animals.search import build_search_document, get_search_backend
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Recomputes listing search documents and rebuilds the search index'
+
+    def handle(self, *args, **options):
+        updated = 0
+        batch = []
+        with transaction.atomic():
+            for listing in AnimalListing.objects.iterator():
+                document = build_search_document(listing)
+                if document != listing.search_document:
+                    listing.search_document = document
+                    batch.append(listing)
+                if len(batch) >= BATCH_SIZE:
+                    AnimalListing.objects.bulk_update(batch, ['search_document'])
+                    updated += len(batch)
+                    batch = []
+            if batch:
+                AnimalListing.objects.bulk_update(batch, ['search_document'])
+                updated += len(batch)
+
+            backend = get_search_backend()
+            backend.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {updated} search documents, index rebuilt ({type(backend).__name__}).'
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.animals.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = 'Recounts the search page facet buckets from the listing table'
+
+    def handle(self, *args, **options):
+        buckets = rebuild_facets()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {buckets} facet buckets.'))
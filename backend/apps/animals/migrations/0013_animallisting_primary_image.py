@@ -0,0 +1,37 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:03
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def fill_primary_image(apps, schema_editor):
+    """
+    Set primary_image on existing listings: the image marked primary,
+    else the first one in display order.
+    """
+    AnimalListing = apps.get_model('animals', 'AnimalListing')
+    AnimalImage = apps.get_model('animals', 'AnimalImage')
+    
+    first_image = AnimalImage.objects.filter(
+        listing=OuterRef('pk')
+    ).order_by('-is_primary', 'order', 'created_at', 'id').values('id')[:1]
+    AnimalListing.objects.filter(
+        pk__in=AnimalImage.objects.values('listing_id')
+    ).update(primary_image=Subquery(first_image))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0012_alter_animallisting_breed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animallisting',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, help_text='Image shown on listing cards (primary image, else the first one)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='animals.animalimage'),
+        ),
+        migrations.RunPython(fill_primary_image, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:05
+
+import re
+from django.db import migrations, models
+
+# Frozen copies of apps.animals.search helpers as of this migration, so
+# later changes to that module do not change what this migration does
+_TURKISH_FOLD = str.maketrans({
+    'ı': 'i', 'ş': 's', 'ğ': 'g', 'ç': 'c', 'ö': 'o', 'ü': 'u',
+    'â': 'a', 'î': 'i', 'û': 'u',
+})
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def fold_turkish(text):
+    text = text.replace('I', 'ı').replace('İ', 'i').lower()
+    return text.translate(_TURKISH_FOLD)
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold_turkish(text or ''))
+
+
+SEARCH_FIELDS = ['title', 'breed', 'city', 'district', 'ear_tag_no', 'description']
+FTS_TABLE = 'animals_listing_fts'
+PG_INDEX = 'animals_listing_search_idx'
+
+
+def build_search_document(listing):
+    parts = [getattr(listing, field) or '' for field in SEARCH_FIELDS]
+    return ' '.join(tokenize(' '.join(str(part) for part in parts)))
+
+
+def create_fts_table(schema_editor):
+    """Create the FTS5 table on SQLite. Returns False if FTS5 is unavailable."""
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(search_document, tokenize='unicode61')"
+        )
+    except Exception:
+        return False
+    return True
+
+
+def build_search_index(apps, schema_editor):
+    """
+    Fill search_document for existing listings and create the
+    database-specific index over it.
+    """
+    AnimalListing = apps.get_model('animals', 'AnimalListing')
+
+    batch = []
+    for listing in AnimalListing.objects.only('id', 'title', 'breed', 'city', 'district', 'ear_tag_no', 'description').iterator():
+        listing.search_document = build_search_document(listing)
+        batch.append(listing)
+        if len(batch) >= 500:
+            AnimalListing.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        AnimalListing.objects.bulk_update(batch, ['search_document'])
+
+    vendor = schema_editor.connection.vendor
+    table = schema_editor.quote_name(AnimalListing._meta.db_table)
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON {table} USING GIN (to_tsvector('simple', search_document))"
+        )
+    elif vendor == 'sqlite' and create_fts_table(schema_editor):
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, search_document) SELECT id, search_document FROM {table}"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+    elif vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0013_animallisting_primary_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animallisting',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Normalized search text (maintained automatically)'),
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
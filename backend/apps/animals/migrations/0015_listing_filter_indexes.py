@@ -0,0 +1,91 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:06
+
+from django.db import migrations, models
+
+# Frozen copies of apps.animals.search helpers as of this migration, so
+# later changes to that module do not change what this migration does
+_TURKISH_FOLD = str.maketrans({
+    'ı': 'i', 'ş': 's', 'ğ': 'g', 'ç': 'c', 'ö': 'o', 'ü': 'u',
+    'â': 'a', 'î': 'i', 'û': 'u',
+})
+
+
+def fold_turkish(text):
+    text = text.replace('I', 'ı').replace('İ', 'i').lower()
+    return text.translate(_TURKISH_FOLD)
+
+
+def fill_normalized_location(apps, schema_editor):
+    """Fill city_normalized/district_normalized for existing listings."""
+    AnimalListing = apps.get_model('animals', 'AnimalListing')
+
+    batch = []
+    for listing in AnimalListing.objects.only('id', 'city', 'district').iterator():
+        listing.city_normalized = fold_turkish((listing.city or '').strip())
+        listing.district_normalized = fold_turkish((listing.district or '').strip())
+        batch.append(listing)
+        if len(batch) >= 500:
+            AnimalListing.objects.bulk_update(batch, ['city_normalized', 'district_normalized'])
+            batch = []
+    if batch:
+        AnimalListing.objects.bulk_update(batch, ['city_normalized', 'district_normalized'])
+
+
+def analyze_listings(apps, schema_editor):
+    """
+    Refresh planner statistics so the new partial indexes are picked
+    (SQLite ignores them for COUNT queries without stats).
+    """
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        AnimalListing = apps.get_model('animals', 'AnimalListing')
+        schema_editor.execute(f'ANALYZE {schema_editor.quote_name(AnimalListing._meta.db_table)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0014_animallisting_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animallisting',
+            name='city_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='animallisting',
+            name='district_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_normalized_location, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='animallisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='listing_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animallisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['price', 'id'], name='listing_active_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animallisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['view_count', 'id'], name='listing_active_views_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animallisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['animal_type', '-created_at'], name='listing_active_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animallisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['animal_type', 'price'], name='listing_active_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animallisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['city_normalized', 'district_normalized', '-created_at'], name='listing_active_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animallisting',
+            index=models.Index(fields=['seller', 'is_active', '-created_at'], name='listing_seller_idx'),
+        ),
+        migrations.RunPython(analyze_listings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:22
+
+from django.db import migrations, models
+from django.db.models import Case, CharField, Count, F, IntegerField, Max, Value, When
+from django.db.models.functions import Coalesce, Upper
+
+# Frozen copy of the apps.animals.facets bucketing as of this migration
+PRICE_BUCKETS = [(0, 5000), (5000, 10000), (10000, 20000), (20000, 40000), (40000, 75000), (75000, 150000), (150000, None)]
+AGE_BUCKETS = [(0, 6), (6, 12), (12, 24), (24, 36), (36, 60), (60, None)]
+UNKNOWN_AGE = -1
+TYPE_GROUPS = {
+    'SMALL': 'KUCUKBAS', 'KUCUKBAS': 'KUCUKBAS', 'SMALL_GROUP': 'KUCUKBAS',
+    'LARGE': 'BUYUKBAS', 'BUYUKBAS': 'BUYUKBAS', 'LARGE_GROUP': 'BUYUKBAS',
+}
+
+
+def _bucket_case(field, buckets, null_value=None):
+    whens = []
+    if null_value is not None:
+        whens.append(When(**{f'{field}__isnull': True}, then=Value(null_value)))
+    for index, (low, high) in enumerate(buckets[:-1]):
+        whens.append(When(**{f'{field}__lt': high}, then=Value(index)))
+    return Case(*whens, default=Value(len(buckets) - 1), output_field=IntegerField())
+
+
+def build_facets(apps, schema_editor):
+    """Count the active listings of every facet bucket."""
+    AnimalListing = apps.get_model('animals', 'AnimalListing')
+    ListingFacetBucket = apps.get_model('animals', 'ListingFacetBucket')
+
+    rows = AnimalListing.objects.filter(is_active=True).annotate(
+        f_animal_type=Case(
+            *[When(animal_type=raw, then=Value(group)) for raw, group in TYPE_GROUPS.items()],
+            default=F('animal_type'), output_field=CharField()
+        ),
+        f_city_label=Coalesce('city', Value(''), output_field=CharField()),
+        f_district_label=Coalesce('district', Value(''), output_field=CharField()),
+        f_gender=Upper(Coalesce('gender', Value(''), output_field=CharField())),
+        f_price=_bucket_case('price', PRICE_BUCKETS),
+        f_age=_bucket_case('age_months', AGE_BUCKETS, null_value=UNKNOWN_AGE),
+    ).order_by().values(
+        'f_animal_type', 'city_normalized', 'district_normalized', 'f_gender', 'f_price', 'f_age'
+    ).annotate(
+        n=Count('id'), city_label=Max('f_city_label'), district_label=Max('f_district_label')
+    )
+    ListingFacetBucket.objects.bulk_create([
+        ListingFacetBucket(
+            animal_type=row['f_animal_type'], city=row['city_normalized'], district=row['district_normalized'],
+            gender=row['f_gender'], price_bucket=row['f_price'], age_bucket=row['f_age'],
+            city_label=row['city_label'].strip(), district_label=row['district_label'].strip(),
+            count=row['n'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0015_listing_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingFacetBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('animal_type', models.CharField(help_text='Animal type group (KUCUKBAS/BUYUKBAS)', max_length=20)),
+                ('city', models.CharField(blank=True, help_text='Folded city', max_length=100)),
+                ('district', models.CharField(blank=True, help_text='Folded district', max_length=100)),
+                ('city_label', models.CharField(blank=True, help_text='City as written on a listing', max_length=100)),
+                ('district_label', models.CharField(blank=True, help_text='District as written on a listing', max_length=100)),
+                ('gender', models.CharField(blank=True, max_length=10)),
+                ('price_bucket', models.SmallIntegerField(help_text='Index into facets.PRICE_BUCKETS')),
+                ('age_bucket', models.SmallIntegerField(help_text='Index into facets.AGE_BUCKETS, -1 if unknown')),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'listing facet bucket',
+                'verbose_name_plural': 'listing facet buckets',
+                'indexes': [models.Index(fields=['city', 'district'], name='animals_lis_city_f56ba6_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='listingfacetbucket',
+            constraint=models.UniqueConstraint(fields=('animal_type', 'city', 'district', 'gender', 'price_bucket', 'age_bucket'), name='unique_listing_facet_bucket'),
+        ),
+        migrations.RunPython(build_facets, migrations.RunPython.noop),
+    ]
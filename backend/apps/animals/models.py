@@ -160,16 +160,166 @@ class AnimalListing(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Denormalized from AnimalImage so list pages can resolve the cover
+    # image with a join. Kept in sync by refresh_primary_image().
+    primary_image = models.ForeignKey(
+        'AnimalImage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="Image shown on listing cards (primary image, else the first one)"
+    )
+    
+    # Columns computed in save(), never written directly
+    DERIVED_FIELDS = ('city_normalized', 'district_normalized', 'search_document')
+    
+    # Folded copies of city/district (see apps.animals.search.fold_turkish)
+    # so case-insensitive filters become indexable exact matches
+    city_normalized = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        editable=False
+    )
+    district_normalized = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        editable=False
+    )
+    
+    # Folded tokens of the searchable fields, see apps.animals.search
+    search_document = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Normalized search text (maintained automatically)"
+    )
+    
     def save(self, *args, **kwargs):
         """
         Save method override.
+        
+        Recomputes the derived columns (normalized city/district and
+        search_document) from the fields they are built from.
         """
+        from .search import build_search_document, fold_turkish
+        self.city_normalized = fold_turkish((self.city or '').strip())
+        self.district_normalized = fold_turkish((self.district or '').strip())
+        self.search_document = build_search_document(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *self.DERIVED_FIELDS}
         super().save(*args, **kwargs)
+        # post_save receivers have seen get_changes(); the saved values are
+        # the new baseline
+        self._remember_values(kwargs.get('update_fields'))
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the field values as loaded, so get_changes() can diff
+        against them without reading the row again.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._remember_values(fields)
+    
+    def get_changes(self, fields=None):
+        """
+        Fields changed since the listing was loaded or last saved.
+        
+        Inside post_save receivers this is the diff of the save being
+        handled. Listings not loaded from the database (new, or built
+        with a pk) and deferred fields have no baseline and never appear.
+        
+        Args:
+            fields: Optional iterable of attnames to restrict the diff to
+        
+        Returns:
+            {attname: (old value, new value)}
+        """
+        loaded = getattr(self, '_loaded_values', {})
+        names = loaded if fields is None else [name for name in fields if name in loaded]
+        return {
+            name: (loaded[name], getattr(self, name))
+            for name in names
+            if loaded[name] != getattr(self, name)
+        }
+    
+    def _remember_values(self, fields=None):
+        deferred = self.get_deferred_fields()
+        loaded = getattr(self, '_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            name = field.attname
+            if name not in deferred and (fields is None or name in fields or field.name in fields):
+                loaded[name] = getattr(self, name)
+        self._loaded_values = loaded
+    
+    @classmethod
+    def refresh_primary_image(cls, listing_id):
+        """
+        Recompute primary_image for a listing.
+        
+        Picks the image marked is_primary, falling back to the first image
+        in display order. Uses update() so listing save signals don't fire.
+        
+        Returns:
+            The selected AnimalImage or None
+        """
+        image = AnimalImage.objects.filter(listing_id=listing_id).order_by(
+            '-is_primary', 'order', 'created_at', 'id'
+        ).first()
+        cls.objects.filter(pk=listing_id).update(primary_image=image)
+        return image
     
     class Meta:
         verbose_name = 'animal listing'
         verbose_name_plural = 'animal listings'
         ordering = ['-created_at']
+        # Partial indexes cover the public list (is_active=True) for each
+        # exposed ordering and the most common filter prefixes.
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='listing_active_recent_idx'
+            ),
+            models.Index(
+                fields=['price', 'id'],
+                condition=models.Q(is_active=True),
+                name='listing_active_price_idx'
+            ),
+            models.Index(
+                fields=['view_count', 'id'],
+                condition=models.Q(is_active=True),
+                name='listing_active_views_idx'
+            ),
+            models.Index(
+                fields=['animal_type', '-created_at'],
+                condition=models.Q(is_active=True),
+                name='listing_active_type_idx'
+            ),
+            models.Index(
+                fields=['animal_type', 'price'],
+                condition=models.Q(is_active=True),
+                name='listing_active_type_price_idx'
+            ),
+            models.Index(
+                fields=['city_normalized', 'district_normalized', '-created_at'],
+                condition=models.Q(is_active=True),
+                name='listing_active_location_idx'
+            ),
+            models.Index(
+                fields=['seller', 'is_active', '-created_at'],
+                name='listing_seller_idx'
+            ),
+        ]
     
     def __str__(self) -> str:
         return f"{self.animal_type} - {self.breed} by {self.seller.email}"
@@ -217,7 +367,7 @@ class AnimalImage(models.Model):
         Override save to enforce single primary image per listing.
         
         If this image is being set as primary, unset all other primary images
-        for the same listing.
+        for the same listing, then refresh the listing's primary_image.
         """
         if self.is_primary:
             # Unset other primary images for this listing
@@ -227,3 +377,41 @@ class AnimalImage(models.Model):
             ).exclude(pk=self.pk).update(is_primary=False)
         
         super().save(*args, **kwargs)
+        AnimalListing.refresh_primary_image(self.listing_id)
+
+
+class ListingFacetBucket(models.Model):
+    """
+    Number of active listings sharing one combination of facet values.
+    
+    The search page facets (animal type, city, district, gender, price and
+    age ranges) are counted from this table instead of grouping the
+    listing table. Rows are adjusted on every listing save/delete (see
+    apps.animals.facets) and rebuilt by `manage.py refresh_listing_facets`.
+    """
+    
+    animal_type = models.CharField(max_length=20, help_text="Animal type group (KUCUKBAS/BUYUKBAS)")
+    city = models.CharField(max_length=100, blank=True, help_text="Folded city")
+    district = models.CharField(max_length=100, blank=True, help_text="Folded district")
+    city_label = models.CharField(max_length=100, blank=True, help_text="City as written on a listing")
+    district_label = models.CharField(max_length=100, blank=True, help_text="District as written on a listing")
+    gender = models.CharField(max_length=10, blank=True)
+    price_bucket = models.SmallIntegerField(help_text="Index into facets.PRICE_BUCKETS")
+    age_bucket = models.SmallIntegerField(help_text="Index into facets.AGE_BUCKETS, -1 if unknown")
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'listing facet bucket'
+        verbose_name_plural = 'listing facet buckets'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['animal_type', 'city', 'district', 'gender', 'price_bucket', 'age_bucket'],
+                name='unique_listing_facet_bucket'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['city', 'district']),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.animal_type}/{self.city}/{self.district}/{self.gender}/{self.price_bucket}/{self.age_bucket}: {self.count}"
@@ -2,18 +2,200 @@
 Pagination classes for animals app.
 """
 
+import base64
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+# Sort keys exposed through ?ordering=. Every ordering ends with id so rows
+# sharing a sort value still have a stable position for keyset pagination.
+LISTING_ORDERINGS = {
+    '-created_at': ('created_at', True),
+    'created_at': ('created_at', False),
+    '-price': ('price', True),
+    'price': ('price', False),
+    '-view_count': ('view_count', True),
+    'view_count': ('view_count', False),
+}
+DEFAULT_LISTING_ORDERING = '-created_at'
+
+# Search results in page mode are ordered by relevance unless ?ordering=
+# asks otherwise. Relevance has no stable keyset, so cursor mode falls
+# back to the regular orderings.
+RELEVANCE_ORDERING = 'relevance'
+
+# Seconds a total count is reused for the same filtered queryset
+COUNT_CACHE_SECONDS = 30
+
+
+def cached_count(queryset):
+    """
+    Count a queryset, reusing the result for COUNT_CACHE_SECONDS.
+
+    The key is derived from the SQL, so each filter combination gets its
+    own entry. Counts may lag behind writes by up to the cache timeout.
+    """
+    sql = str(queryset.order_by().query)
+    key = 'animals:count:' + hashlib.md5(sql.encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_SECONDS)
+    return count
+
+
+def get_listing_ordering(request):
+    """
+    Resolve ?ordering= to (field, descending).
+
+    Raises:
+        ValidationError: If the ordering is not one of LISTING_ORDERINGS
+    """
+    ordering = request.query_params.get('ordering') or DEFAULT_LISTING_ORDERING
+    if ordering not in LISTING_ORDERINGS:
+        raise ValidationError({'ordering': [f"Geçersiz sıralama. Seçenekler: {', '.join(LISTING_ORDERINGS)}"]})
+    return LISTING_ORDERINGS[ordering]
+
+
+def order_listings(queryset, field, descending):
+    prefix = '-' if descending else ''
+    return queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator whose total count comes from cached_count()."""
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
 
 
 class AnimalListingPagination(PageNumberPagination):
     """
     Pagination for animal listings.
-    
+
+    Page mode (default):
     - Default page size: 10
     - Client can override with ?page_size= (max 50)
     - Standard pagination response with count, next, previous, results
+    - count is cached briefly per filter combination
+
+    Cursor mode (?cursor= present, empty for the first page):
+    - Keyset pagination on (sort key, id), so every page costs the same
+      regardless of depth and no COUNT(*) is issued
+    - Response: next, next_cursor, results (+ count with ?include_count=true)
+    - Forward only; the cursor is opaque and tied to the ordering it was
+      issued for
+
+    Both modes accept ?ordering= with a key from LISTING_ORDERINGS. With
+    ?search= page mode defaults to relevance order.
+    Listings whose sort value changes while paging (e.g. view_count) may
+    appear twice or be skipped in cursor mode.
     """
-    
+
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 50
+    cursor_query_param = 'cursor'
+    django_paginator_class = CachedCountPaginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        cursor_mode = self.cursor_query_param in request.query_params
+
+        if not cursor_mode and request.query_params.get('search') and \
+                request.query_params.get('ordering', RELEVANCE_ORDERING) == RELEVANCE_ORDERING:
+            # Keep the relevance order set by ListingSearchFilter
+            self.cursor_mode = False
+            return super().paginate_queryset(queryset, request, view)
+
+        field, descending = get_listing_ordering(request)
+        queryset = order_listings(queryset, field, descending)
+
+        if not cursor_mode:
+            self.cursor_mode = False
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor_mode = True
+        self.count = None
+        if request.query_params.get('include_count') == 'true':
+            self.count = cached_count(queryset)
+
+        raw_cursor = request.query_params.get(self.cursor_query_param)
+        if raw_cursor:
+            position = self.decode_cursor(raw_cursor, field)
+            queryset = queryset.filter(self.keyset_filter(field, descending, *position))
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1], field) if len(rows) > page_size else None
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+
+        response = {
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        }
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    @staticmethod
+    def keyset_filter(field, descending, value, pk):
+        """Rows strictly after (value, pk) in the given direction."""
+        op = 'lt' if descending else 'gt'
+        return Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': pk})
+
+    @staticmethod
+    def encode_cursor(listing, field):
+        value = getattr(listing, field)
+        value = value.isoformat() if field == 'created_at' else str(value)
+        payload = {'f': field, 'v': value, 'i': listing.id}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor, field):
+        """
+        Decode a cursor produced by encode_cursor.
+
+        Raises:
+            ValidationError: If the cursor is malformed or was issued for
+                a different ordering field
+        """
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if payload['f'] != field:
+                raise ValueError
+            if field == 'created_at':
+                value = parse_datetime(payload['v'])
+                if value is None:
+                    raise ValueError
+            elif field == 'price':
+                value = Decimal(payload['v'])
+            else:
+                value = int(payload['v'])
+            return value, int(payload['i'])
+        except (ValueError, KeyError, TypeError, InvalidOperation):
+            raise ValidationError({'cursor': ['Invalid cursor.']})
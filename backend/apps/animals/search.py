@@ -0,0 +1,189 @@
+"""
+Full-text search for animal listings.
+
+Each listing keeps a `search_document`: its searchable fields folded to
+ASCII-ish lowercase tokens (ı/i, ş/s, ğ/g, ç/c, ö/o, ü/u), so "Kıvırcık",
+"KIVIRCIK" and "kivircik" all match. Queries are folded the same way and
+every term is matched as a prefix, which also serves typeahead.
+
+The index depends on the database:
+
+- PostgreSQL: GIN expression index on to_tsvector('simple', search_document),
+  ranked with ts_rank.
+- SQLite: FTS5 table `animals_listing_fts` (rowid = listing id), kept in
+  sync by the post_save/post_delete signals, ranked with bm25.
+- Anything else: substring match over the single search_document column.
+
+Run `manage.py rebuild_listing_search` after bulk changes that bypass
+save() (queryset.update(), raw SQL, fixtures).
+"""
+
+import re
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+# Fields concatenated into the search document, most important first
+SEARCH_FIELDS = ['title', 'breed', 'city', 'district', 'ear_tag_no', 'description']
+
+FTS_TABLE = 'animals_listing_fts'
+PG_INDEX = 'animals_listing_search_idx'
+
+# Ignore anything past this many query terms
+MAX_QUERY_TERMS = 8
+
+_TURKISH_FOLD = str.maketrans({
+    'ı': 'i', 'ş': 's', 'ğ': 'g', 'ç': 'c', 'ö': 'o', 'ü': 'u',
+    'â': 'a', 'î': 'i', 'û': 'u',
+})
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def fold_turkish(text):
+    """
+    Lowercase with Turkish rules, then strip Turkish diacritics.
+
+    'I' lowercases to 'ı' and 'İ' to 'i' before folding, so dotted and
+    dotless forms end up as the same letter.
+    """
+    text = text.replace('I', 'ı').replace('İ', 'i').lower()
+    return text.translate(_TURKISH_FOLD)
+
+
+def tokenize(text):
+    """Split folded text into alphanumeric tokens."""
+    return _TOKEN_RE.findall(fold_turkish(text or ''))
+
+
+def build_search_document(listing):
+    """Return the folded, space-separated tokens of a listing's searchable fields."""
+    parts = [getattr(listing, field) or '' for field in SEARCH_FIELDS]
+    return ' '.join(tokenize(' '.join(str(part) for part in parts)))
+
+
+class BaseSearchBackend:
+    """
+    Applies a search query to an AnimalListing queryset.
+
+    Subclasses implement filter(), which must restrict the queryset to
+    matches and annotate a `search_rank` where higher is better.
+    """
+
+    def search(self, queryset, query):
+        """
+        Filter and rank a queryset by a user query.
+
+        Returns the queryset unchanged if the query has no terms.
+        """
+        terms = tokenize(query)[:MAX_QUERY_TERMS]
+        if not terms:
+            return queryset
+        return self.filter(queryset, terms).order_by('-search_rank', '-id')
+
+    def filter(self, queryset, terms):
+        raise NotImplementedError
+
+    def index(self, listing):
+        """Update the index entry of a saved listing."""
+
+    def remove(self, listing_id):
+        """Remove a deleted listing from the index."""
+
+    def rebuild(self):
+        """Rebuild the whole index from search_document."""
+
+    @staticmethod
+    def column(queryset):
+        return f'{connection.ops.quote_name(queryset.model._meta.db_table)}.search_document'
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """tsvector matching served by the PG_INDEX expression index."""
+
+    def filter(self, queryset, terms):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        vector = f"to_tsvector('simple', {self.column(queryset)})"
+        return queryset.annotate(
+            search_rank=RawSQL(f"ts_rank({vector}, to_tsquery('simple', %s))", (tsquery,), output_field=FloatField())
+        ).filter(
+            RawSQL(f"{vector} @@ to_tsquery('simple', %s)", (tsquery,), output_field=BooleanField())
+        )
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """FTS5 matching against FTS_TABLE."""
+
+    def filter(self, queryset, terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        # Join the FTS table so MATCH runs once per query, not once per row.
+        # The unary + keeps SQLite from probing the FTS table by rowid from
+        # an outer loop over listings (one MATCH per row); the FTS scan
+        # always drives the join. bm25() is lower for better matches, so
+        # negate it.
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'+{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'-bm25({FTS_TABLE})'},
+        )
+
+    def index(self, listing):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [listing.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, search_document) VALUES (%s, %s)",
+                [listing.pk, listing.search_document]
+            )
+
+    def remove(self, listing_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [listing_id])
+
+    def rebuild(self):
+        from .models import AnimalListing
+        table = connection.ops.quote_name(AnimalListing._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(f"INSERT INTO {FTS_TABLE} (rowid, search_document) SELECT id, search_document FROM {table}")
+
+
+class ContainsSearchBackend(BaseSearchBackend):
+    """Unindexed fallback: every term must appear in search_document."""
+
+    def filter(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(search_document__contains=term)
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def create_fts_table(schema_editor):
+    """Create the FTS5 table on SQLite. Returns False if FTS5 is unavailable."""
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(search_document, tokenize='unicode61')"
+        )
+    except Exception:
+        return False
+    return True
+
+
+def _fts_table_exists():
+    with connection.cursor() as cursor:
+        return FTS_TABLE in connection.introspection.table_names(cursor)
+
+
+_backend = None
+
+
+def get_search_backend():
+    """Return the search backend for the default database."""
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        elif connection.vendor == 'sqlite' and _fts_table_exists():
+            _backend = SQLiteFTSSearchBackend()
+        else:
+            _backend = ContainsSearchBackend()
+    return _backend
@@ -70,12 +70,13 @@ class AnimalListingSerializer(serializers.ModelSerializer):
             return f"{years} yaş {months} ay"
     
     def get_primary_image_url(self, obj):
-        """Return URL for the primary image if it exists."""
-        primary_image = obj.images.filter(is_primary=True).first()
-        if not primary_image:
-            # Fallback to first image if no primary is set
-            primary_image = obj.images.first()
-            
+        """
+        Return URL for the primary image if it exists.
+        
+        Reads the denormalized primary_image; select_related('primary_image')
+        on the queryset keeps this free of per-row queries.
+        """
+        primary_image = obj.primary_image
         if primary_image:
             request = self.context.get('request')
             if request:
@@ -83,8 +84,6 @@ class AnimalListingSerializer(serializers.ModelSerializer):
             return primary_image.image.url
         return None
     
-
-    
     def validate_age_months(self, value):
         """Age must be non-negative."""
         if value is not None and value < 0:
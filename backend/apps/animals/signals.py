@@ -1,7 +1,9 @@
 import os
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import AnimalImage
+from .facets import apply_change, facet_key, loaded_facet_key
+from .models import AnimalImage, AnimalListing
+from .search import get_search_backend
 
 @receiver(post_delete, sender=AnimalImage)
 def auto_delete_file_on_delete(sender, instance, **kwargs):
@@ -15,6 +17,13 @@ def auto_delete_file_on_delete(sender, instance, **kwargs):
             except Exception as e:
                 print(f"Error deleting file {instance.image.path}: {e}")
 
+@receiver(post_delete, sender=AnimalImage)
+def refresh_primary_image_on_delete(sender, instance, **kwargs):
+    """
+    Pick a new primary image for the listing after an image is deleted.
+    """
+    AnimalListing.refresh_primary_image(instance.listing_id)
+
 @receiver(pre_save, sender=AnimalImage)
 def auto_delete_file_on_change(sender, instance, **kwargs):
     """
@@ -36,3 +45,33 @@ def auto_delete_file_on_change(sender, instance, **kwargs):
                 os.remove(old_file.path)
             except Exception as e:
                 print(f"Error deleting old file {old_file.path}: {e}")
+
+@receiver(post_save, sender=AnimalListing)
+def index_listing_on_save(sender, instance, **kwargs):
+    """
+    Keep the search index in sync with search_document.
+    """
+    get_search_backend().index(instance)
+
+@receiver(post_delete, sender=AnimalListing)
+def remove_listing_from_index(sender, instance, **kwargs):
+    """
+    Drop a deleted listing from the search index.
+    """
+    get_search_backend().remove(instance.pk)
+
+@receiver(post_save, sender=AnimalListing)
+def update_facet_counts(sender, instance, created, **kwargs):
+    """
+    Move the listing between facet buckets (inactive listings are not counted).
+    The old bucket comes from the values the listing was loaded with.
+    """
+    old_key = None if created else loaded_facet_key(instance)
+    apply_change(old_key, facet_key(instance), instance)
+
+@receiver(post_delete, sender=AnimalListing)
+def remove_listing_from_facets(sender, instance, **kwargs):
+    """
+    Stop counting a deleted listing.
+    """
+    apply_change(loaded_facet_key(instance), None, instance)
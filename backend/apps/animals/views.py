@@ -2,16 +2,22 @@
 Views for animals app.
 """
 
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from apps.accounts.permissions import IsOwner
+from .counters import view_counter
 from .models import AnimalListing
 from .serializers import AnimalListingSerializer
-from .filters import AnimalListingFilter
+from .filters import AnimalListingFilter, ListingSearchFilter
 from .pagination import AnimalListingPagination
+from .facets import FacetEngine
+from .search import get_search_backend
+
+SUGGEST_DEFAULT_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
 
 
 class AnimalListingViewSet(viewsets.ModelViewSet):
@@ -25,19 +31,18 @@ class AnimalListingViewSet(viewsets.ModelViewSet):
     serializer_class = AnimalListingSerializer
     queryset = AnimalListing.objects.filter(is_active=True)
     filterset_class = AnimalListingFilter
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    search_fields = ['title', 'description', 'breed', 'city', 'district', 'ear_tag_no']
+    filter_backends = [DjangoFilterBackend, ListingSearchFilter]
     pagination_class = AnimalListingPagination
     
     def get_permissions(self):
         """
         Set different permissions for different actions.
         
-        - list/retrieve: IsAuthenticated
+        - list/retrieve/suggest/facets: AllowAny
         - create: IsAuthenticated (any user can create)
         - update/partial_update/destroy: IsAuthenticated + IsOwner
         """
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'suggest', 'facets']:
             return [AllowAny()]
         elif self.action == 'create':
             return [IsAuthenticated()]
@@ -54,11 +59,11 @@ class AnimalListingViewSet(viewsets.ModelViewSet):
         if self.action in ['update', 'partial_update', 'destroy', 'retrieve']:
             # For update/delete/retrieve, show all listings (including inactive)
             # Permission check will ensure only owner can access
-            return AnimalListing.objects.all()
+            return AnimalListing.objects.select_related('seller', 'primary_image')
         
         # Check for 'mine=true' filter
         if self.request.query_params.get('mine') == 'true':
-            qs = AnimalListing.objects.filter(seller=self.request.user)
+            qs = AnimalListing.objects.filter(seller=self.request.user).select_related('seller', 'primary_image')
             
             # Check for 'deleted=true' to show trash bin
             if self.request.query_params.get('deleted') == 'true':
@@ -68,7 +73,7 @@ class AnimalListingViewSet(viewsets.ModelViewSet):
             return qs.filter(is_active=True)
             
         # For public list, only show active listings
-        return AnimalListing.objects.filter(is_active=True)
+        return AnimalListing.objects.filter(is_active=True).select_related('seller', 'primary_image')
     
     # ... (perform_create, update, partial_update methods remain same) ...
     def perform_create(self, serializer):
@@ -83,20 +88,56 @@ class AnimalListingViewSet(viewsets.ModelViewSet):
         """Partial update the listing."""
         serializer.save()
     
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """
+        Typeahead suggestions for the search box.
+        
+        GET /api/animals/suggest/?q=<text>&limit=<n>
+        
+        Every word is matched as a prefix, so partial input like "kıv ank"
+        finds "Kıvırcık" listings in Ankara. Returns at most 20 items.
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', SUGGEST_DEFAULT_LIMIT)), 1), SUGGEST_MAX_LIMIT)
+        except ValueError:
+            limit = SUGGEST_DEFAULT_LIMIT
+        
+        query = request.query_params.get('q', '')
+        queryset = AnimalListing.objects.filter(is_active=True)
+        results = get_search_backend().search(queryset, query) if query.strip() else queryset.none()
+        
+        return Response(list(
+            results.values('id', 'title', 'breed', 'animal_type', 'city', 'district')[:limit]
+        ))
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Result counts for the search page filters.
+        
+        GET /api/animals/facets/?<same filters as the list endpoint>
+        
+        Each facet (animal_type, city, district, gender, price, age) is
+        counted with every other filter applied, so the counts show how
+        many listings selecting that value would return.
+        """
+        return Response(FacetEngine(request.query_params).get_facets())
+    
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve a listing and increment view count.
         Skips increment if the requester is the owner.
+        The increment is buffered (see counters.py), so view_count is
+        approximate for other readers.
         """
         instance = self.get_object()
         
         # Only increment view count if user is not the owner
         if not request.user.is_authenticated or request.user != instance.seller:
-            # Use F() expression to avoid race conditions
-            from django.db.models import F
-            AnimalListing.objects.filter(pk=instance.pk).update(view_count=F('view_count') + 1)
-            # Refresh instance to get updated view_count
-            instance.refresh_from_db()
+            # Buffered, written in batches; report stored + unflushed views
+            view_counter.increment(instance.pk)
+            instance.view_count += view_counter.pending(instance.pk)
         
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
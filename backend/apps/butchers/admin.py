@@ -3,13 +3,14 @@ Admin configuration for butchers app.
 """
 
 from django.contrib import admin
-from .models import ButcherProfile, Appointment
+from .holds import release_hold
+from .models import ButcherProfile, Appointment, AppointmentSlot, SlotHold
 
 
 @admin.register(ButcherProfile)
 class ButcherProfileAdmin(admin.ModelAdmin):
     """Admin for butcher profiles."""
-    list_display = ['butcher_name', 'city', 'district', 'rating', 'is_active', 'created_at']
+    list_display = ['butcher_name', 'city', 'district', 'rating', 'rating_count', 'is_active', 'created_at']
     list_filter = ['is_active', 'city']
     search_fields = ['first_name', 'last_name', 'city', 'user__email']
     ordering = ['-rating', '-created_at']
@@ -18,7 +19,11 @@ class ButcherProfileAdmin(admin.ModelAdmin):
         """Display full name."""
         return f"{obj.first_name} {obj.last_name}"
     butcher_name.short_description = 'Kasap Adı'
-    readonly_fields = ('created_at',)
+    # Rating aggregates are maintained by review writes (apps.reviews.aggregates)
+    readonly_fields = (
+        'created_at', 'rating', 'rating_sum', 'rating_count', 'rating_count_1',
+        'rating_count_2', 'rating_count_3', 'rating_count_4', 'rating_count_5',
+    )
 
 
 @admin.register(Appointment)
@@ -32,3 +37,39 @@ class AppointmentAdmin(admin.ModelAdmin):
     search_fields = ('butcher__first_name', 'butcher__last_name', 'user__email', 'note')
     ordering = ('-created_at',)
     readonly_fields = ('created_at',)
+
+
+@admin.register(AppointmentSlot)
+class AppointmentSlotAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the slot calendar (maintained by availability.py).
+    """
+    
+    list_display = ('butcher', 'date', 'time', 'booked', 'capacity')
+    list_filter = ('date',)
+    search_fields = ('butcher__first_name', 'butcher__last_name')
+    ordering = ('date', 'time')
+    readonly_fields = ('booked',)
+
+
+@admin.register(SlotHold)
+class SlotHoldAdmin(admin.ModelAdmin):
+    """
+    Admin interface for slot holds (read only; places are counted on the slot).
+    """
+    
+    list_display = ('slot', 'user', 'expires_at', 'created_at')
+    search_fields = ('user__email',)
+    ordering = ('expires_at',)
+    readonly_fields = ('slot', 'user', 'expires_at', 'created_at')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def delete_model(self, request, obj):
+        """Give the place back along with the hold."""
+        release_hold(obj.id, obj.user_id)
+    
+    def delete_queryset(self, request, queryset):
+        for hold in queryset:
+            self.delete_model(request, hold)
@@ -0,0 +1,257 @@
+"""
+Butcher availability: a materialised calendar of bookable slots.
+
+Each butcher configures working hours (work_start - work_end), working days,
+slot length (slot_minutes) and how many appointments a slot takes
+(slot_capacity). From these, one AppointmentSlot row per bookable time is
+kept for the next HORIZON_DAYS days:
+
+- sync_slots() (re)builds a butcher's slots; it runs when the availability
+  settings of a profile are saved and daily from `manage.py sync_butcher_slots`,
+  which also extends the horizon and removes past slots
+- free_slots() returns the free slots of many butchers over a date range
+  with one query on the (butcher, date, time) unique index
+- reserve() claims a place with a single conditional UPDATE
+  (booked < capacity), so concurrent bookings of the last place cannot
+  both succeed; release() gives it back when an appointment is rejected,
+  cancelled or deleted
+
+A place is taken either by an active appointment or by a SlotHold (see
+holds.py). Expired holds still count in `booked` until they are reclaimed:
+free_slots() already reports their places as free, reserve() reclaims them
+when it finds the slot full, and sync_slots() deletes them and recounts.
+"""
+
+from datetime import date as date_type, datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Appointment, AppointmentSlot, SlotHold
+
+DEFAULTS = {
+    'HORIZON_DAYS': 21,
+    'MAX_RANGE_DAYS': 14,
+    'MAX_BUTCHERS': 50,
+    'HOLD_SECONDS': 300,
+    'MAX_HOLDS_PER_USER': 3,
+}
+
+# Appointments that occupy a place in their slot
+ACTIVE_STATUSES = (Appointment.PENDING, Appointment.APPROVED)
+
+# ButcherProfile fields the calendar is built from
+AVAILABILITY_FIELDS = ('work_start', 'work_end', 'working_days', 'slot_minutes', 'slot_capacity')
+
+
+class SlotUnavailable(Exception):
+    """The slot does not exist, is in the past or is full."""
+
+
+def get_setting(name):
+    """Read a BUTCHER_AVAILABILITY setting, falling back to DEFAULTS."""
+    return getattr(settings, 'BUTCHER_AVAILABILITY', {}).get(name, DEFAULTS[name])
+
+
+def slot_times(butcher):
+    """Start times of the butcher's slots on a working day."""
+    day = date_type.min
+    current = datetime.combine(day, butcher.work_start)
+    end = datetime.combine(day, butcher.work_end)
+    step = timedelta(minutes=butcher.slot_minutes)
+    times = []
+    while current + step <= end:
+        times.append(current.time())
+        current += step
+    return times
+
+
+def build_calendar(butcher, start, end):
+    """
+    Bookable (date, time) pairs of the butcher between start and end
+    (inclusive).
+    """
+    times = slot_times(butcher)
+    working_days = set(butcher.working_days or [])
+    calendar = []
+    day = start
+    while day <= end:
+        if day.weekday() in working_days:
+            calendar += [(day, time) for time in times]
+        day += timedelta(days=1)
+    return calendar
+
+
+def sync_slots(butcher, start=None, days=None):
+    """
+    Bring the butcher's slots from `start` (default today) for `days` days
+    (default HORIZON_DAYS) in line with the profile:
+
+    - missing slots are created
+    - expired holds are deleted
+    - capacity follows slot_capacity, and `booked` is recounted from the
+      active appointments and live holds
+    - slots outside the working hours are deleted when empty; booked ones
+      are kept (their appointments stand) but closed to new bookings
+
+    Returns:
+        (created, updated, deleted)
+    """
+    start = start or timezone.localdate()
+    end = start + timedelta(days=(days or get_setting('HORIZON_DAYS')) - 1)
+    wanted = set(build_calendar(butcher, start, end))
+
+    with transaction.atomic():
+        existing = {
+            (slot.date, slot.time): slot
+            for slot in AppointmentSlot.objects.select_for_update().filter(
+                butcher=butcher, date__range=(start, end)
+            )
+        }
+        SlotHold.objects.filter(
+            slot__butcher=butcher, slot__date__range=(start, end), expires_at__lte=timezone.now()
+        ).delete()
+        booked = {
+            (row['date'], row['time']): row['count']
+            for row in Appointment.objects.filter(
+                butcher=butcher, date__range=(start, end), status__in=ACTIVE_STATUSES
+            ).values('date', 'time').annotate(count=Count('id'))
+        }
+        for row in SlotHold.objects.filter(
+            slot__butcher=butcher, slot__date__range=(start, end)
+        ).values('slot__date', 'slot__time').annotate(count=Count('id')):
+            key = (row['slot__date'], row['slot__time'])
+            booked[key] = booked.get(key, 0) + row['count']
+
+        new = [
+            AppointmentSlot(
+                butcher=butcher, date=day, time=time,
+                capacity=max(butcher.slot_capacity, booked.get((day, time), 0)),
+                booked=booked.get((day, time), 0),
+            )
+            for day, time in sorted(wanted - existing.keys())
+        ]
+        AppointmentSlot.objects.bulk_create(new, batch_size=500, ignore_conflicts=True)
+
+        changed, empty = [], []
+        for key, slot in existing.items():
+            count = booked.get(key, 0)
+            if key not in wanted and count == 0:
+                empty.append(slot.id)
+                continue
+            capacity = max(butcher.slot_capacity, count) if key in wanted else count
+            if (slot.capacity, slot.booked) != (capacity, count):
+                slot.capacity, slot.booked = capacity, count
+                changed.append(slot)
+        AppointmentSlot.objects.bulk_update(changed, ['capacity', 'booked'], batch_size=500)
+        deleted, _ = AppointmentSlot.objects.filter(id__in=empty).delete()
+    return len(new), len(changed), deleted
+
+
+def open_slots(start, end):
+    """
+    Slots between start and end (inclusive) whose time has not passed,
+    annotated with `places` left. Places of expired holds count as free.
+    """
+    now = timezone.localtime()
+    expired = SlotHold.objects.filter(
+        slot=OuterRef('pk'), expires_at__lte=now
+    ).order_by().values('slot').annotate(n=Count('id')).values('n')
+    return AppointmentSlot.objects.filter(
+        date__range=(max(start, now.date()), end),
+    ).exclude(
+        date=now.date(), time__lte=now.time()
+    ).annotate(
+        places=F('capacity') - F('booked')
+        + Coalesce(Subquery(expired, output_field=IntegerField()), Value(0))
+    )
+
+
+def free_slots(butcher_ids, start, end):
+    """
+    Free slots of the active butchers in butcher_ids between start and end
+    (inclusive), see open_slots(). One query.
+
+    Returns:
+        {butcher_id: {date: [(time, places left), ...]}}
+    """
+    rows = open_slots(start, end).filter(
+        butcher_id__in=butcher_ids,
+        butcher__is_active=True,
+        places__gt=0,
+    ).order_by('butcher_id', 'date', 'time').values_list('butcher_id', 'date', 'time', 'places')
+
+    result = {}
+    for butcher_id, day, time, places in rows:
+        result.setdefault(butcher_id, {}).setdefault(day, []).append((time, places))
+    return result
+
+
+def reserve(butcher_id, day, time):
+    """
+    Claim one place in a slot. Call it in the transaction that writes the
+    appointment or hold, so the place is given back if that write fails.
+
+    Returns:
+        The slot id
+
+    Raises:
+        SlotUnavailable: no such slot, the slot has started, or it is full
+    """
+    now = timezone.localtime()
+    if (day, time) <= (now.date(), now.time()):
+        raise SlotUnavailable
+    slot_id = AppointmentSlot.objects.filter(
+        butcher_id=butcher_id, date=day, time=time
+    ).values_list('id', flat=True).first()
+    if slot_id is None:
+        raise SlotUnavailable
+    if _claim(slot_id):
+        return slot_id
+    # Full: give back the places of expired holds and try once more
+    if reclaim_expired_holds(slot_id) and _claim(slot_id):
+        return slot_id
+    raise SlotUnavailable
+
+
+def _claim(slot_id):
+    return AppointmentSlot.objects.filter(
+        id=slot_id, booked__lt=F('capacity')
+    ).update(booked=F('booked') + 1)
+
+
+def release(butcher_id, day, time):
+    """Give back one place of a slot (no-op for slots no longer kept)."""
+    AppointmentSlot.objects.filter(
+        butcher_id=butcher_id, date=day, time=time, booked__gt=0
+    ).update(booked=F('booked') - 1)
+
+
+def reclaim_expired_holds(slot_id):
+    """
+    Delete the expired holds of a slot and give their places back.
+
+    Returns:
+        Number of holds reclaimed
+    """
+    with transaction.atomic():
+        # Only holds this call actually deleted are given back, so
+        # concurrent reclaims (or a confirm) cannot free a place twice
+        reclaimed, _ = SlotHold.objects.filter(slot_id=slot_id, expires_at__lte=timezone.now()).delete()
+        if reclaimed:
+            AppointmentSlot.objects.filter(id=slot_id).update(booked=F('booked') - reclaimed)
+    return reclaimed
+
+
+def expire_holds():
+    """
+    Reclaim every expired hold.
+
+    Returns:
+        Number of holds reclaimed
+    """
+    slot_ids = SlotHold.objects.filter(
+        expires_at__lte=timezone.now()
+    ).values_list('slot_id', flat=True).distinct()
+    return sum(reclaim_expired_holds(slot_id) for slot_id in list(slot_ids))
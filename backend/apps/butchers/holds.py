@@ -0,0 +1,116 @@
+"""
+Short-lived holds on appointment slots.
+
+Booking is two steps so that a crowd of users trying the same butcher only
+competes for the slot counter, never for Appointment rows:
+
+1. hold_slot() claims a place (availability.reserve) and records a SlotHold
+   that expires after HOLD_SECONDS. A user has at most MAX_HOLDS_PER_USER
+   live holds; picking the same slot again renews the existing hold (an
+   expired one only if the user is below the limit).
+2. confirm_hold() deletes the hold and writes the Appointment, which takes
+   over the hold's place. A hold confirmed after it expired is still
+   accepted if the place can be claimed again.
+
+release_hold() gives the place back at once; abandoned holds are reclaimed
+after they expire (see availability.reclaim_expired_holds).
+"""
+
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .availability import get_setting, reclaim_expired_holds, reserve
+from .models import Appointment, AppointmentSlot, SlotHold
+
+
+class HoldError(Exception):
+    """Base class of hold errors; `code` is returned to clients."""
+    code = 'HOLD_ERROR'
+
+
+class TooManyHolds(HoldError):
+    code = 'TOO_MANY_HOLDS'
+
+
+class HoldNotFound(HoldError):
+    code = 'HOLD_NOT_FOUND'
+
+
+def hold_slot(user, butcher_id, day, time):
+    """
+    Hold one place of a slot for `user`.
+
+    Returns:
+        The SlotHold
+
+    Raises:
+        SlotUnavailable: the slot does not exist, has started or is full
+        TooManyHolds: the user already has MAX_HOLDS_PER_USER live holds
+            (also when renewing an expired hold)
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=get_setting('HOLD_SECONDS'))
+    with transaction.atomic():
+        renewed = SlotHold.objects.filter(
+            user=user, slot__butcher_id=butcher_id, slot__date=day, slot__time=time
+        ).first()
+        # A live hold is already within the limit; an expired one becomes
+        # live again, so it has to fit like a new hold
+        if renewed is None or renewed.expires_at <= now:
+            if SlotHold.objects.filter(user=user, expires_at__gt=now).count() >= get_setting('MAX_HOLDS_PER_USER'):
+                raise TooManyHolds
+        if renewed is not None:
+            # A hold row still counts in `booked` (expired or not) until it
+            # is deleted, so renewing it needs no new claim
+            renewed.expires_at = expires_at
+            renewed.save(update_fields=['expires_at'])
+            return renewed
+
+        slot_id = reserve(butcher_id, day, time)
+        return SlotHold.objects.create(slot_id=slot_id, user=user, expires_at=expires_at)
+
+
+def confirm_hold(hold_id, user, listing=None, note=''):
+    """
+    Turn the user's hold into a pending Appointment.
+
+    Returns:
+        The Appointment
+
+    Raises:
+        HoldNotFound: no such hold of the user (confirmed, released or
+            reclaimed after it expired)
+        SlotUnavailable: the hold expired and the slot has filled up since
+    """
+    with transaction.atomic():
+        hold = SlotHold.objects.select_related('slot').filter(id=hold_id, user=user).first()
+        if hold is None:
+            raise HoldNotFound
+        slot = hold.slot
+        confirmed, _ = SlotHold.objects.filter(id=hold.id, expires_at__gt=timezone.now()).delete()
+        if not confirmed:
+            # Expired: give its place back and compete for the slot again
+            if not reclaim_expired_holds(slot.id):
+                raise HoldNotFound
+            reserve(slot.butcher_id, slot.date, slot.time)
+        return Appointment.objects.create(
+            butcher_id=slot.butcher_id, user=user, listing=listing,
+            date=slot.date, time=slot.time, note=note,
+        )
+
+
+def release_hold(hold_id, user):
+    """
+    Give a hold's place back before it expires.
+
+    Raises:
+        HoldNotFound: no such hold of the user
+    """
+    with transaction.atomic():
+        slot_id = SlotHold.objects.filter(id=hold_id, user=user).values_list('slot_id', flat=True).first()
+        if slot_id is None:
+            raise HoldNotFound
+        deleted, _ = SlotHold.objects.filter(id=hold_id).delete()
+        if deleted:
+            AppointmentSlot.objects.filter(id=slot_id, booked__gt=0).update(booked=F('booked') - 1)
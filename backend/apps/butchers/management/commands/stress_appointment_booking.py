@@ -0,0 +1,162 @@
+import random
+import threading
+import time
+from collections import Counter
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from apps.butchers import availability, holds
+from apps.butchers.models import Appointment, AppointmentSlot, ButcherProfile, SlotHold
+
+User = get_user_model()
+
+STRESS_USER_DOMAIN = 'stress.kurbanlink.local'
+
+
+class Command(BaseCommand):
+    help = (
+        'Stress tests two-step booking: --threads users hold and confirm slots of one '
+        'butcher at the same moment, then the slot counters are checked against the '
+        'appointments and holds. Use PostgreSQL for meaningful numbers; SQLite '
+        'serialises writers and reports lock timeouts as errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--butcher', type=int, default=None, help='Profile id (default: first active butcher)')
+        parser.add_argument('--date', type=str, default=None, help='YYYY-MM-DD (default: first day with free slots)')
+        parser.add_argument('--slots', type=int, default=1, help='Free slots of the day the threads compete for')
+        parser.add_argument('--threads', type=int, default=50)
+        parser.add_argument('--abandon', type=float, default=0.0,
+                            help='Share of holders that never confirm (their holds expire)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--cleanup', action='store_true',
+                            help='Delete stress users with their holds and appointments and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.cleanup()
+            return
+
+        butcher = self.get_butcher(options['butcher'])
+        slots = self.pick_slots(butcher, options['date'], options['slots'])
+        places = sum(slot.capacity - slot.booked for slot in slots)
+        users = self.create_users(options['threads'])
+        self.stdout.write(
+            f'{len(users)} threads against butcher {butcher.id}, {len(slots)} slots on {slots[0].date} '
+            f'with {places} free places'
+        )
+
+        rng = random.Random(options['seed'])
+        plans = [(user, rng.choice(slots), rng.random() < options['abandon']) for user in users]
+        outcomes = Counter()
+        timings = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(plans))
+
+        def book(user, slot, abandon):
+            try:
+                barrier.wait()
+                started = time.perf_counter()
+                try:
+                    hold = holds.hold_slot(user, butcher.id, slot.date, slot.time)
+                    if abandon:
+                        outcome = 'abandoned'
+                    else:
+                        holds.confirm_hold(hold.id, user, note='stress')
+                        outcome = 'booked'
+                except availability.SlotUnavailable:
+                    outcome = 'slot_full'
+                except holds.HoldError as e:
+                    outcome = e.code.lower()
+                except Exception as e:
+                    outcome = f'error:{type(e).__name__}'
+                with lock:
+                    outcomes[outcome] += 1
+                    timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=plan) for plan in plans]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        p50, p99 = (timings[int(len(timings) * q)] for q in (0.5, 0.99))
+        self.stdout.write(f'Finished in {elapsed:.2f}s, hold+confirm p50 {p50:.1f} ms, p99 {p99:.1f} ms')
+        for outcome, count in sorted(outcomes.items()):
+            self.stdout.write(f'  {outcome:<20}{count:>6}')
+
+        problems = self.check_counters(slots)
+        taken = sum(AppointmentSlot.objects.filter(
+            id__in=[slot.id for slot in slots]
+        ).values_list('booked', flat=True)) - sum(slot.booked for slot in slots)
+        if outcomes['booked'] + outcomes['abandoned'] > places:
+            problems.append(f"{outcomes['booked'] + outcomes['abandoned']} holds succeeded "
+                            f"but only {places} places were free")
+        if problems:
+            raise CommandError('Overbooking detected:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS(
+            f'{taken} of {places} places taken, no slot over capacity. Remove the stress data with --cleanup.'
+        ))
+
+    def get_butcher(self, butcher_id):
+        butchers = ButcherProfile.objects.filter(is_active=True).order_by('id')
+        butcher = butchers.filter(id=butcher_id).first() if butcher_id else butchers.first()
+        if butcher is None:
+            raise CommandError('No active butcher found.')
+        return butcher
+
+    def pick_slots(self, butcher, day, count):
+        """The first `count` free slots of the butcher on `day` (default: the first day with free slots)."""
+        availability.sync_slots(butcher)
+        slots = AppointmentSlot.objects.filter(
+            butcher=butcher, date__gt=timezone.localdate()
+        ).order_by('date', 'time')
+        if day:
+            slots = slots.filter(date=day)
+        free = [slot for slot in slots if slot.booked < slot.capacity]
+        if not free:
+            raise CommandError('No free slots. Check the butcher\'s working hours or pass another --date.')
+        return [slot for slot in free if slot.date == free[0].date][:count]
+
+    def create_users(self, count):
+        run = int(time.time())
+        User.objects.bulk_create([
+            User(email=f'user{i}-{run}@{STRESS_USER_DOMAIN}', is_active=True) for i in range(count)
+        ])
+        return list(User.objects.filter(email__endswith=f'-{run}@{STRESS_USER_DOMAIN}').order_by('id'))
+
+    def check_counters(self, slots):
+        """Compare each slot's `booked` with its active appointments and holds."""
+        problems = []
+        for slot in AppointmentSlot.objects.filter(id__in=[slot.id for slot in slots]):
+            appointments = Appointment.objects.filter(
+                butcher_id=slot.butcher_id, date=slot.date, time=slot.time,
+                status__in=availability.ACTIVE_STATUSES
+            ).count()
+            held = SlotHold.objects.filter(slot=slot).count()
+            self.stdout.write(f'  slot {slot.time}: capacity {slot.capacity}, booked {slot.booked}, '
+                              f'{appointments} appointments, {held} holds')
+            if slot.booked != appointments + held or slot.booked > slot.capacity:
+                problems.append(f'slot {slot.id}: booked {slot.booked}, capacity {slot.capacity}, '
+                                f'{appointments} appointments + {held} holds')
+        return problems
+
+    def cleanup(self):
+        users = User.objects.filter(email__endswith=f'@{STRESS_USER_DOMAIN}')
+        butchers = list(ButcherProfile.objects.filter(
+            id__in=SlotHold.objects.filter(user__in=users).values('slot__butcher_id')
+        ))
+        appointments, _ = Appointment.objects.filter(user__in=users).delete()
+        deleted, _ = users.delete()
+        # Deleting users removes their holds without giving the places back
+        for butcher in butchers:
+            availability.sync_slots(butcher)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {appointments} appointments and {deleted} stress rows.'
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.butchers.availability import expire_holds, sync_slots
+from apps.butchers.models import AppointmentSlot, ButcherProfile
+
+
+class Command(BaseCommand):
+    help = (
+        'Materialises the appointment slots of every butcher for the next HORIZON_DAYS '
+        'days from their working hours, deletes past slots and reclaims expired holds. Run daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--butchers', type=str, default='', help='Comma separated profile ids (default: all)')
+        parser.add_argument('--days', type=int, default=None, help='Days ahead (default: HORIZON_DAYS)')
+
+    def handle(self, *args, **options):
+        butchers = ButcherProfile.objects.order_by('id')
+        if options['butchers']:
+            butchers = butchers.filter(id__in=[int(value) for value in options['butchers'].split(',')])
+
+        created = updated = deleted = 0
+        for butcher in butchers.iterator():
+            counts = sync_slots(butcher, days=options['days'])
+            created += counts[0]
+            updated += counts[1]
+            deleted += counts[2]
+
+        expired = expire_holds()
+        past, _ = AppointmentSlot.objects.filter(date__lt=timezone.localdate()).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created}, updated {updated} and deleted {deleted} slots; '
+            f'reclaimed {expired} expired holds; removed {past} past slots.'
+        ))
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:47
+
+import apps.butchers.models
+import datetime
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('butchers', '0006_populate_real_butcher_names'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='appointment',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='slot_capacity',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Aynı saatte alınabilecek randevu sayısı', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(50)]),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='slot_minutes',
+            field=models.PositiveSmallIntegerField(default=30, help_text='Randevu süresi (dakika)', validators=[django.core.validators.MinValueValidator(5), django.core.validators.MaxValueValidator(480)]),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='work_end',
+            field=models.TimeField(default=datetime.time(18, 0), help_text='Çalışma bitiş saati (son randevu bu saatten önce biter)'),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='work_start',
+            field=models.TimeField(default=datetime.time(9, 0), help_text='Çalışma başlangıç saati'),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='working_days',
+            field=models.JSONField(default=apps.butchers.models.default_working_days, help_text='Çalışılan günler (0 = Pazartesi ... 6 = Pazar)'),
+        ),
+        migrations.CreateModel(
+            name='AppointmentSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('capacity', models.PositiveSmallIntegerField(help_text='Appointments the slot can take')),
+                ('booked', models.PositiveSmallIntegerField(default=0, help_text='Active appointments in the slot')),
+                ('butcher', models.ForeignKey(help_text='Butcher profile', on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='butchers.butcherprofile')),
+            ],
+            options={
+                'verbose_name': 'appointment slot',
+                'verbose_name_plural': 'appointment slots',
+                'ordering': ['butcher', 'date', 'time'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='appointmentslot',
+            constraint=models.UniqueConstraint(fields=('butcher', 'date', 'time'), name='unique_appointment_slot'),
+        ),
+        migrations.AddConstraint(
+            model_name='appointmentslot',
+            constraint=models.CheckConstraint(check=models.Q(('booked__lte', models.F('capacity'))), name='appointment_slot_within_capacity'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('butchers', '0007_appointment_slots'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='appointmentslot',
+            name='booked',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Places taken by active appointments and holds'),
+        ),
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='The place is given back after this time')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('slot', models.ForeignKey(help_text='Held slot', on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='butchers.appointmentslot')),
+                ('user', models.ForeignKey(help_text='User holding the slot', on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'slot hold',
+                'verbose_name_plural': 'slot holds',
+                'ordering': ['expires_at'],
+                'indexes': [models.Index(fields=['user', 'expires_at'], name='butchers_sl_user_id_9f23d9_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='slothold',
+            constraint=models.UniqueConstraint(fields=('slot', 'user'), name='unique_slot_hold'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:53
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_aggregates(apps, schema_editor):
+    """Count the existing reviews into the new aggregate columns."""
+    ButcherProfile = apps.get_model('butchers', 'ButcherProfile')
+    ButcherReview = apps.get_model('reviews', 'ButcherReview')
+
+    rows = ButcherReview.objects.values('butcher_id').annotate(
+        total=Sum('rating'),
+        count=Count('id'),
+        **{f'stars_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)}
+    )
+    for row in rows:
+        ButcherProfile.objects.filter(pk=row['butcher_id']).update(
+            rating_sum=row['total'],
+            rating_count=row['count'],
+            rating=row['total'] / row['count'],
+            **{f'rating_count_{star}': row[f'stars_{star}'] for star in range(1, 6)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('butchers', '0008_slot_holds'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of reviews'),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='rating_count_1',
+            field=models.PositiveIntegerField(default=0, help_text='1-star reviews'),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='rating_count_2',
+            field=models.PositiveIntegerField(default=0, help_text='2-star reviews'),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='rating_count_3',
+            field=models.PositiveIntegerField(default=0, help_text='3-star reviews'),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='rating_count_4',
+            field=models.PositiveIntegerField(default=0, help_text='4-star reviews'),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='rating_count_5',
+            field=models.PositiveIntegerField(default=0, help_text='5-star reviews'),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, help_text='Sum of review ratings'),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:56
+
+import re
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of apps.animals.search helpers as of this migration, so
+# later changes to that module do not change what this migration does
+_TURKISH_FOLD = str.maketrans({
+    'ı': 'i', 'ş': 's', 'ğ': 'g', 'ç': 'c', 'ö': 'o', 'ü': 'u',
+    'â': 'a', 'î': 'i', 'û': 'u',
+})
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def fold_turkish(text):
+    text = text.replace('I', 'ı').replace('İ', 'i').lower()
+    return text.translate(_TURKISH_FOLD)
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold_turkish(text or ''))
+
+
+def fill_search_columns(apps, schema_editor):
+    """Fill the normalized location columns and service tags of existing profiles."""
+    ButcherProfile = apps.get_model('butchers', 'ButcherProfile')
+    ButcherService = apps.get_model('butchers', 'ButcherService')
+
+    profiles, services = [], []
+    for profile in ButcherProfile.objects.only('id', 'city', 'district', 'services').iterator():
+        profile.city_normalized = fold_turkish((profile.city or '').strip())
+        profile.district_normalized = fold_turkish((profile.district or '').strip())
+        profiles.append(profile)
+        names = profile.services.split(',') if isinstance(profile.services, str) else profile.services or []
+        tags = {'-'.join(tokenize(str(name)))[:50] for name in names} - {''}
+        services += [ButcherService(butcher_id=profile.id, tag=tag) for tag in sorted(tags)]
+    ButcherProfile.objects.bulk_update(profiles, ['city_normalized', 'district_normalized'], batch_size=500)
+    ButcherService.objects.bulk_create(services, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('butchers', '0009_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ButcherService',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(help_text="Folded service name, e.g. 'kurban-kesimi'", max_length=50)),
+            ],
+            options={
+                'verbose_name': 'butcher service',
+                'verbose_name_plural': 'butcher services',
+            },
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='city_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='butcherprofile',
+            name='district_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='butcherprofile',
+            index=models.Index(fields=['is_active', 'city_normalized', '-rating'], name='butcher_active_city_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='butcherprofile',
+            index=models.Index(fields=['is_active', 'city_normalized', 'district_normalized', '-rating'], name='butcher_active_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='butcherprofile',
+            index=models.Index(fields=['is_active', '-rating'], name='butcher_active_rating_idx'),
+        ),
+        migrations.AddField(
+            model_name='butcherservice',
+            name='butcher',
+            field=models.ForeignKey(help_text='Butcher profile', on_delete=django.db.models.deletion.CASCADE, related_name='service_tags', to='butchers.butcherprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='butcherservice',
+            index=models.Index(fields=['tag', 'butcher'], name='butcher_service_tag_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='butcherservice',
+            constraint=models.UniqueConstraint(fields=('butcher', 'tag'), name='unique_butcher_service'),
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+    ]
@@ -2,9 +2,16 @@
 Models for butchers app.
 """
 
-from django.db import models
+from datetime import time
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+
+
+def default_working_days():
+    """Every day of the week (0 = Monday ... 6 = Sunday)."""
+    return list(range(7))
 
 
 class ButcherProfile(models.Model):
@@ -56,20 +63,118 @@ class ButcherProfile(models.Model):
         default=0.0,
         help_text="Average rating (0-5)"
     )
+    # Running review aggregates, kept up to date by apps.reviews.aggregates
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        help_text="Sum of review ratings"
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of reviews"
+    )
+    rating_count_1 = models.PositiveIntegerField(default=0, help_text="1-star reviews")
+    rating_count_2 = models.PositiveIntegerField(default=0, help_text="2-star reviews")
+    rating_count_3 = models.PositiveIntegerField(default=0, help_text="3-star reviews")
+    rating_count_4 = models.PositiveIntegerField(default=0, help_text="4-star reviews")
+    rating_count_5 = models.PositiveIntegerField(default=0, help_text="5-star reviews")
     is_active = models.BooleanField(
         default=True,
         help_text="Whether accepting appointments"
     )
+    work_start = models.TimeField(
+        default=time(9, 0),
+        help_text="Çalışma başlangıç saati"
+    )
+    work_end = models.TimeField(
+        default=time(18, 0),
+        help_text="Çalışma bitiş saati (son randevu bu saatten önce biter)"
+    )
+    working_days = models.JSONField(
+        default=default_working_days,
+        help_text="Çalışılan günler (0 = Pazartesi ... 6 = Pazar)"
+    )
+    slot_minutes = models.PositiveSmallIntegerField(
+        default=30,
+        validators=[MinValueValidator(5), MaxValueValidator(480)],
+        help_text="Randevu süresi (dakika)"
+    )
+    slot_capacity = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1), MaxValueValidator(50)],
+        help_text="Aynı saatte alınabilecek randevu sayısı"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Columns computed in save(), never written directly
+    DERIVED_FIELDS = ('city_normalized', 'district_normalized')
+    
+    # Folded copies of city/district (see apps.butchers.search) so search
+    # filters are indexable exact matches
+    city_normalized = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        editable=False
+    )
+    district_normalized = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        editable=False
+    )
+    
     class Meta:
         verbose_name = 'butcher profile'
         verbose_name_plural = 'butcher profiles'
         ordering = ['-rating', '-created_at']
+        indexes = [
+            models.Index(
+                fields=['is_active', 'city_normalized', '-rating'],
+                name='butcher_active_city_rating_idx'
+            ),
+            models.Index(
+                fields=['is_active', 'city_normalized', 'district_normalized', '-rating'],
+                name='butcher_active_location_idx'
+            ),
+            models.Index(fields=['is_active', '-rating'], name='butcher_active_rating_idx'),
+        ]
     
     def __str__(self) -> str:
         return f"{self.first_name} {self.last_name} ({self.city})"
     
+    def save(self, *args, **kwargs):
+        """
+        Save method override.
+        
+        Recomputes the normalized city/district columns and, when
+        `services` may have changed, the ButcherService tags.
+        """
+        from .search import normalize_location
+        self.city_normalized = normalize_location(self.city)
+        self.district_normalized = normalize_location(self.district)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *self.DERIVED_FIELDS}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or 'services' in update_fields:
+                self.sync_service_tags()
+    
+    def sync_service_tags(self) -> None:
+        """Make the ButcherService rows match `services`."""
+        from .search import service_tags
+        tags = service_tags(self.services)
+        ButcherService.objects.filter(butcher=self).exclude(tag__in=tags).delete()
+        ButcherService.objects.bulk_create(
+            [ButcherService(butcher=self, tag=tag) for tag in sorted(tags)],
+            ignore_conflicts=True
+        )
+    
+    @property
+    def rating_histogram(self) -> dict:
+        """Number of reviews per star, {1: ..., 5: ...}."""
+        return {star: getattr(self, f'rating_count_{star}') for star in range(1, 6)}
+    
     def clean(self):
         """
         Validate that user has BUTCHER role.
@@ -84,6 +189,138 @@ class ButcherProfile(models.Model):
             
             if not has_butcher_role:
                 raise ValidationError("User must have BUTCHER role to create a profile.")
+        
+        if self.work_start >= self.work_end:
+            raise ValidationError("Çalışma bitiş saati başlangıç saatinden sonra olmalıdır.")
+
+
+class ButcherService(models.Model):
+    """
+    One service a butcher offers, as a normalized tag of an entry in
+    ButcherProfile.services (maintained by ButcherProfile.save()).
+    """
+    
+    butcher = models.ForeignKey(
+        ButcherProfile,
+        on_delete=models.CASCADE,
+        related_name='service_tags',
+        help_text="Butcher profile"
+    )
+    tag = models.CharField(
+        max_length=50,
+        help_text="Folded service name, e.g. 'kurban-kesimi'"
+    )
+    
+    class Meta:
+        verbose_name = 'butcher service'
+        verbose_name_plural = 'butcher services'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['butcher', 'tag'],
+                name='unique_butcher_service'
+            ),
+        ]
+        indexes = [
+            # Butchers offering a service
+            models.Index(fields=['tag', 'butcher'], name='butcher_service_tag_idx'),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.butcher_id}: {self.tag}"
+
+
+class AppointmentSlot(models.Model):
+    """
+    One bookable time of a butcher's calendar.
+    
+    Slots are materialised from the butcher's working hours for the next
+    HORIZON_DAYS days (see availability.py). `booked` counts the places
+    taken by active (pending or approved) appointments and by holds, and is
+    only changed by conditional UPDATEs, so a slot can never take more than
+    `capacity`.
+    """
+    
+    butcher = models.ForeignKey(
+        ButcherProfile,
+        on_delete=models.CASCADE,
+        related_name='slots',
+        help_text="Butcher profile"
+    )
+    date = models.DateField()
+    time = models.TimeField()
+    capacity = models.PositiveSmallIntegerField(
+        help_text="Appointments the slot can take"
+    )
+    booked = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Places taken by active appointments and holds"
+    )
+    
+    class Meta:
+        verbose_name = 'appointment slot'
+        verbose_name_plural = 'appointment slots'
+        ordering = ['butcher', 'date', 'time']
+        constraints = [
+            # Also the index of availability range queries
+            models.UniqueConstraint(
+                fields=['butcher', 'date', 'time'],
+                name='unique_appointment_slot'
+            ),
+            models.CheckConstraint(
+                check=models.Q(booked__lte=models.F('capacity')),
+                name='appointment_slot_within_capacity'
+            ),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.butcher_id} {self.date} {self.time} ({self.booked}/{self.capacity})"
+
+
+class SlotHold(models.Model):
+    """
+    A short-lived claim on one place of an AppointmentSlot.
+    
+    Created when a user picks a time and turned into an Appointment when
+    they confirm it (see holds.py), so abandoned bookings never write an
+    appointment. Rows are only inserted and deleted; a hold past
+    expires_at gives its place back to the next booking attempt on the
+    full slot, and the daily sync deletes the rest.
+    """
+    
+    slot = models.ForeignKey(
+        AppointmentSlot,
+        on_delete=models.CASCADE,
+        related_name='holds',
+        help_text="Held slot"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='slot_holds',
+        help_text="User holding the slot"
+    )
+    expires_at = models.DateTimeField(
+        db_index=True,
+        help_text="The place is given back after this time"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'slot hold'
+        verbose_name_plural = 'slot holds'
+        ordering = ['expires_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['slot', 'user'],
+                name='unique_slot_hold'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'expires_at']),
+        ]
+    
+    def __str__(self) -> str:
+        return f"Hold of {self.user_id} on slot {self.slot_id} until {self.expires_at}"
 
 
 class Appointment(models.Model):
@@ -146,7 +383,6 @@ class Appointment(models.Model):
         verbose_name = 'appointment'
         verbose_name_plural = 'appointments'
         ordering = ['-created_at']
-        unique_together = [['butcher', 'date', 'time']]
         indexes = [
             models.Index(fields=['butcher', 'status']),
             models.Index(fields=['user', '-created_at']),
@@ -167,18 +403,33 @@ class Appointment(models.Model):
     
     def approve(self) -> None:
         """Approve the appointment."""
-        if self.status == self.PENDING:
-            self.status = self.APPROVED
-            self.save(update_fields=['status'])
+        self._change_status(self.APPROVED, [self.PENDING])
     
     def reject(self) -> None:
-        """Reject the appointment."""
-        if self.status == self.PENDING:
-            self.status = self.REJECTED
-            self.save(update_fields=['status'])
+        """Reject the appointment and free its slot."""
+        self._change_status(self.REJECTED, [self.PENDING])
     
     def cancel(self) -> None:
-        """Cancel the appointment."""
-        if self.status in [self.PENDING, self.APPROVED]:
-            self.status = self.CANCELLED
+        """Cancel the appointment and free its slot."""
+        self._change_status(self.CANCELLED, [self.PENDING, self.APPROVED])
+    
+    def _change_status(self, status, from_statuses) -> None:
+        """
+        Move to `status` if the current status is one of from_statuses.
+        
+        The row is locked first so two concurrent calls cannot both free
+        the slot.
+        """
+        from .availability import ACTIVE_STATUSES, release
+        
+        with transaction.atomic():
+            current = Appointment.objects.select_for_update().values_list(
+                'status', flat=True
+            ).get(pk=self.pk)
+            if current not in from_statuses:
+                self.status = current
+                return
+            self.status = status
             self.save(update_fields=['status'])
+            if status not in ACTIVE_STATUSES:
+                release(self.butcher_id, self.date, self.time)
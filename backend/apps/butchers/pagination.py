@@ -0,0 +1,19 @@
+"""
+Pagination classes for butchers app.
+"""
+
+from rest_framework.pagination import PageNumberPagination
+from .search import get_setting
+
+
+class ButcherPagination(PageNumberPagination):
+    """
+    Page-number pagination of the butcher list; ?page_size= is capped at
+    BUTCHER_SEARCH['MAX_PAGE_SIZE'].
+    """
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        self.page_size = get_setting('PAGE_SIZE')
+        self.max_page_size = get_setting('MAX_PAGE_SIZE')
+        return super().get_page_size(request)
@@ -0,0 +1,144 @@
+"""
+Butcher discovery: filtering and ranking of active butcher profiles.
+
+Profiles keep folded copies of city/district (city_normalized,
+district_normalized, see apps.animals.search.fold_turkish) and one
+ButcherService row per offered service, with the service name folded to a
+tag ("Kurban Kesimi" -> "kurban-kesimi"). Both are maintained by
+ButcherProfile.save(), so filters are exact matches on indexed columns:
+
+- city / district: (is_active, city_normalized, rating) index
+- services: butchers having every requested tag, from the (tag, butcher)
+  index of ButcherService
+
+The default `rank` ordering combines, each scaled to 0-1:
+
+- rating:       the average pulled towards PRIOR_RATING by PRIOR_REVIEWS
+                virtual reviews, so one 5-star review does not top the list
+- reviews:      rating_count / (rating_count + REVIEWS_HALF)
+- availability: free places in the next AVAILABILITY_DAYS days, counted
+                like the booking calendar (availability.open_slots),
+                free / (free + FREE_HALF)
+
+Everything is computed in the list query (free places via a subquery on the
+slot calendar), so a page costs one COUNT and one SELECT whatever its size.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+from apps.animals.search import fold_turkish, tokenize
+
+DEFAULTS = {
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 50,
+    'AVAILABILITY_DAYS': 7,
+}
+
+RANK_WEIGHTS = {
+    'rating': 0.60,
+    'reviews': 0.25,
+    'availability': 0.15,
+}
+PRIOR_RATING = 3.5
+PRIOR_REVIEWS = 5
+REVIEWS_HALF = 10
+FREE_HALF = 10
+
+# ?ordering= values; every ordering ends with id for a stable page order
+ORDERINGS = {
+    'rank': ('-search_rank', '-rating_count', 'id'),
+    'rating': ('-rating', '-rating_count', 'id'),
+    'reviews': ('-rating_count', '-rating', 'id'),
+    'availability': ('-free_places', '-search_rank', 'id'),
+}
+DEFAULT_ORDERING = 'rank'
+
+# Ignore services past this many in one query
+MAX_SERVICE_FILTERS = 5
+
+
+def get_setting(name):
+    """Read a BUTCHER_SEARCH setting, falling back to DEFAULTS."""
+    return getattr(settings, 'BUTCHER_SEARCH', {}).get(name, DEFAULTS[name])
+
+
+def normalize_location(value):
+    """Folded form of a city or district, as stored in the *_normalized columns."""
+    return fold_turkish((value or '').strip())
+
+
+def normalize_service(name):
+    """Tag of a service name: folded tokens joined with '-'."""
+    return '-'.join(tokenize(name))[:50]
+
+
+def service_tags(services):
+    """Distinct non-empty tags of a profile's `services` list."""
+    if isinstance(services, str):
+        services = services.split(',')
+    tags = {normalize_service(str(name)) for name in services or []}
+    tags.discard('')
+    return tags
+
+
+def filter_butchers(queryset, city=None, district=None, services=None):
+    """
+    Restrict a ButcherProfile queryset to exact (folded) city/district
+    matches and to butchers offering every service in `services`.
+    """
+    from .models import ButcherService
+
+    if city:
+        queryset = queryset.filter(city_normalized=normalize_location(city))
+    if district:
+        queryset = queryset.filter(district_normalized=normalize_location(district))
+    tags = sorted({normalize_service(name) for name in services or []} - {''})[:MAX_SERVICE_FILTERS]
+    for tag in tags:
+        queryset = queryset.filter(
+            id__in=ButcherService.objects.filter(tag=tag).values('butcher_id')
+        )
+    return queryset
+
+
+def annotate_rank(queryset):
+    """
+    Annotate `free_places` (next AVAILABILITY_DAYS days) and `search_rank`
+    (see module docstring).
+    """
+    from .availability import open_slots
+
+    today = timezone.localdate()
+    end = today + timedelta(days=get_setting('AVAILABILITY_DAYS') - 1)
+    free = open_slots(today, end).filter(
+        butcher=OuterRef('pk'), places__gt=0
+    ).order_by().values('butcher').annotate(free=Sum('places')).values('free')
+
+    queryset = queryset.annotate(
+        free_places=Coalesce(Subquery(free, output_field=IntegerField()), Value(0))
+    )
+    count = Cast(F('rating_count'), FloatField())
+    free_places = Cast(F('free_places'), FloatField())
+    w = RANK_WEIGHTS
+    return queryset.annotate(search_rank=ExpressionWrapper(
+        w['rating'] * (Cast(F('rating_sum'), FloatField()) + PRIOR_RATING * PRIOR_REVIEWS)
+        / (count + PRIOR_REVIEWS) / 5.0
+        + w['reviews'] * count / (count + REVIEWS_HALF)
+        + w['availability'] * free_places / (free_places + FREE_HALF),
+        output_field=FloatField()
+    ))
+
+
+def search_butchers(queryset, city=None, district=None, services=None, ordering=DEFAULT_ORDERING):
+    """
+    Filter, rank and order active butchers.
+
+    Raises:
+        ValueError: unknown ordering
+    """
+    if ordering not in ORDERINGS:
+        raise ValueError(ordering)
+    queryset = filter_butchers(queryset.filter(is_active=True), city, district, services)
+    return annotate_rank(queryset).order_by(*ORDERINGS[ordering])
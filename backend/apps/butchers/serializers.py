@@ -2,9 +2,12 @@
 Serializers for butchers app.
 """
 
+from django.db import transaction
 from rest_framework import serializers
 from apps.accounts.models import Role
-from .models import ButcherProfile, Appointment
+from .availability import SlotUnavailable, reserve
+from apps.animals.models import AnimalListing
+from .models import ButcherProfile, Appointment, SlotHold
 
 
 class ButcherProfileSerializer(serializers.ModelSerializer):
@@ -16,6 +19,9 @@ class ButcherProfileSerializer(serializers.ModelSerializer):
     user_email = serializers.EmailField(source='user.email', read_only=True)
     butcher_name = serializers.SerializerMethodField()
     profile_image_url = serializers.SerializerMethodField()
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    # Annotated by the search list only (apps.butchers.search)
+    free_places = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = ButcherProfile
@@ -32,7 +38,15 @@ class ButcherProfileSerializer(serializers.ModelSerializer):
             'services',
             'price_range',
             'rating',
-            'is_active'
+            'rating_count',
+            'rating_histogram',
+            'free_places',
+            'is_active',
+            'work_start',
+            'work_end',
+            'working_days',
+            'slot_minutes',
+            'slot_capacity'
         ]
         labels = {
             'user': 'Kullanıcı',
@@ -43,9 +57,15 @@ class ButcherProfileSerializer(serializers.ModelSerializer):
             'services': 'Hizmetler',
             'price_range': 'Fiyat Aralığı',
             'rating': 'Değerlendirme',
-            'is_active': 'Aktif'
+            'rating_count': 'Değerlendirme Sayısı',
+            'is_active': 'Aktif',
+            'work_start': 'Çalışma Başlangıcı',
+            'work_end': 'Çalışma Bitişi',
+            'working_days': 'Çalışma Günleri',
+            'slot_minutes': 'Randevu Süresi (dk)',
+            'slot_capacity': 'Saat Başına Randevu'
         }
-        read_only_fields = ['id', 'user', 'rating', 'created_at', 'butcher_name']
+        read_only_fields = ['id', 'user', 'rating', 'rating_count', 'created_at', 'butcher_name']
     
     def get_butcher_name(self, obj):
         """Return full name for display."""
@@ -75,7 +95,24 @@ class ButcherProfileSerializer(serializers.ModelSerializer):
             if not has_butcher_role:
                 raise serializers.ValidationError("Only users with BUTCHER role can create a profile.")
         
+        work_start = attrs.get('work_start', getattr(self.instance, 'work_start', None))
+        work_end = attrs.get('work_end', getattr(self.instance, 'work_end', None))
+        if work_start and work_end and work_start >= work_end:
+            raise serializers.ValidationError(
+                {'work_end': "Çalışma bitiş saati başlangıç saatinden sonra olmalıdır."}
+            )
+        
         return attrs
+    
+    def validate_working_days(self, value):
+        """
+        Validate weekday numbers (0 = Monday ... 6 = Sunday).
+        """
+        if not isinstance(value, list) or not all(
+            isinstance(day, int) and 0 <= day <= 6 for day in value
+        ):
+            raise serializers.ValidationError("Günler 0 (Pazartesi) ile 6 (Pazar) arasında olmalıdır.")
+        return sorted(set(value))
 
 
 class AppointmentSerializer(serializers.ModelSerializer):
@@ -149,23 +186,63 @@ class AppointmentSerializer(serializers.ModelSerializer):
         if listing and not listing.is_active:
             raise serializers.ValidationError("Cannot book appointment for inactive listing.")
         
-        # Check for slot conflicts (only on create, not update)
-        if not self.instance:  # Creating new appointment
-            butcher = attrs.get('butcher')
-            date = attrs.get('date')
-            time = attrs.get('time')
-            
-            if butcher and date and time:
-                # Check if slot is already taken
-                conflicting = Appointment.objects.filter(
-                    butcher=butcher,
-                    date=date,
-                    time=time
-                ).exists()
-                
-                if conflicting:
-                    raise serializers.ValidationError(
-                        "Bu saat dilimi dolu. Lütfen başka bir saat seçin."
-                    )
-        
         return attrs
+    
+    def create(self, validated_data):
+        """
+        Claim a place in the slot and create the appointment in one
+        transaction (see availability.reserve).
+        """
+        with transaction.atomic():
+            try:
+                reserve(validated_data['butcher'].id, validated_data['date'], validated_data['time'])
+            except SlotUnavailable:
+                raise serializers.ValidationError(
+                    "Bu saat dilimi dolu. Lütfen başka bir saat seçin."
+                )
+            return super().create(validated_data)
+
+
+class SlotHoldSerializer(serializers.ModelSerializer):
+    """
+    Serializer for SlotHold; written with the butcher, date and time of the
+    slot to hold.
+    """
+    
+    butcher = serializers.PrimaryKeyRelatedField(
+        source='slot.butcher', queryset=ButcherProfile.objects.filter(is_active=True)
+    )
+    date = serializers.DateField(source='slot.date')
+    time = serializers.TimeField(source='slot.time')
+    
+    class Meta:
+        model = SlotHold
+        fields = [
+            'id',
+            'butcher',
+            'date',
+            'time',
+            'expires_at',
+            'created_at'
+        ]
+        labels = {
+            'butcher': 'Kasap',
+            'date': 'Tarih',
+            'time': 'Saat',
+            'expires_at': 'Son Onay Zamanı'
+        }
+        read_only_fields = ['id', 'expires_at', 'created_at']
+
+
+class SlotHoldConfirmSerializer(serializers.Serializer):
+    """
+    Appointment details given when a hold is confirmed.
+    """
+    
+    listing = serializers.PrimaryKeyRelatedField(
+        queryset=AnimalListing.objects.filter(is_active=True),
+        required=False,
+        allow_null=True,
+        error_messages={'does_not_exist': "Cannot book appointment for inactive listing."}
+    )
+    note = serializers.CharField(required=False, allow_blank=True, default='')
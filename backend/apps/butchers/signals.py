@@ -1,10 +1,12 @@
 """
-Signal handlers for appointment notifications.
+Signal handlers for appointment notifications and the slot calendar.
 """
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from apps.butchers.models import Appointment
+from apps.butchers.availability import ACTIVE_STATUSES, AVAILABILITY_FIELDS, release, sync_slots
+from apps.butchers.models import Appointment, ButcherProfile
 from apps.notifications.models import Notification
 
 
@@ -81,3 +83,18 @@ def notify_on_appointment_change(sender, instance, created, **kwargs):
                     'time': str(instance.time),
                 }
             )
+
+
+@receiver(post_delete, sender=Appointment)
+def release_slot_on_delete(sender, instance, **kwargs):
+    """Free the slot of a deleted active appointment."""
+    if instance.status in ACTIVE_STATUSES:
+        release(instance.butcher_id, instance.date, instance.time)
+
+
+@receiver(post_save, sender=ButcherProfile)
+def sync_slots_on_profile_save(sender, instance, created, update_fields=None, **kwargs):
+    """Rebuild the butcher's slots after the availability settings may have changed."""
+    if update_fields is not None and not set(update_fields) & set(AVAILABILITY_FIELDS):
+        return
+    transaction.on_commit(lambda: sync_slots(instance))
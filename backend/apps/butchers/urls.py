@@ -4,10 +4,11 @@ URL configuration for butchers app.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ButcherProfileViewSet, AppointmentViewSet
+from .views import ButcherProfileViewSet, AppointmentViewSet, SlotHoldViewSet
 
 router = DefaultRouter()
 router.register(r'profiles', ButcherProfileViewSet, basename='butcher-profile')
 router.register(r'appointments', AppointmentViewSet, basename='appointment')
+router.register(r'holds', SlotHoldViewSet, basename='slot-hold')
 
 urlpatterns = router.urls
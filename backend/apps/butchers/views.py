@@ -4,12 +4,20 @@ Views for butchers app.
 
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from datetime import timedelta
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from apps.accounts.permissions import IsButcher
-from .models import ButcherProfile, Appointment
-from .serializers import ButcherProfileSerializer, AppointmentSerializer
+from . import availability, holds, search
+from .models import ButcherProfile, Appointment, SlotHold
+from .pagination import ButcherPagination
+from .serializers import (
+    ButcherProfileSerializer, AppointmentSerializer, SlotHoldSerializer, SlotHoldConfirmSerializer
+)
 
 
 class IsOwnerOrReadOnly(IsAuthenticated):
@@ -31,37 +39,50 @@ class ButcherProfileViewSet(viewsets.ModelViewSet):
     """
     ViewSet for butcher profiles.
     
-    - LIST: View all active butchers
+    - LIST: Search active butchers (paginated, ranked)
     - CREATE: Create own butcher profile (IsButcher)
     - RETRIEVE: View butcher details
     - UPDATE: Update own profile
     - ME: Get own profile
+    - AVAILABILITY: Free slots of several butchers over a date range
     """
     
     serializer_class = ButcherProfileSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ButcherPagination
     http_method_names = ['get', 'post', 'patch', 'put', 'head', 'options']
     
     def get_queryset(self):
         """
-        Return active butcher profiles.
+        Return butcher profiles.
         
-        Can filter by city.
+        LIST searches active butchers (see search.py):
+            city, district: exact match, ignoring case and Turkish characters
+            services: comma separated; butchers offering all of them
+            ordering: rank (default), rating, reviews or availability
         """
         queryset = ButcherProfile.objects.select_related('user')
         
+        if self.action == 'list':
+            params = self.request.query_params
+            ordering = params.get('ordering', search.DEFAULT_ORDERING)
+            if ordering not in search.ORDERINGS:
+                raise ValidationError({'ordering': [f"Must be one of: {', '.join(search.ORDERINGS)}."]})
+            return search.search_butchers(
+                queryset,
+                city=params.get('city'),
+                district=params.get('district'),
+                services=params.get('services', '').split(','),
+                ordering=ordering,
+            )
+        
         # Filter by active status unless it's the owner viewing their own
-        if self.action in ['list', 'retrieve']:
+        if self.action == 'retrieve':
              # For general viewing, show only active. 
              # Ideally we might struggle if an owner wants to see their inactive profile via ID.
              # But 'me' endpoint handles that separately.
              queryset = queryset.filter(is_active=True)
         
-        # Filter by city if provided
-        city = self.request.query_params.get('city')
-        if city:
-            queryset = queryset.filter(city__icontains=city)
-        
         return queryset
     
     def get_permissions(self):
@@ -71,7 +92,7 @@ class ButcherProfileViewSet(viewsets.ModelViewSet):
         """
         from rest_framework.permissions import AllowAny
         
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'availability']:
             return [AllowAny()]
         elif self.action == 'create':
             permission_classes = [IsAuthenticated, IsButcher]
@@ -120,6 +141,70 @@ class ButcherProfileViewSet(viewsets.ModelViewSet):
         except ButcherProfile.DoesNotExist:
             return Response(None) # Return null if no profile exists
 
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """
+        Free slots of the given butchers between two dates.
+        
+        Query params:
+            butchers: comma separated profile ids (at most MAX_BUTCHERS)
+            start: YYYY-MM-DD (default: today)
+            end: YYYY-MM-DD (default: start + 6 days, at most MAX_RANGE_DAYS days)
+        
+        Returns:
+            {"start", "end", "butchers": [{"butcher": id, "days": [{"date",
+             "slots": [{"time", "available"}]}]}]}
+        """
+        try:
+            butcher_ids = sorted({
+                int(value) for value in request.query_params.get('butchers', '').split(',') if value.strip()
+            })
+        except ValueError:
+            return Response({'error': 'butchers must be comma separated ids.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not butcher_ids:
+            return Response({'error': 'butchers is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(butcher_ids) > availability.get_setting('MAX_BUTCHERS'):
+            return Response(
+                {'error': f"At most {availability.get_setting('MAX_BUTCHERS')} butchers per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        start_param = request.query_params.get('start')
+        end_param = request.query_params.get('end')
+        try:
+            start = parse_date(start_param) if start_param else timezone.localdate()
+            end = parse_date(end_param) if end_param else start and start + timedelta(days=6)
+        except ValueError:  # well formed but invalid, e.g. 2026-02-30
+            start = end = None
+        if start is None or end is None or end < start:
+            return Response({'error': 'start and end must be dates (YYYY-MM-DD), start <= end.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= availability.get_setting('MAX_RANGE_DAYS'):
+            return Response(
+                {'error': f"The range can span at most {availability.get_setting('MAX_RANGE_DAYS')} days."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        slots = availability.free_slots(butcher_ids, start, end)
+        return Response({
+            'start': start,
+            'end': end,
+            'butchers': [
+                {
+                    'butcher': butcher_id,
+                    'days': [
+                        {
+                            'date': day,
+                            'slots': [{'time': time, 'available': left} for time, left in times],
+                        }
+                        for day, times in slots.get(butcher_id, {}).items()
+                    ],
+                }
+                for butcher_id in butcher_ids
+            ],
+        })
+
 
 class AppointmentViewSet(viewsets.ModelViewSet):
     """
@@ -232,3 +317,107 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         appointment.cancel()
         serializer = self.get_serializer(appointment)
         return Response(serializer.data)
+
+
+class SlotHoldViewSet(viewsets.GenericViewSet):
+    """
+    ViewSet for slot holds (two-step booking, see holds.py).
+    
+    - LIST: Own live holds
+    - CREATE: Hold a slot for HOLD_SECONDS
+    - DESTROY: Release a hold
+    - confirm: Turn a hold into an appointment request
+    """
+    
+    serializer_class = SlotHoldSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """Return the user's holds that have not expired."""
+        return SlotHold.objects.filter(
+            user=self.request.user, expires_at__gt=timezone.now()
+        ).select_related('slot')
+    
+    def list(self, request):
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return Response(serializer.data)
+    
+    def create(self, request):
+        """
+        Hold a slot; picking a slot already held renews the hold.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        slot = serializer.validated_data['slot']
+        try:
+            hold = holds.hold_slot(request.user, slot['butcher'].id, slot['date'], slot['time'])
+        except availability.SlotUnavailable:
+            return _slot_unavailable()
+        except holds.TooManyHolds:
+            return Response(
+                {
+                    "error": {
+                        "code": holds.TooManyHolds.code,
+                        "message": "Aynı anda en fazla "
+                                   f"{availability.get_setting('MAX_HOLDS_PER_USER')} saat ayırabilirsiniz."
+                    }
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(self.get_serializer(hold).data, status=status.HTTP_201_CREATED)
+    
+    def destroy(self, request, pk=None):
+        """
+        Release a hold before it expires.
+        """
+        try:
+            holds.release_hold(pk, request.user)
+        except holds.HoldNotFound:
+            return _hold_not_found()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['post'])
+    def confirm(self, request, pk=None):
+        """
+        Confirm a hold; creates a pending appointment.
+        """
+        serializer = SlotHoldConfirmSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            appointment = holds.confirm_hold(
+                pk, request.user,
+                listing=serializer.validated_data.get('listing'),
+                note=serializer.validated_data['note'],
+            )
+        except holds.HoldNotFound:
+            return _hold_not_found()
+        except availability.SlotUnavailable:
+            return _slot_unavailable()
+        return Response(
+            AppointmentSerializer(appointment, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+def _slot_unavailable():
+    return Response(
+        {
+            "error": {
+                "code": "SLOT_UNAVAILABLE",
+                "message": "Bu saat dilimi dolu. Lütfen başka bir saat seçin."
+            }
+        },
+        status=status.HTTP_409_CONFLICT
+    )
+
+
+def _hold_not_found():
+    return Response(
+        {
+            "error": {
+                "code": holds.HoldNotFound.code,
+                "message": "Saat ayırma süresi doldu. Lütfen tekrar saat seçin."
+            }
+        },
+        status=status.HTTP_404_NOT_FOUND
+    )
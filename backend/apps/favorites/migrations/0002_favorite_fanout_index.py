@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favorites', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['animal', 'id'], name='favorites_f_animal__8ba112_idx'),
+        ),
+    ]
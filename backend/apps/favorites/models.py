@@ -35,6 +35,9 @@ class Favorite(models.Model):
         verbose_name_plural = 'favorites'
         unique_together = [['user', 'animal']]
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['animal', 'id']),  # notification fan-out
+        ]
     
     def __str__(self) -> str:
         return f"{self.user.email} - {self.animal.breed}"
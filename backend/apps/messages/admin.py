@@ -37,7 +37,7 @@ class MessageAdmin(admin.ModelAdmin):
     content_preview.short_description = 'Content Preview'
 
 
-from .models import GroupConversation, GroupMessage, GroupConversationParticipant
+from .models import GroupConversation, GroupMessage, GroupConversationParticipant, ConversationState
 
 @admin.register(GroupConversation)
 class GroupConversationAdmin(admin.ModelAdmin):
@@ -50,3 +50,9 @@ class GroupMessageAdmin(admin.ModelAdmin):
 @admin.register(GroupConversationParticipant)
 class GroupConversationParticipantAdmin(admin.ModelAdmin):
     list_display = ('conversation', 'user', 'is_active', 'joined_at')
+
+@admin.register(ConversationState)
+class ConversationStateAdmin(admin.ModelAdmin):
+    list_display = ('user', 'conversation', 'group_conversation', 'unread_count', 'is_hidden', 'last_activity_at')
+    list_filter = ('is_hidden',)
+    raw_id_fields = ('user', 'conversation', 'group_conversation', 'last_message', 'last_group_message')
@@ -5,3 +5,7 @@ class MessagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.messages'
     label = 'chat_messages'  # Avoid conflict with django.contrib.messages
+    
+    def ready(self):
+        """Import signal handlers when app is ready."""
+        import apps.messages.signals
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q, Exists, OuterRef
+from apps.messages.models import Conversation, GroupConversationParticipant, ConversationState
+from apps.messages.services import sync_user_states
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Builds ConversationState inbox rows from the message tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='Only process users that have a conversation without a state row',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(buyer_conversations__isnull=False) |
+            Q(seller_conversations__isnull=False) |
+            Q(groupconversationparticipant__is_active=True)
+        )
+
+        if options['only_missing']:
+            users = users.filter(
+                Q(Exists(Conversation.objects.filter(buyer=OuterRef('pk')).exclude(
+                    states__user=OuterRef('pk')
+                ))) |
+                Q(Exists(Conversation.objects.filter(seller=OuterRef('pk')).exclude(
+                    states__user=OuterRef('pk')
+                ))) |
+                Q(Exists(GroupConversationParticipant.objects.filter(user=OuterRef('pk'), is_active=True).exclude(
+                    conversation__states__user=OuterRef('pk')
+                )))
+            )
+
+        processed = created = updated = deleted = 0
+        for user in users.distinct().iterator():
+            with transaction.atomic():
+                result = sync_user_states(user, fix=True)
+            processed += 1
+            created += len(result['missing'])
+            updated += len(result['stale'])
+            deleted += len(result['orphaned'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} users: {created} created, {updated} updated, {deleted} deleted '
+            f'({ConversationState.objects.count()} rows total).'
+        ))
@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from apps.messages.services import sync_user_states
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Verifies ConversationState inbox rows against the message tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Repair inconsistent rows instead of only reporting them',
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='Only check the given user id',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(buyer_conversations__isnull=False) |
+            Q(seller_conversations__isnull=False) |
+            Q(groupconversationparticipant__isnull=False) |
+            Q(conversation_states__isnull=False)
+        )
+        if options['user']:
+            users = users.filter(pk=options['user'])
+
+        checked = inconsistent = 0
+        for user in users.distinct().iterator():
+            with transaction.atomic():
+                result = sync_user_states(user, fix=options['fix'])
+            checked += 1
+
+            problems = {kind: keys for kind, keys in result.items() if keys}
+            if problems:
+                inconsistent += 1
+                details = ', '.join(f'{kind}={keys}' for kind, keys in problems.items())
+                self.stdout.write(self.style.WARNING(f'User {user.pk}: {details}'))
+
+        if inconsistent:
+            action = 'repaired' if options['fix'] else 'found'
+            self.stdout.write(self.style.WARNING(f'Checked {checked} users, {action} {inconsistent} inconsistent.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Checked {checked} users, all conversation states consistent.'))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chat_messages', '0008_conversation_deleted_by_groupconversation_deleted_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_activity_at', models.DateTimeField(help_text='Time of the last message, or conversation creation time')),
+                ('unread_count', models.PositiveIntegerField(default=0, help_text='Messages from other participants not yet read by the user')),
+                ('is_hidden', models.BooleanField(default=False, help_text='Whether the user has hidden this conversation from their inbox')),
+                ('conversation', models.ForeignKey(blank=True, help_text='Direct conversation (null for group rows)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='states', to='chat_messages.conversation')),
+                ('group_conversation', models.ForeignKey(blank=True, help_text='Group conversation (null for direct rows)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='states', to='chat_messages.groupconversation')),
+                ('last_group_message', models.ForeignKey(blank=True, help_text='Last group message visible to the user', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat_messages.groupmessage')),
+                ('last_message', models.ForeignKey(blank=True, help_text='Last direct message visible to the user', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat_messages.message')),
+                ('user', models.ForeignKey(help_text='Owner of this inbox row', on_delete=django.db.models.deletion.CASCADE, related_name='conversation_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'conversation state',
+                'verbose_name_plural': 'conversation states',
+                'indexes': [models.Index(fields=['user', 'is_hidden', '-last_activity_at', '-id'], name='chat_messag_user_id_b9b6d5_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='conversationstate',
+            constraint=models.UniqueConstraint(condition=models.Q(('conversation__isnull', False)), fields=('user', 'conversation'), name='unique_user_direct_state'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationstate',
+            constraint=models.UniqueConstraint(condition=models.Q(('group_conversation__isnull', False)), fields=('user', 'group_conversation'), name='unique_user_group_state'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationstate',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('conversation__isnull', False), ('group_conversation__isnull', True)), models.Q(('conversation__isnull', True), ('group_conversation__isnull', False)), _connector='OR'), name='state_single_conversation'),
+        ),
+    ]
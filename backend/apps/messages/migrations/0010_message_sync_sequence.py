@@ -0,0 +1,63 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:57
+
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery
+
+
+def seed_sequences(apps, schema_editor):
+    """
+    Give existing messages a sequence number.
+    
+    Message ids are already monotonic, so seq = id keeps the order, and each
+    conversation's counter starts from its highest message id.
+    """
+    for conversation_name, message_name in (('Conversation', 'Message'), ('GroupConversation', 'GroupMessage')):
+        Conversation = apps.get_model('chat_messages', conversation_name)
+        Message = apps.get_model('chat_messages', message_name)
+        
+        Message.objects.update(seq=F('id'))
+        last_ids = Message.objects.filter(
+            conversation=OuterRef('pk')
+        ).order_by().values('conversation').annotate(m=Max('id')).values('m')
+        Conversation.objects.filter(pk__in=Message.objects.values('conversation_id')).update(
+            last_seq=Subquery(last_ids[:1])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_messages', '0009_conversationstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_seq',
+            field=models.BigIntegerField(default=0, help_text='Last change sequence number handed out to a message in this conversation'),
+        ),
+        migrations.AddField(
+            model_name='groupconversation',
+            name='last_seq',
+            field=models.BigIntegerField(default=0, help_text='Last change sequence number handed out to a message in this conversation'),
+        ),
+        migrations.AddField(
+            model_name='groupmessage',
+            name='seq',
+            field=models.BigIntegerField(default=0, help_text='Change sequence number; bumped whenever the message is created or changed'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='seq',
+            field=models.BigIntegerField(default=0, help_text='Change sequence number; bumped whenever the message is created or changed'),
+        ),
+        migrations.AddIndex(
+            model_name='groupmessage',
+            index=models.Index(fields=['conversation', 'seq'], name='chat_messag_convers_475533_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'seq'], name='chat_messag_convers_a3069a_idx'),
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
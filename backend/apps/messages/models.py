@@ -41,6 +41,10 @@ class Conversation(models.Model):
         related_name='deleted_direct_conversations',
         help_text="Users who have hidden/deleted this conversation from their inbox"
     )
+    last_seq = models.BigIntegerField(
+        default=0,
+        help_text="Last change sequence number handed out to a message in this conversation"
+    )
     
     class Meta:
         verbose_name = 'conversation'
@@ -122,11 +126,18 @@ class Message(models.Model):
         related_name='replies',
         help_text="The message being replied to"
     )
+    seq = models.BigIntegerField(
+        default=0,
+        help_text="Change sequence number; bumped whenever the message is created or changed"
+    )
     
     class Meta:
         verbose_name = 'message'
         verbose_name_plural = 'messages'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'seq']),
+        ]
     
     def __str__(self) -> str:
         return f"Message from {self.sender.email} at {self.created_at}"
@@ -161,6 +172,10 @@ class GroupConversation(models.Model):
         related_name='deleted_group_conversations',
         help_text="Users who have hidden/deleted this group conversation from their inbox"
     )
+    last_seq = models.BigIntegerField(
+        default=0,
+        help_text="Last change sequence number handed out to a message in this conversation"
+    )
     
     class Meta:
         verbose_name = 'group conversation'
@@ -230,9 +245,106 @@ class GroupMessage(models.Model):
         related_name='replies',
         help_text="The message being replied to"
     )
+    seq = models.BigIntegerField(
+        default=0,
+        help_text="Change sequence number; bumped whenever the message is created or changed"
+    )
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'seq']),
+        ]
     
     def __str__(self):
         return f"Group message from {self.sender.email} at {self.created_at}"
+
+
+class ConversationState(models.Model):
+    """
+    Denormalized per-user inbox row for a direct or group conversation.
+    
+    Exactly one of `conversation` / `group_conversation` is set. The row is
+    updated in the same transaction as message writes and read markers, so
+    the inbox can be served from this table alone, ordered by activity.
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='conversation_states',
+        help_text="Owner of this inbox row"
+    )
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='states',
+        help_text="Direct conversation (null for group rows)"
+    )
+    group_conversation = models.ForeignKey(
+        GroupConversation,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='states',
+        help_text="Group conversation (null for direct rows)"
+    )
+    last_message = models.ForeignKey(
+        Message,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="Last direct message visible to the user"
+    )
+    last_group_message = models.ForeignKey(
+        GroupMessage,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="Last group message visible to the user"
+    )
+    last_activity_at = models.DateTimeField(
+        help_text="Time of the last message, or conversation creation time"
+    )
+    unread_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Messages from other participants not yet read by the user"
+    )
+    is_hidden = models.BooleanField(
+        default=False,
+        help_text="Whether the user has hidden this conversation from their inbox"
+    )
+    
+    class Meta:
+        verbose_name = 'conversation state'
+        verbose_name_plural = 'conversation states'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'conversation'],
+                name='unique_user_direct_state',
+                condition=models.Q(conversation__isnull=False)
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'group_conversation'],
+                name='unique_user_group_state',
+                condition=models.Q(group_conversation__isnull=False)
+            ),
+            models.CheckConstraint(
+                check=(
+                    models.Q(conversation__isnull=False, group_conversation__isnull=True) |
+                    models.Q(conversation__isnull=True, group_conversation__isnull=False)
+                ),
+                name='state_single_conversation'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'is_hidden', '-last_activity_at', '-id']),
+        ]
+    
+    def __str__(self):
+        target = f"conversation {self.conversation_id}" if self.conversation_id else f"group {self.group_conversation_id}"
+        return f"State of {target} for user {self.user_id}"
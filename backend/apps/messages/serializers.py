@@ -103,8 +103,25 @@ class ConversationSerializer(serializers.ModelSerializer):
             return obj.seller.username
         return obj.seller.email.split('@')[0] if obj.seller.email else None
     
+    def _get_user_state(self, obj):
+        """Return the prefetched ConversationState for the request user, if any."""
+        states = getattr(obj, 'user_states', None)
+        return states[0] if states else None
+    
     def get_last_message(self, obj):
         """Get the most recent message in this conversation, excluding those deleted for the user."""
+        state = self._get_user_state(obj)
+        if state is not None:
+            last_msg = state.last_message
+            if last_msg is None:
+                return None
+            return {
+                'content': last_msg.content,
+                'sender_id': last_msg.sender_id,
+                'sender_username': last_msg.sender.username or last_msg.sender.email.split('@')[0],
+                'created_at': last_msg.created_at
+            }
+        
         request = self.context.get('request')
         user = request.user if request else None
         
@@ -132,6 +149,10 @@ class ConversationSerializer(serializers.ModelSerializer):
         if not request or not request.user:
             return 0
         
+        state = self._get_user_state(obj)
+        if state is not None:
+            return state.unread_count
+        
         # Count messages sent by the OTHER participant that are unread
         if request.user == obj.buyer:
             # Messages from seller to buyer
@@ -188,9 +209,10 @@ class MessageSerializer(serializers.ModelSerializer):
             'parent_message_details',
             'is_read',
             'is_deleted',
+            'seq',
             'created_at'
         ]
-        read_only_fields = ['id', 'sender', 'sender_email', 'created_at', 'parent_message_details']
+        read_only_fields = ['id', 'sender', 'sender_email', 'seq', 'created_at', 'parent_message_details']
 
     parent_message_details = ParentMessageSerializer(source='parent_message', read_only=True)
 
@@ -258,9 +280,10 @@ class GroupMessageSerializer(serializers.ModelSerializer):
             'parent_message',
             'parent_message_details',
             'is_deleted',
+            'seq',
             'created_at'
         ]
-        read_only_fields = ['id', 'sender', 'created_at', 'parent_message_details']
+        read_only_fields = ['id', 'sender', 'seq', 'created_at', 'parent_message_details']
 
     parent_message_details = GroupParentMessageSerializer(source='parent_message', read_only=True)
     
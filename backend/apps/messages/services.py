@@ -0,0 +1,445 @@
+"""
+Services for messages app.
+"""
+
+import base64
+import json
+from django.db.models import Q, F, Count, Exists, OuterRef, Subquery, IntegerField, Case, When
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+from .models import (
+    Conversation, Message, GroupConversation, GroupMessage,
+    GroupConversationParticipant, ConversationState
+)
+
+
+TYPE_DIRECT = 'DIRECT'
+TYPE_GROUP = 'GROUP'
+
+SYNC_DEFAULT_LIMIT = 200
+SYNC_MAX_LIMIT = 500
+
+STATE_FIELDS = ['last_message_id', 'last_group_message_id', 'last_activity_at', 'unread_count', 'is_hidden']
+
+
+def _count_subquery(queryset, group_field='conversation'):
+    """
+    Wrap a queryset filtered on OuterRef into a correlated COUNT(*) subquery.
+    """
+    counted = queryset.order_by().values(group_field).annotate(c=Count('id')).values('c')[:1]
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def _display_name(user):
+    """Return username or fallback to email prefix."""
+    if user.username:
+        return user.username
+    return user.email.split('@')[0] if user.email else None
+
+
+def encode_cursor(state):
+    """
+    Encode the sort key of an inbox row into an opaque cursor string.
+    """
+    payload = {'u': state.last_activity_at.isoformat(), 'i': state.id}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        (last_activity_at, state_id) tuple, or None if the cursor is invalid
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        last_activity_at = parse_datetime(payload['u'])
+        if last_activity_at is None:
+            return None
+        return last_activity_at, int(payload['i'])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class InboxEngine:
+    """
+    Builds the unified inbox (direct + group conversations) for a user.
+
+    The inbox is read from ConversationState, a per-user table kept up to
+    date on every message write, so a page is a single range scan over the
+    (user, is_hidden, -last_activity_at, -id) index. That sort key is also
+    the keyset used for cursor pagination.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def get_items(self, limit=None, cursor=None):
+        """
+        Return inbox items sorted by most recent activity.
+
+        Args:
+            limit: Maximum number of items to return (None = all)
+            cursor: Decoded cursor tuple; only items after it are returned
+
+        Returns:
+            (items, next_cursor) tuple; next_cursor is None on the last page
+        """
+        active_members = GroupConversationParticipant.objects.filter(
+            conversation=OuterRef('group_conversation_id'),
+            is_active=True
+        )
+        queryset = ConversationState.objects.filter(
+            user=self.user,
+            is_hidden=False
+        ).select_related(
+            'conversation__buyer', 'conversation__seller',
+            'group_conversation__partnership',
+            'last_message__sender', 'last_group_message__sender',
+        ).annotate(
+            member_count=_count_subquery(active_members)
+        ).order_by('-last_activity_at', '-id')
+
+        if cursor is not None:
+            last_activity_at, state_id = cursor
+            queryset = queryset.filter(
+                Q(last_activity_at__lt=last_activity_at) |
+                Q(last_activity_at=last_activity_at, id__lt=state_id)
+            )
+
+        if limit is None:
+            return [self._item(state) for state in queryset], None
+
+        states = list(queryset[:limit + 1])
+        next_cursor = encode_cursor(states[limit - 1]) if len(states) > limit else None
+        return [self._item(state) for state in states[:limit]], next_cursor
+
+    def _last_message_payload(self, message):
+        if message is None:
+            return None
+        return {
+            'content': message.content,
+            'sender_id': message.sender_id,
+            'sender_username': _display_name(message.sender),
+            'created_at': message.created_at
+        }
+
+    def _item(self, state):
+        if state.conversation_id:
+            conv = state.conversation
+            counterparty = conv.seller if self.user.id == conv.buyer_id else conv.buyer
+            return {
+                'type': TYPE_DIRECT,
+                'id': conv.id,
+                'title': _display_name(counterparty),
+                'partnership_id': None,
+                'last_message': self._last_message_payload(state.last_message),
+                'unread_count': state.unread_count,
+                'updated_at': state.last_activity_at
+            }
+
+        conv = state.group_conversation
+        partnership = conv.partnership
+        return {
+            'type': TYPE_GROUP,
+            'id': conv.id,
+            'title': f"{partnership.city} Ortaklığı ({state.member_count}/{partnership.person_count})",
+            'partnership_id': partnership.id,
+            'last_message': self._last_message_payload(state.last_group_message),
+            'unread_count': state.unread_count,
+            'updated_at': state.last_activity_at
+        }
+
+
+# ---------------------------------------------------------------------------
+# Incremental message sync
+# ---------------------------------------------------------------------------
+
+def next_sequence(conversation):
+    """
+    Reserve the next change sequence number of a direct or group conversation.
+
+    Must run inside a transaction: the UPDATE locks the conversation row
+    until commit, so sequence numbers become visible in increasing order.
+    """
+    model = type(conversation)
+    model.objects.filter(pk=conversation.pk).update(last_seq=F('last_seq') + 1)
+    conversation.last_seq = model.objects.filter(pk=conversation.pk).values_list('last_seq', flat=True).get()
+    return conversation.last_seq
+
+
+def sync_etag(conversation):
+    """ETag describing the current change sequence of a conversation."""
+    return f'W/"{conversation._meta.model_name}-{conversation.pk}-{conversation.last_seq}"'
+
+
+def collect_changes(queryset, user, since, last_seq, limit=SYNC_DEFAULT_LIMIT):
+    """
+    Collect messages created or changed after a sync cursor.
+
+    Args:
+        queryset: Messages of a single conversation
+        user: Requesting user (messages they deleted for themselves are
+              reported as removed ids instead of payloads)
+        since: Cursor returned by the previous sync (0 for full history)
+        last_seq: Conversation's last_seq, read before the messages
+        limit: Maximum number of changed rows to return
+
+    Returns:
+        dict with 'cursor', 'messages' (instances), 'removed' (ids), 'has_more'
+    """
+    model = queryset.model
+    changed = queryset.filter(seq__gt=since).annotate(
+        deleted_for_me=Exists(model.objects.filter(pk=OuterRef('pk'), deleted_by=user))
+    ).order_by('seq', 'id')
+
+    rows = list(changed[:limit + 1])
+    has_more = len(rows) > limit
+    if has_more:
+        # Only hand out whole sequence numbers so the cursor never splits
+        # rows that were changed together (e.g. mark_all_read).
+        rows = rows[:limit]
+        boundary = rows[-1].seq
+        complete = [row for row in rows if row.seq < boundary]
+        rows = complete or list(changed.filter(seq=boundary))
+
+    if has_more:
+        cursor = rows[-1].seq
+    else:
+        cursor = max([last_seq, since] + [row.seq for row in rows])
+
+    return {
+        'cursor': cursor,
+        'messages': [row for row in rows if not row.deleted_for_me],
+        'removed': [row.id for row in rows if row.deleted_for_me],
+        'has_more': has_more,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Conversation state maintenance
+# ---------------------------------------------------------------------------
+
+def _ensure_states(user_ids, activity_at, conversation=None, group_conversation=None):
+    """Create missing state rows for the given users (no-op if they exist)."""
+    ConversationState.objects.bulk_create(
+        [
+            ConversationState(
+                user_id=user_id,
+                conversation=conversation,
+                group_conversation=group_conversation,
+                last_activity_at=activity_at
+            )
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True
+    )
+
+
+def record_direct_message(message):
+    """
+    Update both participants' state rows for a new direct message.
+
+    The sender's unread counter is left untouched, the receiver's is
+    incremented, and the conversation is un-hidden for both.
+    """
+    conversation = message.conversation
+    _ensure_states(
+        [conversation.buyer_id, conversation.seller_id],
+        message.created_at,
+        conversation=conversation
+    )
+    ConversationState.objects.filter(conversation=conversation).update(
+        last_message=message,
+        last_activity_at=message.created_at,
+        is_hidden=False,
+        unread_count=Case(
+            When(user_id=message.sender_id, then=F('unread_count')),
+            default=F('unread_count') + 1
+        )
+    )
+
+
+def record_group_message(message):
+    """
+    Update every active participant's state row for a new group message.
+    """
+    conversation = message.conversation
+    participant_ids = list(conversation.participants.filter(is_active=True).values_list('user_id', flat=True))
+    _ensure_states(participant_ids, message.created_at, group_conversation=conversation)
+    ConversationState.objects.filter(group_conversation=conversation).update(
+        last_group_message=message,
+        last_activity_at=message.created_at,
+        is_hidden=False,
+        unread_count=Case(
+            When(user_id=message.sender_id, then=F('unread_count')),
+            default=F('unread_count') + 1
+        )
+    )
+
+
+def mark_state_read(user, conversation=None, group_conversation=None):
+    """Reset the user's unread counter for a conversation."""
+    _state_for(user, conversation, group_conversation).update(unread_count=0)
+
+
+def hide_state(user, conversation=None, group_conversation=None):
+    """Hide a conversation from the user's inbox until the next message."""
+    _state_for(user, conversation, group_conversation).update(is_hidden=True)
+
+
+def refresh_state(user, conversation=None, group_conversation=None):
+    """
+    Recompute one state row from the message tables.
+
+    Used when the last visible message may have changed for a single user,
+    e.g. after a "delete for me".
+    """
+    if conversation is not None:
+        queryset = direct_state_queryset(user).filter(pk=conversation.pk)
+        key = ('conversation', conversation.pk)
+    else:
+        queryset = group_state_queryset(user).filter(conversation_id=group_conversation.pk)
+        key = ('group_conversation', group_conversation.pk)
+
+    expected = {_state_key_from_row(row): _state_values_from_row(row) for row in queryset}
+    if key not in expected:
+        _state_for(user, conversation, group_conversation).delete()
+        return
+    ConversationState.objects.update_or_create(
+        user=user,
+        **{key[0]: conversation or group_conversation},
+        defaults=expected[key]
+    )
+
+
+def _state_for(user, conversation, group_conversation):
+    if conversation is not None:
+        return ConversationState.objects.filter(user=user, conversation=conversation)
+    return ConversationState.objects.filter(user=user, group_conversation=group_conversation)
+
+
+# ---------------------------------------------------------------------------
+# Rebuilding state from the message tables (backfill / consistency check)
+# ---------------------------------------------------------------------------
+
+def direct_state_queryset(user):
+    """
+    Direct conversations of a user annotated with the values their
+    ConversationState row should hold.
+    """
+    visible = Message.objects.filter(
+        conversation=OuterRef('pk')
+    ).exclude(deleted_by=user).order_by('-created_at', '-id')
+    unread = Message.objects.filter(
+        conversation=OuterRef('pk'),
+        is_read=False
+    ).exclude(sender=user)
+    hidden = Conversation.deleted_by.through.objects.filter(
+        conversation_id=OuterRef('pk'),
+        user_id=user.pk
+    )
+
+    return Conversation.objects.filter(
+        Q(buyer=user) | Q(seller=user)
+    ).annotate(
+        last_message_id=Subquery(visible.values('id')[:1]),
+        unread=_count_subquery(unread),
+        updated_at=Coalesce(Subquery(visible.values('created_at')[:1]), 'created_at'),
+        hidden=Exists(hidden),
+    )
+
+
+def group_state_queryset(user):
+    """
+    Active group participations of a user annotated with the values their
+    ConversationState row should hold.
+    """
+    visible = GroupMessage.objects.filter(
+        conversation=OuterRef('conversation_id')
+    ).exclude(deleted_by=user).order_by('-created_at', '-id')
+    from_others = GroupMessage.objects.filter(
+        conversation=OuterRef('conversation_id')
+    ).exclude(sender=user)
+    hidden = GroupConversation.deleted_by.through.objects.filter(
+        groupconversation_id=OuterRef('conversation_id'),
+        user_id=user.pk
+    )
+
+    return GroupConversationParticipant.objects.filter(
+        user=user,
+        is_active=True
+    ).annotate(
+        last_message_id=Subquery(visible.values('id')[:1]),
+        unread=Case(
+            When(last_read_at__isnull=True, then=_count_subquery(from_others)),
+            default=_count_subquery(from_others.filter(created_at__gt=OuterRef('last_read_at'))),
+            output_field=IntegerField(),
+        ),
+        updated_at=Coalesce(Subquery(visible.values('created_at')[:1]), 'conversation__created_at'),
+        hidden=Exists(hidden),
+    )
+
+
+def _state_key_from_row(row):
+    if isinstance(row, Conversation):
+        return ('conversation', row.pk)
+    return ('group_conversation', row.conversation_id)
+
+
+def _state_values_from_row(row):
+    is_direct = isinstance(row, Conversation)
+    return {
+        'last_message_id': row.last_message_id if is_direct else None,
+        'last_group_message_id': None if is_direct else row.last_message_id,
+        'last_activity_at': row.updated_at,
+        'unread_count': row.unread,
+        'is_hidden': row.hidden,
+    }
+
+
+def sync_user_states(user, fix=True):
+    """
+    Compare a user's ConversationState rows with the message tables.
+
+    Args:
+        user: User whose inbox rows are checked
+        fix: Whether to create, update and delete rows to match
+
+    Returns:
+        dict with lists of keys that were missing, stale or orphaned
+    """
+    expected = {}
+    for row in list(direct_state_queryset(user)) + list(group_state_queryset(user)):
+        expected[_state_key_from_row(row)] = _state_values_from_row(row)
+
+    existing = {}
+    for state in ConversationState.objects.filter(user=user):
+        if state.conversation_id:
+            existing[('conversation', state.conversation_id)] = state
+        else:
+            existing[('group_conversation', state.group_conversation_id)] = state
+
+    missing = [key for key in expected if key not in existing]
+    orphaned = [key for key in existing if key not in expected]
+    stale = [
+        key for key, state in existing.items()
+        if key in expected and any(getattr(state, f) != expected[key][f] for f in STATE_FIELDS)
+    ]
+
+    if fix:
+        ConversationState.objects.bulk_create([
+            ConversationState(user=user, **{f'{key[0]}_id': key[1]}, **expected[key])
+            for key in missing
+        ])
+        for key in stale:
+            for field, value in expected[key].items():
+                setattr(existing[key], field, value)
+        ConversationState.objects.bulk_update(
+            [existing[key] for key in stale],
+            ['last_message', 'last_group_message', 'last_activity_at', 'unread_count', 'is_hidden']
+        )
+        ConversationState.objects.filter(pk__in=[existing[key].pk for key in orphaned]).delete()
+
+    return {'missing': missing, 'stale': stale, 'orphaned': orphaned}
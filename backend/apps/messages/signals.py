@@ -0,0 +1,48 @@
+"""
+Signal handlers for messages app.
+
+Keeps ConversationState rows in step with conversation membership.
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Conversation, GroupConversationParticipant, ConversationState
+from .services import refresh_state
+
+
+@receiver(post_save, sender=Conversation)
+def create_conversation_states(sender, instance, created, **kwargs):
+    """Create inbox rows for both participants of a new conversation."""
+    if not created:
+        return
+    
+    ConversationState.objects.bulk_create(
+        [
+            ConversationState(
+                user_id=user_id,
+                conversation=instance,
+                last_activity_at=instance.created_at
+            )
+            for user_id in (instance.buyer_id, instance.seller_id)
+        ],
+        ignore_conflicts=True
+    )
+
+
+@receiver(post_save, sender=GroupConversationParticipant)
+def sync_participant_state(sender, instance, update_fields=None, **kwargs):
+    """
+    Add the group to a participant's inbox when they (re)join,
+    remove it when they leave.
+    """
+    if update_fields is not None and 'is_active' not in update_fields:
+        # e.g. read markers; membership did not change
+        return
+    
+    if instance.is_active:
+        refresh_state(instance.user, group_conversation=instance.conversation)
+    else:
+        ConversationState.objects.filter(
+            user_id=instance.user_id,
+            group_conversation_id=instance.conversation_id
+        ).delete()
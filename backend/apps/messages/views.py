@@ -6,11 +6,61 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view, permission_classes
-from django.db.models import Q
-from django.db import IntegrityError
+from django.db.models import Q, Prefetch
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from .models import Conversation, Message, GroupConversation, GroupMessage, GroupConversationParticipant
+from .models import Conversation, Message, GroupConversation, GroupMessage, GroupConversationParticipant, ConversationState
 from .serializers import ConversationSerializer, MessageSerializer, GroupMessageSerializer, InboxItemSerializer
+from .services import (
+    InboxEngine, decode_cursor, record_direct_message, record_group_message,
+    mark_state_read, hide_state, refresh_state,
+    next_sequence, sync_etag, collect_changes, SYNC_DEFAULT_LIMIT, SYNC_MAX_LIMIT
+)
+
+
+INBOX_MAX_LIMIT = 100
+
+
+def _sync_response(request, conversation, queryset, serializer_class):
+    """
+    Build an incremental sync response for a direct or group conversation.
+    
+    Query Params:
+    - since (int, default 0): Cursor returned by the previous sync
+    - limit (int, default 200, max 500): Maximum changed messages per response
+    
+    Returns 304 when If-None-Match matches the conversation's ETag, and a
+    compact {"cursor": N, "unchanged": true} body when `since` is current.
+    """
+    etag = sync_etag(conversation)
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    
+    try:
+        since = max(int(request.query_params.get('since', 0)), 0)
+        limit = min(max(int(request.query_params.get('limit', SYNC_DEFAULT_LIMIT)), 1), SYNC_MAX_LIMIT)
+    except ValueError:
+        return Response({'error': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if since >= conversation.last_seq:
+        return Response({'cursor': since, 'unchanged': True}, headers={'ETag': etag})
+    
+    changes = collect_changes(
+        queryset.select_related('sender', 'parent_message__sender'),
+        request.user,
+        since,
+        conversation.last_seq,
+        limit=limit
+    )
+    serializer = serializer_class(changes['messages'], many=True, context={'request': request})
+    headers = {} if changes['has_more'] else {'ETag': etag}
+    return Response({
+        'cursor': changes['cursor'],
+        'unchanged': False,
+        'has_more': changes['has_more'],
+        'messages': serializer.data,
+        'removed': changes['removed'],
+    }, headers=headers)
 
 
 class ConversationViewSet(viewsets.ModelViewSet):
@@ -30,20 +80,31 @@ class ConversationViewSet(viewsets.ModelViewSet):
         Hide conversation for the current user.
         """
         conversation = self.get_object()
-        conversation.deleted_by.add(request.user)
+        with transaction.atomic():
+            conversation.deleted_by.add(request.user)
+            hide_state(request.user, conversation=conversation)
         return Response(status=status.HTTP_204_NO_CONTENT)
     
     def get_queryset(self):
         """
         Return conversations where user is buyer or seller.
         
+        The user's ConversationState row is prefetched so the serializer
+        can render last message and unread count without extra queries.
+        
         Returns:
             QuerySet of user's conversations
         """
         user = self.request.user
         return Conversation.objects.filter(
             Q(buyer=user) | Q(seller=user)
-        ).select_related('listing', 'buyer', 'seller').order_by('-created_at')
+        ).select_related('listing', 'buyer', 'seller').prefetch_related(
+            Prefetch(
+                'states',
+                queryset=ConversationState.objects.filter(user=user).select_related('last_message__sender'),
+                to_attr='user_states'
+            )
+        ).order_by('-created_at')
     
     def create(self, request, *args, **kwargs):
         """
@@ -160,21 +221,28 @@ class ConversationViewSet(viewsets.ModelViewSet):
         """
         conversation = self.get_object()
         
-        # Determine which messages to mark (received by this user)
-        if request.user == conversation.buyer:
-            # Mark messages from seller
-            marked = Message.objects.filter(
-                conversation=conversation,
-                sender=conversation.seller,
-                is_read=False
-            ).update(is_read=True)
-        else:
-            # Mark messages from buyer
-            marked = Message.objects.filter(
-                conversation=conversation,
-                sender=conversation.buyer,
-                is_read=False
-            ).update(is_read=True)
+        with transaction.atomic():
+            # Determine which messages to mark (received by this user)
+            if request.user == conversation.buyer:
+                # Mark messages from seller
+                unread = Message.objects.filter(
+                    conversation=conversation,
+                    sender=conversation.seller,
+                    is_read=False
+                )
+            else:
+                # Mark messages from buyer
+                unread = Message.objects.filter(
+                    conversation=conversation,
+                    sender=conversation.buyer,
+                    is_read=False
+                )
+            
+            marked = 0
+            if unread.exists():
+                # Read receipts are changes too; share one sequence number
+                marked = unread.update(is_read=True, seq=next_sequence(conversation))
+            mark_state_read(request.user, conversation=conversation)
         
         return Response({
             'status': 'ok',
@@ -208,9 +276,36 @@ class MessageViewSet(viewsets.ModelViewSet):
         return queryset
     
     def perform_create(self, serializer):
-        message = serializer.save(sender=self.request.user)
-        # Un-hide conversation for everyone when a new message is sent
-        message.conversation.deleted_by.clear()
+        with transaction.atomic():
+            conversation = serializer.validated_data['conversation']
+            message = serializer.save(sender=self.request.user, seq=next_sequence(conversation))
+            # Un-hide conversation for everyone when a new message is sent
+            message.conversation.deleted_by.clear()
+            record_direct_message(message)
+
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        Incremental sync for one conversation.
+        
+        GET /api/messages/sync/?conversation=<id>&since=<cursor>
+        
+        Returns only messages created or changed (deleted, read) after the
+        cursor, plus ids of messages the user deleted for themselves.
+        """
+        user = request.user
+        conversation_id = request.query_params.get('conversation')
+        if not conversation_id:
+            return Response({'conversation': ['This field is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            conversation = Conversation.objects.filter(
+                Q(buyer=user) | Q(seller=user)
+            ).get(pk=conversation_id)
+        except (Conversation.DoesNotExist, ValueError):
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return _sync_response(request, conversation, conversation.messages.all(), MessageSerializer)
 
     def destroy(self, request, *args, **kwargs):
         """
@@ -233,12 +328,18 @@ class MessageViewSet(viewsets.ModelViewSet):
                     {'detail': 'Başkasına ait mesajı herkesten silemezsiniz.'}, 
                     status=status.HTTP_403_FORBIDDEN
                 )
-            message.is_deleted = True
-            message.content = ''
-            message.save(update_fields=['is_deleted', 'content'])
+            with transaction.atomic():
+                message.is_deleted = True
+                message.content = ''
+                message.seq = next_sequence(message.conversation)
+                message.save(update_fields=['is_deleted', 'content', 'seq'])
         else:
             # Delete for me
-            message.deleted_by.add(user)
+            with transaction.atomic():
+                message.deleted_by.add(user)
+                message.seq = next_sequence(message.conversation)
+                message.save(update_fields=['seq'])
+                refresh_state(user, conversation=message.conversation)
             
         serializer = self.get_serializer(message)
         return Response(serializer.data)
@@ -250,88 +351,39 @@ def inbox(request):
     """
     Unified inbox combining direct (1-1) and group conversations.
     Returns sorted list by most recent activity.
+
+    Query Params:
+    - limit (int, optional): Return only the top N threads (max 100).
+      The response is then wrapped as {"next_cursor": ..., "results": [...]}.
+    - cursor (str, optional): Continue after the given next_cursor.
     """
-    user = request.user
-    inbox_items = []
-    
-    # Get direct conversations (where user is buyer or seller)
-    # Filter out conversations hidden by the user
-    direct_convs = Conversation.objects.filter(
-        Q(buyer=user) | Q(seller=user)
-    ).exclude(deleted_by=user)
-    
-    for conv in direct_convs:
-        # Get last message that hasn't been deleted for this user
-        last_msg = conv.messages.exclude(deleted_by=user).order_by('-created_at').first()
-        
-        # Determine counterparty
-        counterparty = conv.seller if user == conv.buyer else conv.buyer
-        counterparty_username = counterparty.username if counterparty.username else counterparty.email.split('@')[0]
-        
-        # Calculate unread count
-        if user == conv.buyer:
-            unread = conv.messages.filter(sender=conv.seller, is_read=False).count()
-        else:
-            unread = conv.messages.filter(sender=conv.buyer, is_read=False).count()
-        
-        inbox_items.append({
-            'type': 'DIRECT',
-            'id': conv.id,
-            'title': counterparty_username,
-            'partnership_id': None,
-            'last_message': {
-                'content': last_msg.content,
-                'sender_id': last_msg.sender.id,
-                'sender_username': last_msg.sender.username or last_msg.sender.email.split('@')[0],
-                'created_at': last_msg.created_at
-            } if last_msg else None,
-            'unread_count': unread,
-            'updated_at': last_msg.created_at if last_msg else conv.created_at
-        })
+    engine = InboxEngine(request.user)
     
-    # Get group conversations (where user is active participant)
-    # Filter out conversations hidden by the user
-    group_participants = GroupConversationParticipant.objects.filter(
-        user=user,
-        is_active=True
-    ).exclude(conversation__deleted_by=user).select_related('conversation__partnership')
+    limit_param = request.query_params.get('limit')
+    if limit_param is None:
+        # Legacy behaviour: full list as a plain array
+        items, _ = engine.get_items()
+        serializer = InboxItemSerializer(items, many=True)
+        return Response(serializer.data)
     
-    for participant in group_participants:
-        conv = participant.conversation
-        # Group messages: also exclude those deleted for this user
-        last_msg = conv.messages.exclude(deleted_by=user).order_by('-created_at').first()
-        
-        # Calculate unread count
-        if participant.last_read_at:
-            unread = conv.messages.filter(
-                created_at__gt=participant.last_read_at
-            ).exclude(sender=user).count()
-        else:
-            unread = conv.messages.exclude(sender=user).count()
-        
-        # Get member count
-        member_count = conv.participants.filter(is_active=True).count()
-        
-        inbox_items.append({
-            'type': 'GROUP',
-            'id': conv.id,
-            'title': f"{conv.partnership.city} Ortaklığı ({member_count}/{conv.partnership.person_count})",
-            'partnership_id': conv.partnership.id,
-            'last_message': {
-                'content': last_msg.content,
-                'sender_id': last_msg.sender.id,
-                'sender_username': last_msg.sender.username or last_msg.sender.email.split('@')[0],
-                'created_at': last_msg.created_at
-            } if last_msg else None,
-            'unread_count': unread,
-            'updated_at': last_msg.created_at if last_msg else conv.created_at
-        })
+    try:
+        limit = min(max(int(limit_param), 1), INBOX_MAX_LIMIT)
+    except ValueError:
+        return Response({'limit': ['A valid integer is required.']}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Sort by updated_at descending
-    inbox_items.sort(key=lambda x: x['updated_at'], reverse=True)
+    cursor = None
+    cursor_param = request.query_params.get('cursor')
+    if cursor_param:
+        cursor = decode_cursor(cursor_param)
+        if cursor is None:
+            return Response({'cursor': ['Invalid cursor.']}, status=status.HTTP_400_BAD_REQUEST)
     
-    serializer = InboxItemSerializer(inbox_items, many=True)
-    return Response(serializer.data)
+    items, next_cursor = engine.get_items(limit=limit, cursor=cursor)
+    serializer = InboxItemSerializer(items, many=True)
+    return Response({
+        'next_cursor': next_cursor,
+        'results': serializer.data
+    })
 
 
 class GroupConversationViewSet(viewsets.ViewSet):
@@ -356,6 +408,24 @@ class GroupConversationViewSet(viewsets.ViewSet):
         serializer = GroupMessageSerializer(messages, many=True, context={'request': request})
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'], url_path='messages/sync')
+    def sync_messages(self, request, pk=None):
+        """
+        Incremental sync for a group conversation.
+        
+        GET /api/messages/groups/<id>/messages/sync/?since=<cursor>
+        """
+        try:
+            conversation = GroupConversation.objects.get(pk=pk)
+        except GroupConversation.DoesNotExist:
+            return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        # Check if user is participant
+        if not conversation.participants.filter(user=request.user, is_active=True).exists():
+            return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        
+        return _sync_response(request, conversation, conversation.messages.all(), GroupMessageSerializer)
+    
     @action(detail=True, methods=['post'], url_path='messages/send')
     def send_message(self, request, pk=None):
         """Send a message to a group conversation."""
@@ -372,14 +442,17 @@ class GroupConversationViewSet(viewsets.ViewSet):
         if not content:
             return Response({'error': 'Content cannot be empty'}, status=status.HTTP_400_BAD_REQUEST)
         
-        message = GroupMessage.objects.create(
-            conversation=conversation,
-            sender=request.user,
-            content=content
-        )
-        
-        # Un-hide conversation for all active participants when a new message is sent
-        conversation.deleted_by.clear()
+        with transaction.atomic():
+            message = GroupMessage.objects.create(
+                conversation=conversation,
+                sender=request.user,
+                content=content,
+                seq=next_sequence(conversation)
+            )
+            
+            # Un-hide conversation for all active participants when a new message is sent
+            conversation.deleted_by.clear()
+            record_group_message(message)
         
         serializer = GroupMessageSerializer(message, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -398,8 +471,10 @@ class GroupConversationViewSet(viewsets.ViewSet):
         except GroupConversationParticipant.DoesNotExist:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
-        participant.last_read_at = timezone.now()
-        participant.save()
+        with transaction.atomic():
+            participant.last_read_at = timezone.now()
+            participant.save(update_fields=['last_read_at'])
+            mark_state_read(request.user, group_conversation=conversation)
         
         return Response({'status': 'marked as read'})
 
@@ -415,7 +490,9 @@ class GroupConversationViewSet(viewsets.ViewSet):
         if not conversation.participants.filter(user=request.user, is_active=True).exists():
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
             
-        conversation.deleted_by.add(request.user)
+        with transaction.atomic():
+            conversation.deleted_by.add(request.user)
+            hide_state(request.user, group_conversation=conversation)
         return Response({'status': 'hidden'})
 
 
@@ -447,12 +524,18 @@ class GroupMessageViewSet(viewsets.ModelViewSet):
                     {'detail': 'Başkasına ait mesajı herkesten silemezsiniz.'}, 
                     status=status.HTTP_403_FORBIDDEN
                 )
-            message.is_deleted = True
-            message.content = ''
-            message.save(update_fields=['is_deleted', 'content'])
+            with transaction.atomic():
+                message.is_deleted = True
+                message.content = ''
+                message.seq = next_sequence(message.conversation)
+                message.save(update_fields=['is_deleted', 'content', 'seq'])
         else:
             # Delete for me
-            message.deleted_by.add(user)
+            with transaction.atomic():
+                message.deleted_by.add(user)
+                message.seq = next_sequence(message.conversation)
+                message.save(update_fields=['seq'])
+                refresh_state(user, group_conversation=message.conversation)
             
         serializer = self.get_serializer(message)
         return Response(serializer.data)
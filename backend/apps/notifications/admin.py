@@ -3,7 +3,7 @@ Admin configuration for notifications app.
 """
 
 from django.contrib import admin
-from .models import Notification
+from .models import ListingChangeEvent, Notification
 
 
 @admin.register(Notification)
@@ -25,3 +25,19 @@ class NotificationAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Disable deletion in admin."""
         return False
+
+
+@admin.register(ListingChangeEvent)
+class ListingChangeEventAdmin(admin.ModelAdmin):
+    """
+    Admin interface for listing change fan-out events.
+    """
+    
+    list_display = ('listing', 'type', 'status', 'notified', 'created_at', 'completed_at')
+    list_filter = ('type', 'status')
+    ordering = ('-id',)
+    readonly_fields = ('listing', 'type', 'data', 'status', 'cursor', 'notified', 'created_at', 'completed_at')
+    
+    def has_add_permission(self, request):
+        """Events are only recorded by listing saves."""
+        return False
@@ -0,0 +1,219 @@
+"""
+Fan-out of listing changes to the users who favourited the listing.
+
+Saving a listing only records one ListingChangeEvent (and only if a field
+users see actually changed, see NOTIFY_FIELDS). A background worker
+expands pending events into Notification rows CHUNK_SIZE favourites at a
+time: each chunk is inserted with bulk_create, pushed to connected clients
+and the event's cursor advanced in one transaction, so the seller's
+request never waits for the fan-out and a crash resumes at the last chunk.
+
+The worker is a daemon thread in each web process, started by the first
+event the process records. It wakes when an event is committed and also
+polls every POLL_INTERVAL seconds, picking up events left by other
+processes. Set NOTIFICATION_FANOUT['IN_PROCESS'] to False to run it
+only in `manage.py process_notification_fanout` instead. Events are claimed
+with SELECT ... FOR UPDATE SKIP LOCKED where the database supports it, so
+several workers never notify the same chunk twice.
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CHUNK_SIZE': 500,
+    'POLL_INTERVAL': 5,
+    'IN_PROCESS': True,
+    'RETENTION_DAYS': 7,
+}
+
+# AnimalListing fields whose change is worth a notification; saves that
+# only touch other fields (view_count, primary_image, search columns) are
+# not reported
+NOTIFY_FIELDS = (
+    'species', 'animal_type', 'title', 'breed', 'gender', 'age_months', 'age',
+    'weight', 'price', 'location', 'city', 'district', 'ear_tag_no', 'company',
+    'description', 'is_active',
+)
+
+
+def get_setting(name):
+    """Read a NOTIFICATION_FANOUT setting, falling back to DEFAULTS."""
+    return getattr(settings, 'NOTIFICATION_FANOUT', {}).get(name, DEFAULTS[name])
+
+
+def record_listing_change(listing, changed):
+    """
+    Record a change of `listing` for fan-out.
+
+    Args:
+        changed: {field: (old value, new value)} of the saved listing
+
+    Returns:
+        The ListingChangeEvent, or None if no NOTIFY_FIELDS changed
+    """
+    from .models import ListingChangeEvent, Notification
+
+    fields = sorted(name for name in changed if name in NOTIFY_FIELDS)
+    if not fields or not listing.favorited_by.exists():
+        return None
+
+    data = {'listing_id': listing.id, 'breed': listing.breed, 'changed_fields': fields}
+    if 'price' in changed:
+        old_price, new_price = changed['price']
+        event_type = Notification.PRICE_CHANGED
+        data.update(old_price=str(old_price), new_price=str(new_price))
+    else:
+        event_type = Notification.LISTING_UPDATED
+
+    event = ListingChangeEvent.objects.create(listing=listing, type=event_type, data=data)
+    transaction.on_commit(fanout_worker.wake)
+    return event
+
+
+def build_notification(event, user_id):
+    """The Notification one favouriting user gets for `event`."""
+    from .models import Notification
+
+    data = event.data
+    if event.type == Notification.PRICE_CHANGED:
+        return Notification(
+            user_id=user_id,
+            type=Notification.PRICE_CHANGED,
+            title='Fiyat Değişti',
+            message=f"{data['breed']} için fiyat {data['old_price']} → {data['new_price']} olarak değişti",
+            data={
+                'listing_id': data['listing_id'],
+                'old_price': data['old_price'],
+                'new_price': data['new_price'],
+            }
+        )
+    return Notification(
+        user_id=user_id,
+        type=Notification.LISTING_UPDATED,
+        title='İlan Güncellendi',
+        message=f"Favorilediğiniz ilan ({data['breed']}) güncellendi",
+        data={
+            'listing_id': data['listing_id'],
+        }
+    )
+
+
+class FanoutWorker:
+    """
+    Expands pending ListingChangeEvents into notifications.
+
+    Usage:
+        fanout_worker.wake()           # after an event is committed
+        fanout_worker.process_pending()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # One chunk at a time per process (SQLite cannot run two writers)
+        self._process_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._last_prune = 0.0
+
+    def wake(self):
+        if not get_setting('IN_PROCESS'):
+            return
+        self._ensure_thread()
+        self._wakeup.set()
+
+    def process_pending(self, max_chunks=None):
+        """
+        Fan out pending events, oldest first, until none are left (or
+        max_chunks chunks were written).
+
+        Returns:
+            Number of notifications created
+        """
+        created = chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            written = self.process_chunk()
+            if written is None:
+                break
+            created += written
+            chunks += 1
+        return created
+
+    def process_chunk(self):
+        """
+        Notify the next CHUNK_SIZE favourites of the oldest pending event.
+
+        Returns:
+            Notifications created, or None if no event was pending
+        """
+        from apps.favorites.models import Favorite
+        from apps.realtime.signals import publish_notifications
+        from .models import ListingChangeEvent, Notification
+
+        size = get_setting('CHUNK_SIZE')
+        with self._process_lock, transaction.atomic():
+            pending = ListingChangeEvent.objects.filter(status=ListingChangeEvent.PENDING).order_by('id')
+            if connection.features.has_select_for_update_skip_locked:
+                pending = pending.select_for_update(skip_locked=True)
+            event = pending.first()
+            if event is None:
+                return None
+
+            # Users who favourited the listing after the change are not told about it
+            favorites = list(Favorite.objects.filter(
+                animal_id=event.listing_id, id__gt=event.cursor, created_at__lte=event.created_at
+            ).order_by('id').values_list('id', 'user_id')[:size])
+
+            notifications = [build_notification(event, user_id) for _, user_id in favorites]
+            Notification.objects.bulk_create(notifications)
+
+            event.notified += len(notifications)
+            if favorites:
+                event.cursor = favorites[-1][0]
+            if len(favorites) < size:
+                event.status = ListingChangeEvent.DONE
+                event.completed_at = timezone.now()
+            event.save(update_fields=['cursor', 'notified', 'status', 'completed_at'])
+            transaction.on_commit(lambda: publish_notifications(notifications))
+        return len(notifications)
+
+    def prune(self):
+        """Delete events fanned out more than RETENTION_DAYS ago."""
+        from .models import ListingChangeEvent
+
+        cutoff = timezone.now() - timedelta(days=get_setting('RETENTION_DAYS'))
+        deleted, _ = ListingChangeEvent.objects.filter(
+            status=ListingChangeEvent.DONE, completed_at__lt=cutoff
+        ).delete()
+        return deleted
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='notification-fanout', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(get_setting('POLL_INTERVAL'))
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.process_pending()
+                if time.monotonic() - self._last_prune > 3600:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+            except Exception:
+                logger.exception('Notification fan-out failed, retrying')
+
+
+fanout_worker = FanoutWorker()
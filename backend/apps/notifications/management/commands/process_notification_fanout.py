@@ -0,0 +1,33 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.notifications.fanout import fanout_worker, get_setting
+
+
+class Command(BaseCommand):
+    help = (
+        'Expands pending listing change events into notifications for the users '
+        'who favourited the listing. Runs until interrupted unless --once is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process pending events and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            created = fanout_worker.process_pending()
+            pruned = fanout_worker.prune()
+            self.stdout.write(self.style.SUCCESS(f'Created {created} notifications, pruned {pruned} old events.'))
+            return
+
+        self.stdout.write(self.style.NOTICE('Processing listing change events, Ctrl+C to stop...'))
+        last_prune = 0.0
+        while True:
+            close_old_connections()
+            created = fanout_worker.process_pending()
+            if created:
+                self.stdout.write(f'Created {created} notifications.')
+            if time.monotonic() - last_prune > 3600:
+                last_prune = time.monotonic()
+                fanout_worker.prune()
+            time.sleep(get_setting('POLL_INTERVAL'))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0016_listingfacetbucket'),
+        ('notifications', '0002_alter_notification_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('NEW_MESSAGE', 'New Message'), ('FAVORITED_LISTING', 'Favorited Listing'), ('LISTING_UPDATED', 'Listing Updated'), ('PRICE_CHANGED', 'Price Changed'), ('APPOINTMENT_REQUESTED', 'Appointment Requested'), ('APPOINTMENT_APPROVED', 'Appointment Approved'), ('APPOINTMENT_REJECTED', 'Appointment Rejected'), ('APPOINTMENT_CANCELLED', 'Appointment Cancelled')], help_text='Notification type sent to the favouriting users', max_length=50)),
+                ('data', models.JSONField(default=dict, help_text='Changed fields and notification payload')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DONE', 'Done')], default='PENDING', max_length=10)),
+                ('cursor', models.BigIntegerField(default=0, help_text='Id of the last favourite notified')),
+                ('notified', models.PositiveIntegerField(default=0, help_text='Notifications created so far')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('listing', models.ForeignKey(help_text='Listing that changed', on_delete=django.db.models.deletion.CASCADE, related_name='change_events', to='animals.animallisting')),
+            ],
+            options={
+                'verbose_name': 'listing change event',
+                'verbose_name_plural': 'listing change events',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'id'], name='notificatio_status_6d4588_idx')],
+            },
+        ),
+    ]
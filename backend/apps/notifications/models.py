@@ -85,3 +85,64 @@ class Notification(models.Model):
         if not self.is_read:
             self.is_read = True
             self.save(update_fields=['is_read'])
+
+
+class ListingChangeEvent(models.Model):
+    """
+    One change of a listing, fanned out to the users who favourited it.
+    
+    Saving a listing records a single event; the fan-out worker (see
+    fanout.py) expands it into Notification rows in chunks of favourites,
+    keeping its position in `cursor` so an interrupted fan-out resumes
+    where it stopped.
+    """
+    
+    PENDING = 'PENDING'
+    DONE = 'DONE'
+    
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+    ]
+    
+    listing = models.ForeignKey(
+        'animals.AnimalListing',
+        on_delete=models.CASCADE,
+        related_name='change_events',
+        help_text="Listing that changed"
+    )
+    type = models.CharField(
+        max_length=50,
+        choices=Notification.TYPE_CHOICES,
+        help_text="Notification type sent to the favouriting users"
+    )
+    data = models.JSONField(
+        default=dict,
+        help_text="Changed fields and notification payload"
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    cursor = models.BigIntegerField(
+        default=0,
+        help_text="Id of the last favourite notified"
+    )
+    notified = models.PositiveIntegerField(
+        default=0,
+        help_text="Notifications created so far"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'listing change event'
+        verbose_name_plural = 'listing change events'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.type} event {self.id} for listing {self.listing_id} ({self.status})"
@@ -2,11 +2,12 @@
 Signal handlers for automatic notification creation.
 """
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from apps.messages.models import Message
 from apps.favorites.models import Favorite
 from apps.animals.models import AnimalListing
+from .fanout import NOTIFY_FIELDS, record_listing_change
 from .models import Notification
 
 
@@ -63,77 +64,21 @@ def notify_on_favorite(sender, instance, created, **kwargs):
     )
 
 
-# Store old price temporarily
-_listing_old_prices = {}
-
-
-@receiver(pre_save, sender=AnimalListing)
-def track_listing_changes(sender, instance, **kwargs):
-    """
-    Track changes before saving to detect price changes.
-    """
-    if instance.pk:
-        try:
-            old_instance = AnimalListing.objects.get(pk=instance.pk)
-            _listing_old_prices[instance.pk] = old_instance.price
-        except AnimalListing.DoesNotExist:
-            pass
-
-
 @receiver(post_save, sender=AnimalListing)
 def notify_on_listing_update(sender, instance, created, **kwargs):
     """
-    Create notifications when a listing is updated.
+    Record a listing change for the users who favorited this listing.
     
-    Notifies users who have favorited this listing.
-    Checks for price changes specifically.
+    Reads the listing's own diff against the values it was loaded with
+    (AnimalListing.get_changes), so no extra query is needed. Only saves
+    that change a visible field (see fanout.NOTIFY_FIELDS) count; the
+    notifications themselves are created in the background by the
+    fan-out worker. Price changes get their own notification type.
     """
     if created:
         return
     
-    # Get users who favorited this listing
-    favorited_by = instance.favorited_by.select_related('user').values_list('user', flat=True)
-    
-    if not favorited_by:
-        # Clean up tracking
-        _listing_old_prices.pop(instance.pk, None)
-        return
-    
-    # Check if price changed
-    old_price = _listing_old_prices.get(instance.pk)
-    
-    if old_price is not None and old_price != instance.price:
-        # Create price change notifications
-        notifications = [
-            Notification(
-                user_id=user_id,
-                type=Notification.PRICE_CHANGED,
-                title='Fiyat Değişti',
-                message=f'{instance.breed} için fiyat {old_price} → {instance.price} olarak değişti',
-                data={
-                    'listing_id': instance.id,
-                    'old_price': str(old_price),
-                    'new_price': str(instance.price),
-                }
-            )
-            for user_id in favorited_by
-        ]
-    else:
-        # General listing update
-        notifications = [
-            Notification(
-                user_id=user_id,
-                type=Notification.LISTING_UPDATED,
-                title='İlan Güncellendi',
-                message=f'Favorilediğiniz ilan ({instance.breed}) güncellendi',
-                data={
-                    'listing_id': instance.id,
-                }
-            )
-            for user_id in favorited_by
-        ]
-    
-    Notification.objects.bulk_create(notifications)
-    
-    # Clean up tracking
-    _listing_old_prices.pop(instance.pk, None)
+    # Unsaved edits outside update_fields are not part of this save
+    update_fields = kwargs.get('update_fields')
+    fields = NOTIFY_FIELDS if update_fields is None else [name for name in NOTIFY_FIELDS if name in update_fields]
+    record_listing_change(instance, instance.get_changes(fields))
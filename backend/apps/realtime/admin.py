@@ -0,0 +1,13 @@
+"""
+Admin configuration for realtime app.
+"""
+
+from django.contrib import admin
+from .models import PushEvent
+
+
+@admin.register(PushEvent)
+class PushEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'type', 'created_at']
+    list_filter = ['type']
+    raw_id_fields = ['user']
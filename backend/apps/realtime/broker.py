@@ -0,0 +1,316 @@
+"""
+Pub/sub brokers for the realtime push channel.
+
+Publishers (signal handlers, running in any request thread) call
+`publish()`. Subscribers are SSE streams running on the ASGI event loop.
+The broker class is chosen with REALTIME['BROKER']:
+
+- InProcessBroker: publisher and subscribers share one process. Good for
+  development (`uvicorn config.asgi:application`) or a single ASGI worker.
+- DatabaseBroker: stand-in for an external broker. Events go through the
+  PushEvent table, so WSGI workers can publish to a separate ASGI process.
+  Only worth enabling when such an ASGI process is actually deployed.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque, defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BROKER': 'apps.realtime.broker.InProcessBroker',
+    'HEARTBEAT_SECONDS': 15,
+    'MAX_CONNECTIONS_PER_USER': 5,
+    'QUEUE_SIZE': 100,
+    'HISTORY_SIZE': 1000,
+    'POLL_INTERVAL': 0.5,
+    'RETENTION_MINUTES': 10,
+}
+
+
+def get_setting(name):
+    """Read a REALTIME setting, falling back to DEFAULTS."""
+    return getattr(settings, 'REALTIME', {}).get(name, DEFAULTS[name])
+
+
+class ConnectionLimitExceeded(Exception):
+    """Raised when a user already has the maximum number of open streams."""
+
+
+@dataclass
+class Event:
+    id: int
+    user_id: int
+    type: str
+    data: dict = field(default_factory=dict)
+
+
+class Subscription:
+    """
+    One open stream. Events are handed over to the subscriber's event loop
+    thread-safely; if the subscriber falls QUEUE_SIZE events behind, the
+    subscription is closed and the client reconnects with its cursor.
+    """
+
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=get_setting('QUEUE_SIZE'))
+        self.closed = False
+        # Ids already sent, bounded like DatabaseBroker._seen. Checked by
+        # membership rather than a high-water mark: DatabaseBroker can
+        # deliver a late-committed lower id after a higher one
+        self._delivered = deque(maxlen=get_setting('HISTORY_SIZE'))
+        self._delivered_ids = set()
+
+    def mark_delivered(self, event_id):
+        """Remember an event as sent, so later copies of it are skipped."""
+        if event_id in self._delivered_ids:
+            return
+        if len(self._delivered) == self._delivered.maxlen:
+            self._delivered_ids.discard(self._delivered[0])
+        self._delivered.append(event_id)
+        self._delivered_ids.add(event_id)
+
+    def deliver(self, event):
+        """Queue an event for this subscriber (callable from any thread)."""
+        if not self.closed:
+            self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Realtime subscriber for user {self.user_id} is too slow, closing stream")
+            self.closed = True
+
+    async def get(self, timeout):
+        """
+        Wait for the next event not yet delivered.
+
+        Returns:
+            Event, or None if nothing arrived before the timeout
+        """
+        deadline = self.loop.time() + timeout
+        while True:
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                event = await asyncio.wait_for(self.queue.get(), remaining)
+            except asyncio.TimeoutError:
+                return None
+            # Skip events already sent (e.g. during backlog replay)
+            if event.id not in self._delivered_ids:
+                self.mark_delivered(event.id)
+                return event
+
+
+class InProcessBroker:
+    """
+    Fan-out to subscribers of the current process.
+
+    Keeps the last HISTORY_SIZE events in memory so clients reconnecting
+    with Last-Event-ID can catch up on what they missed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+        self._history = deque(maxlen=get_setting('HISTORY_SIZE'))
+        self._last_id = 0
+
+    def publish(self, user_id, event_type, data):
+        """
+        Publish an event to a user once the current transaction commits.
+        """
+        transaction.on_commit(lambda: self._publish_now(user_id, event_type, data))
+
+    def publish_many(self, user_ids, event_type, data):
+        """Publish the same event to several users."""
+        user_ids = list(user_ids)
+        transaction.on_commit(lambda: [self._publish_now(uid, event_type, data) for uid in user_ids])
+
+    def _publish_now(self, user_id, event_type, data):
+        with self._lock:
+            # Time-based ids stay increasing across process restarts,
+            # so cursors from a previous process remain usable.
+            self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+            event = Event(self._last_id, user_id, event_type, data)
+            self._history.append(event)
+        self._dispatch(event)
+
+    def _dispatch(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(event.user_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def subscribe(self, user_id, loop, last_event_id=None):
+        """
+        Open a subscription for a user.
+
+        Args:
+            user_id: Subscriber
+            loop: Event loop the subscriber runs on
+            last_event_id: Cursor from a previous stream, if reconnecting
+
+        Returns:
+            (subscription, backlog) where backlog holds missed events
+
+        Raises:
+            ConnectionLimitExceeded: If the user has too many open streams
+        """
+        subscription = Subscription(user_id, loop)
+        with self._lock:
+            if len(self._subscriptions[user_id]) >= get_setting('MAX_CONNECTIONS_PER_USER'):
+                raise ConnectionLimitExceeded()
+            self._subscriptions[user_id].add(subscription)
+
+        backlog = []
+        if last_event_id is not None:
+            backlog = self.replay(user_id, last_event_id)
+            for event in backlog:
+                subscription.mark_delivered(event.id)
+        return subscription, backlog
+
+    def replay(self, user_id, last_event_id):
+        """Return stored events for a user newer than the cursor."""
+        with self._lock:
+            return [e for e in self._history if e.user_id == user_id and e.id > last_event_id]
+
+    def unsubscribe(self, subscription):
+        subscription.closed = True
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def connection_count(self, user_id):
+        with self._lock:
+            return len(self._subscriptions.get(user_id, ()))
+
+
+class DatabaseBroker(InProcessBroker):
+    """
+    Broker stand-in backed by the PushEvent table.
+
+    publish() inserts rows after commit from whichever process handles the
+    request. Each subscribing process runs one poller thread that reads new
+    rows by id and fans them out locally, so the database sees one query
+    per POLL_INTERVAL per process instead of one per client.
+
+    Rows older than RETENTION_MINUTES are pruned by the publishing
+    processes (at most once a minute each), so the table stays bounded
+    even when no subscriber process is running.
+    """
+
+    LOOKBACK = 100
+
+    def __init__(self):
+        super().__init__()
+        self._poller = None
+        self._seen = deque(maxlen=self.LOOKBACK * 10)
+        self._seen_set = set()
+        self._last_prune = 0.0
+
+    def _publish_now(self, user_id, event_type, data):
+        from .models import PushEvent
+        PushEvent.objects.create(user_id=user_id, type=event_type, data=data)
+        self._prune()
+
+    def publish_many(self, user_ids, event_type, data):
+        user_ids = list(user_ids)
+        transaction.on_commit(lambda: self._publish_many_now(user_ids, event_type, data))
+
+    def _publish_many_now(self, user_ids, event_type, data):
+        from .models import PushEvent
+        PushEvent.objects.bulk_create([
+            PushEvent(user_id=uid, type=event_type, data=data) for uid in user_ids
+        ])
+        self._prune()
+
+    def subscribe(self, user_id, loop, last_event_id=None):
+        self._ensure_poller()
+        return super().subscribe(user_id, loop, last_event_id)
+
+    def replay(self, user_id, last_event_id):
+        from .models import PushEvent
+        rows = PushEvent.objects.filter(user_id=user_id, id__gt=last_event_id).order_by('id')[:get_setting('HISTORY_SIZE')]
+        return [Event(row.id, row.user_id, row.type, row.data) for row in rows]
+
+    def _ensure_poller(self):
+        from .models import PushEvent
+        with self._lock:
+            if self._poller is None or not self._poller.is_alive():
+                # Take the starting point before subscribe() returns, so
+                # events published right after it are not counted as old
+                last_id = PushEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+                for event_id in PushEvent.objects.filter(id__gt=last_id - self.LOOKBACK).values_list('id', flat=True):
+                    self._remember(event_id)
+                self._poller = threading.Thread(
+                    target=self._poll_forever, args=(last_id,), name='realtime-poller', daemon=True
+                )
+                self._poller.start()
+
+    def _poll_forever(self, last_id):
+        from .models import PushEvent
+        interval = get_setting('POLL_INTERVAL')
+
+        while True:
+            time.sleep(interval)
+            try:
+                close_old_connections()
+                # Re-read a small window below the high-water mark: ids of
+                # concurrent inserts may commit out of order.
+                rows = PushEvent.objects.filter(id__gt=last_id - self.LOOKBACK).order_by('id')
+                for row in rows:
+                    if row.id in self._seen_set:
+                        continue
+                    self._remember(row.id)
+                    last_id = max(last_id, row.id)
+                    self._dispatch(Event(row.id, row.user_id, row.type, row.data))
+                self._prune()
+            except Exception:
+                logger.exception("Realtime poller failed, retrying")
+
+    def _remember(self, event_id):
+        if len(self._seen) == self._seen.maxlen:
+            self._seen_set.discard(self._seen[0])
+        self._seen.append(event_id)
+        self._seen_set.add(event_id)
+
+    def _prune(self):
+        from .models import PushEvent
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_prune < 60:
+                return
+            self._last_prune = now
+        cutoff = timezone.now() - timedelta(minutes=get_setting('RETENTION_MINUTES'))
+        PushEvent.objects.filter(created_at__lt=cutoff).delete()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker configured in REALTIME['BROKER']."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(get_setting('BROKER'))()
+    return _broker
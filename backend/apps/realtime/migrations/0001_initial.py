@@ -0,0 +1,33 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PushEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(help_text='Event type (message, group_message, notification)', max_length=50)),
+                ('data', models.JSONField(help_text='Event payload')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('user', models.ForeignKey(help_text='Recipient of the event', on_delete=django.db.models.deletion.CASCADE, related_name='push_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'push event',
+                'verbose_name_plural': 'push events',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['user', 'id'], name='realtime_pu_user_id_15463f_idx')],
+            },
+        ),
+    ]
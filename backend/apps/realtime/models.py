@@ -0,0 +1,42 @@
+"""
+Models for realtime app.
+"""
+
+from django.db import models
+from django.conf import settings
+
+
+class PushEvent(models.Model):
+    """
+    A push event queued for delivery to one user.
+    
+    Only used by DatabaseBroker, which shares events between the web
+    workers that publish them and the ASGI process that streams them.
+    Rows are short-lived and pruned after REALTIME['RETENTION_MINUTES'].
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='push_events',
+        help_text="Recipient of the event"
+    )
+    type = models.CharField(
+        max_length=50,
+        help_text="Event type (message, group_message, notification)"
+    )
+    data = models.JSONField(
+        help_text="Event payload"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'push event'
+        verbose_name_plural = 'push events'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['user', 'id']),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.type} event {self.id} for user {self.user_id}"
@@ -0,0 +1,65 @@
+"""
+Signal handlers that push new rows to connected clients.
+
+Payloads are kept small: they tell the client what changed and the
+latest sequence number, and the client fetches the rows through the
+regular sync endpoints (/api/messages/sync/, groups/<id>/messages/sync/).
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from apps.messages.models import Message, GroupMessage, GroupConversationParticipant
+from apps.notifications.models import Notification
+from apps.notifications.serializers import NotificationSerializer
+from .broker import get_broker
+
+
+def publish_notifications(notifications):
+    """
+    Push notifications to their recipients.
+
+    Use after bulk_create, which does not send post_save.
+    """
+    broker = get_broker()
+    for notification in notifications:
+        broker.publish(notification.user_id, 'notification', NotificationSerializer(notification).data)
+
+
+@receiver(post_save, sender=Message)
+def push_message(sender, instance, **kwargs):
+    """Tell both participants that a direct conversation changed."""
+    conversation = instance.conversation
+    get_broker().publish_many(
+        [conversation.buyer_id, conversation.seller_id],
+        'message',
+        {
+            'conversation_id': conversation.id,
+            'message_id': instance.id,
+            'seq': instance.seq,
+        }
+    )
+
+
+@receiver(post_save, sender=GroupMessage)
+def push_group_message(sender, instance, **kwargs):
+    """Tell active group members that a group conversation changed."""
+    user_ids = GroupConversationParticipant.objects.filter(
+        conversation_id=instance.conversation_id,
+        is_active=True
+    ).values_list('user_id', flat=True)
+    get_broker().publish_many(
+        user_ids,
+        'group_message',
+        {
+            'group_id': instance.conversation_id,
+            'message_id': instance.id,
+            'seq': instance.seq,
+        }
+    )
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, **kwargs):
+    """Push newly created notifications."""
+    if created:
+        publish_notifications([instance])
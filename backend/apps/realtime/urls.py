@@ -0,0 +1,10 @@
+"""
+URL configuration for realtime app.
+"""
+
+from django.urls import path
+from .views import event_stream
+
+urlpatterns = [
+    path('stream/', event_stream, name='realtime-stream'),
+]
@@ -0,0 +1,101 @@
+"""
+Server-Sent Events stream for realtime push.
+
+Runs as an async Django view, so it must be served under ASGI
+(e.g. `uvicorn config.asgi:application`). Under WSGI each open stream
+would hold a worker; clients fall back to polling the regular endpoints.
+"""
+
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from .broker import get_broker, get_setting, ConnectionLimitExceeded
+
+# Client reconnect delay sent with the `retry:` field (milliseconds)
+RECONNECT_DELAY_MS = 3000
+
+
+def _authenticate(request):
+    """
+    Resolve the user from a JWT.
+
+    EventSource cannot send headers, so the access token may also be passed
+    as ?token=. Returns None if the token is missing or invalid, or its
+    user is deleted or inactive.
+    """
+    auth = JWTAuthentication()
+    try:
+        raw_token = request.GET.get('token')
+        if not raw_token:
+            header = auth.get_header(request)
+            raw_token = auth.get_raw_token(header) if header else None
+        if not raw_token:
+            return None
+        validated = auth.get_validated_token(raw_token)
+        return auth.get_user(validated)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def _parse_cursor(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _format_event(event):
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data, default=str)}\n\n"
+
+
+async def event_stream(request):
+    """
+    Stream events for the authenticated user.
+
+    Query params:
+        token: JWT access token (alternative to the Authorization header)
+        last_event_id: Resume cursor (alternative to the Last-Event-ID header)
+
+    Returns 401 without a valid token and 429 when the user already has
+    REALTIME['MAX_CONNECTIONS_PER_USER'] open streams.
+    """
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Kimlik doğrulama gerekli'}, status=401)
+
+    broker = get_broker()
+    cursor = _parse_cursor(request)
+    try:
+        subscription, backlog = await sync_to_async(broker.subscribe)(
+            user.id, asyncio.get_running_loop(), cursor
+        )
+    except ConnectionLimitExceeded:
+        return JsonResponse({'detail': 'Çok fazla açık bağlantı'}, status=429)
+
+    heartbeat = get_setting('HEARTBEAT_SECONDS')
+
+    async def stream():
+        try:
+            yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+            for event in backlog:
+                yield _format_event(event)
+            while not subscription.closed:
+                event = await subscription.get(heartbeat)
+                if event is None:
+                    yield ": ping\n\n"
+                else:
+                    yield _format_event(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,207 @@
+"""
+Listing embeddings and an approximate nearest-neighbour index over them.
+
+Each listing is embedded as a row of the truncated SVD of the (row
+normalised) listing x user interaction matrix, so listings engaged by the
+same people end up close in cosine distance. A user is represented by the
+normalised sum of the embeddings of the listings they interacted with.
+
+LSHIndex is random-hyperplane LSH: every table hashes an embedding to the
+sign pattern of `bits` random projections. A query probes its own bucket
+and the buckets one bit away in every table and re-ranks the union of
+those candidates exactly. Bucket lookups are binary searches over sorted
+codes, so the work per query depends on the bucket sizes (kept around
+TARGET_BUCKET_SIZE by choosing `bits` from the catalog size), not on the
+number of listings. All state is plain numpy arrays, stored in the model
+artifact and memory-mapped by workers.
+
+Incremental model updates do not refit the SVD: listings with new
+interactions are projected onto the stored SVD components
+(project_items) and only their LSH entries are re-hashed
+(LSHIndex.updated). The trainer refits once enough of the catalog has
+been projected since the last fit (EMBEDDING_REFRESH_FRACTION). Only
+small catalogs (EXACT_SEARCH_MAX_ITEMS listings or fewer) skip the index
+and are searched exactly.
+
+`manage.py benchmark_ann` reports recall and latency against exact search.
+"""
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+EMBEDDING_DIM = 32
+LSH_TABLES = 8
+# Average listings per bucket the number of hash bits is chosen for
+TARGET_BUCKET_SIZE = 8
+MIN_BITS, MAX_BITS = 4, 24
+SEED = 42
+
+INDEX_ARRAYS = ('embeddings', 'lsh_planes', 'lsh_codes', 'lsh_order')
+
+
+def item_embeddings(item_user_matrix, dim=EMBEDDING_DIM):
+    """
+    L2-normalised SVD embeddings of the rows of a sparse item x user matrix.
+
+    Returns:
+        (embeddings, components): float32 arrays of shape (items, dim) and
+        (dim, users), or (None, None) if the matrix is too small to
+        factorise. Items without interactions get a zero vector.
+    """
+    dim = min(dim, min(item_user_matrix.shape) - 1)
+    if dim < 1:
+        return None, None
+    rows = normalize(item_user_matrix.astype(np.float32), norm='l2', axis=1)
+    svd = TruncatedSVD(n_components=dim, algorithm='randomized', random_state=SEED)
+    embeddings = svd.fit_transform(rows)
+    return normalize(embeddings, norm='l2', axis=1).astype(np.float32), svd.components_.astype(np.float32)
+
+
+def project_items(item_user_rows, components):
+    """
+    Embed rows of an item x user matrix with the components of an earlier
+    fit (item_embeddings), without refitting. Users that joined after the
+    fit have no component and are ignored.
+    """
+    fitted_users = components.shape[1]
+    rows = item_user_rows.tocsc()[:, :fitted_users] if item_user_rows.shape[1] > fitted_users else item_user_rows
+    rows = normalize(rows.astype(np.float32), norm='l2', axis=1)
+    embeddings = np.asarray(rows @ components.T)
+    return normalize(embeddings, norm='l2', axis=1).astype(np.float32)
+
+
+def user_vector(embeddings, rows, weights=None):
+    """Normalised (weighted) sum of the embeddings of `rows`, or None if it is zero."""
+    vector = embeddings[rows].T @ (np.ones(len(rows), dtype=np.float32) if weights is None else weights)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else None
+
+
+def exact_top_n(embeddings, vector, top_n, exclude_rows=()):
+    """Brute-force cosine top-n over all embeddings (the reference for LSHIndex)."""
+    scores = np.asarray(embeddings @ vector)
+    scores[np.asarray(exclude_rows, dtype=np.int64)] = -np.inf
+    return _best(np.arange(len(scores)), scores, top_n)
+
+
+def _best(rows, scores, top_n):
+    """Rows with positive score, best first, at most top_n."""
+    positive = scores > 0
+    rows, scores = rows[positive], scores[positive]
+    if len(rows) > top_n:
+        keep = np.argpartition(scores, -top_n)[-top_n:]
+        rows, scores = rows[keep], scores[keep]
+    order = np.argsort(-scores, kind='stable')
+    return rows[order], scores[order]
+
+
+class LSHIndex:
+    """
+    Random-hyperplane LSH over unit embeddings.
+
+    Usage:
+        index = LSHIndex.build(embeddings)
+        rows, scores = index.query(vector, top_n=20, exclude_rows=seen)
+    """
+
+    def __init__(self, embeddings, planes, codes, order):
+        self.embeddings = embeddings  # (items, dim)
+        self.planes = planes          # (tables, bits, dim)
+        self.codes = codes            # (tables * items,) sorted (table << bits) | bucket code
+        self.order = order            # (tables * items,) row of each code
+        tables, bits = planes.shape[:2]
+        # Own bucket plus every bucket one bit away, in every table
+        flips = np.concatenate([[0], 1 << np.arange(bits, dtype=np.int64)])
+        self._probe_offsets = flips
+        self._table_offsets = np.arange(tables, dtype=np.int64)[:, None] << bits
+
+    @classmethod
+    def build(cls, embeddings, tables=LSH_TABLES, bits=None, seed=SEED):
+        n_items, dim = embeddings.shape
+        if bits is None:
+            bits = int(np.clip(np.round(np.log2(max(n_items, 1) / TARGET_BUCKET_SIZE)), MIN_BITS, MAX_BITS))
+        planes = np.random.default_rng(seed).standard_normal((tables, bits, dim)).astype(np.float32)
+        # One sorted array for all tables: prefixing the table number keeps
+        # each table's codes in their own range
+        codes = (cls._hash(planes, embeddings) | (np.arange(tables, dtype=np.int64)[:, None] << bits)).ravel()
+        order = np.argsort(codes, kind='stable')
+        rows = np.tile(np.arange(n_items, dtype=np.int32), tables)
+        return cls(embeddings, planes, codes[order], rows[order])
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild an index from arrays() output (e.g. memory-mapped)."""
+        return cls(arrays['embeddings'], arrays['lsh_planes'], arrays['lsh_codes'], arrays['lsh_order'])
+
+    def updated(self, embeddings, rows):
+        """
+        Index over `embeddings` (same row numbering, possibly more rows)
+        in which only `rows` changed: their entries are re-hashed with the
+        same planes and merged into the sorted codes, the rest is reused.
+        """
+        tables, bits = self.planes.shape[:2]
+        rows = np.asarray(rows, dtype=np.int64)
+        changed = np.zeros(len(embeddings), dtype=bool)
+        changed[rows] = True
+        keep = ~changed[self.order]
+        codes, order = self.codes[keep], self.order[keep]
+
+        new_codes = (self._hash(self.planes, embeddings[rows]) | (np.arange(tables, dtype=np.int64)[:, None] << bits)).ravel()
+        new_order = np.tile(rows.astype(np.int32), tables)
+        by_code = np.argsort(new_codes, kind='stable')
+        new_codes, new_order = new_codes[by_code], new_order[by_code]
+        positions = np.searchsorted(codes, new_codes, side='right')
+        return LSHIndex(embeddings, self.planes, np.insert(codes, positions, new_codes), np.insert(order, positions, new_order))
+
+    def reordered(self, order):
+        """The same index with rows permuted: new row i is old row order[i]."""
+        new_row = np.empty(len(order), dtype=np.int32)
+        new_row[order] = np.arange(len(order), dtype=np.int32)
+        return LSHIndex(np.asarray(self.embeddings)[order], self.planes, self.codes, new_row[self.order])
+
+    def arrays(self):
+        return {
+            'embeddings': self.embeddings,
+            'lsh_planes': self.planes,
+            'lsh_codes': self.codes,
+            'lsh_order': self.order,
+        }
+
+    @staticmethod
+    def _hash(planes, vectors):
+        """Bucket code of every vector in every table: (tables, n) int64."""
+        bits = np.einsum('tbd,nd->tnb', planes, vectors) > 0
+        return (bits.astype(np.int64) << np.arange(planes.shape[1], dtype=np.int64)).sum(axis=2)
+
+    def candidates(self, vector):
+        """Rows sharing a bucket (or a bucket one bit away) with `vector` in any table."""
+        query_codes = self._hash(self.planes, vector[None, :])  # (tables, 1)
+        probes = ((query_codes ^ self._probe_offsets) | self._table_offsets).ravel()
+        starts = np.searchsorted(self.codes, probes, side='left')
+        lengths = np.searchsorted(self.codes, probes, side='right') - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        # Expand the (start, length) ranges into positions without a Python loop
+        ends = np.cumsum(lengths)
+        positions = np.arange(total) + np.repeat(starts - (ends - lengths), lengths)
+        # Sort + drop repeats (much cheaper than np.unique for small arrays)
+        rows = np.sort(self.order[positions])
+        return rows[np.concatenate(([True], rows[1:] != rows[:-1]))]
+
+    def query(self, vector, top_n, exclude_rows=()):
+        """
+        Approximate cosine top-n.
+
+        Returns:
+            (rows, scores) best first
+        """
+        rows = self.candidates(vector)
+        if len(exclude_rows) and len(rows):
+            excluded = np.sort(np.asarray(exclude_rows))
+            positions = np.minimum(np.searchsorted(excluded, rows), len(excluded) - 1)
+            rows = rows[excluded[positions] != rows]
+        if len(rows) == 0:
+            return rows, np.empty(0, dtype=np.float32)
+        return _best(rows, np.asarray(self.embeddings[rows] @ vector), top_n)
@@ -9,3 +9,6 @@ class RecommendationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.recommendations'
     verbose_name = 'Recommendations'
+
+    def ready(self):
+        import apps.recommendations.signals
@@ -0,0 +1,191 @@
+"""
+On-disk, versioned storage of the trained similarity model.
+
+`train_ml_recs` writes every trained model to a new version directory
+under RECOMMENDATION_MODEL['ARTIFACT_DIR']:
+
+    <ARTIFACT_DIR>/
+        CURRENT                  name of the live version
+        20261018T120000-1234-a1b2c3/
+            listing_ids.npy      (items,) int64, sorted
+            neighbors.npy        (items, k) int32 rows into listing_ids, -1 padded
+            scores.npy           (items, k) float32
+            embeddings.npy, lsh_*.npy  ANN index (see ann.py)
+            svd_components.npy   SVD fit the embeddings came from (trainer only)
+            meta.json            sizes, array names, checkpoint of the last interaction read
+            interactions.npz     decayed listing x user weights (trainer only)
+            users.npy            user key of each matrix column (trainer only)
+
+Web workers open the arrays with numpy's mmap_mode='r', so the
+neighbour data is shared through the OS page cache (one copy per host, not
+per worker) and never copied into process memory. CURRENT is replaced
+atomically after a version is fully written; workers notice the change
+within CHECK_INTERVAL seconds and swap to the new arrays without a restart.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ARTIFACT_DIR': None,  # defaults to BASE_DIR / 'var' / 'recommendations'
+    'KEEP_VERSIONS': 3,
+    'CHECK_INTERVAL': 30,
+    'HALF_LIFE_DAYS': 180,
+    'MIN_WEIGHT': 0.01,
+    'RETRIEVAL': 'ann',
+    'EMBEDDING_DIM': 32,
+    'LSH_TABLES': 8,
+    'EMBEDDING_REFRESH_FRACTION': 0.2,
+    'EXACT_SEARCH_MAX_ITEMS': 2000,
+}
+
+ARRAYS = ('listing_ids', 'neighbors', 'scores')
+CURRENT_FILE = 'CURRENT'
+
+
+def get_setting(name):
+    """Read a RECOMMENDATION_MODEL setting, falling back to DEFAULTS."""
+    return getattr(settings, 'RECOMMENDATION_MODEL', {}).get(name, DEFAULTS[name])
+
+
+def sort_by_listing_id(listing_ids, neighbors, scores):
+    """
+    Reorder rows by listing id so workers can look rows up with
+    np.searchsorted instead of building an id -> row dict.
+
+    Returns:
+        (listing_ids, neighbors, scores, order) where order maps new rows
+        to old ones, for reordering other per-row data
+    """
+    order = np.argsort(listing_ids, kind='stable')
+    new_row = np.empty_like(order)
+    new_row[order] = np.arange(len(order))
+    neighbors = neighbors[order]
+    neighbors = np.where(neighbors >= 0, new_row[np.maximum(neighbors, 0)], -1).astype(np.int32)
+    return listing_ids[order], neighbors, scores[order], order
+
+
+class ArtifactStore:
+    """
+    Reads and writes model versions in one artifact directory.
+
+    Usage:
+        version = ArtifactStore().save(listing_ids, neighbors, scores)
+        arrays, meta = ArtifactStore().load(ArtifactStore().current_version())
+    """
+
+    def __init__(self, root=None):
+        root = root or get_setting('ARTIFACT_DIR') or Path(settings.BASE_DIR) / 'var' / 'recommendations'
+        self.root = Path(root)
+
+    def current_version(self):
+        """Name of the live version, or None if nothing was published yet."""
+        try:
+            return (self.root / CURRENT_FILE).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def save(self, listing_ids, neighbors, scores, meta=None, state=None, extra=None):
+        """
+        Write a new version and make it current.
+
+        Args:
+            listing_ids: Sorted listing ids (see sort_by_listing_id); every
+                other array is in this row order
+            state: Optional {'matrix': listing x user CSR matrix,
+                'user_keys': [...]} kept for incremental updates
+            extra: Optional {name: array} of additional arrays (e.g. the
+                ANN index), memory-mapped by load() like the others
+
+        Returns:
+            Version name
+        """
+        listing_ids = np.asarray(listing_ids, dtype=np.int64)
+        if len(listing_ids) > 1 and not (np.diff(listing_ids) > 0).all():
+            raise ValueError('listing_ids must be sorted and unique')
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        version = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+        # Write into a temp dir and rename, so a version directory is
+        # either complete or absent
+        staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=self.root))
+        arrays = {'listing_ids': listing_ids, 'neighbors': neighbors, 'scores': scores, **(extra or {})}
+        for name, array in arrays.items():
+            np.save(staging / f'{name}.npy', array)
+        if state is not None:
+            sparse.save_npz(staging / 'interactions.npz', state['matrix'].tocsr())
+            np.save(staging / 'users.npy', np.array(state['user_keys'], dtype=str))
+        (staging / 'meta.json').write_text(json.dumps({
+            **(meta or {}),
+            'arrays': sorted(arrays),
+            'version': version,
+            'items': int(len(listing_ids)),
+            'k': int(neighbors.shape[1]) if neighbors.ndim == 2 else 0,
+            'created_at': time.time(),
+        }))
+        os.replace(staging, self.root / version)
+
+        current_tmp = self.root / f'.{CURRENT_FILE}.{os.getpid()}'
+        current_tmp.write_text(version)
+        os.replace(current_tmp, self.root / CURRENT_FILE)
+
+        self.prune()
+        return version
+
+    def load(self, version):
+        """
+        Memory-map the arrays of a version read-only.
+
+        Returns:
+            ({name: array}, meta)
+        """
+        path = self.root / version
+        meta = json.loads((path / 'meta.json').read_text())
+        arrays = {name: np.load(path / f'{name}.npy', mmap_mode='r') for name in meta.get('arrays', ARRAYS)}
+        return arrays, meta
+
+    def load_state(self, version):
+        """
+        Read the interaction state saved with a version.
+
+        Returns:
+            (matrix, user_keys, meta), or None if the version has no state
+        """
+        path = self.root / version
+        try:
+            matrix = sparse.load_npz(path / 'interactions.npz').tocsr()
+            user_keys = np.load(path / 'users.npy').tolist()
+            meta = json.loads((path / 'meta.json').read_text())
+        except FileNotFoundError:
+            return None
+        return matrix, user_keys, meta
+
+    def versions(self):
+        """Version names, oldest first."""
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and not p.name.startswith('.'))
+
+    def prune(self):
+        """
+        Delete all but the newest KEEP_VERSIONS versions. Workers still
+        mapping a deleted version keep reading it until they swap (the
+        files stay alive while mapped).
+        """
+        current = self.current_version()
+        others = [v for v in self.versions() if v != current]
+        keep = max(get_setting('KEEP_VERSIONS') - 1, 0)
+        for version in others[:max(len(others) - keep, 0)]:
+            shutil.rmtree(self.root / version, ignore_errors=True)
@@ -0,0 +1,125 @@
+"""
+Cache of ranked recommendation results.
+
+RecommendationEngine.get_recommendations() stores the ranked listing ids
+(with scores and reasons, not the listing payloads) of every context for
+RECOMMENDATION_CACHE['TIMEOUT'] seconds:
+
+    recs:user:<id>:<generation>:<model version>:<context>   logged-in users
+    recs:anon:<context>                                      anonymous visitors
+
+where <context> is a hash of the (normalised) city and district. Each entry
+holds the top DEPTH listings, so requests with a smaller limit or with
+exclude_ids are served from the same entry.
+
+Invalidation is selective:
+- Writing a batch of interactions (ingestion.py) bumps the generation of
+  the users in the batch, which orphans all of their entries.
+- Publishing a new model changes the model version in user keys.
+- Deactivating or deleting a listing (signals.py) deletes the entries that
+  contain it, found through a per-listing index of entry keys. Results
+  are also hydrated with is_active=True, so a listing whose index entry
+  was lost (eviction, MAX_KEYS_PER_LISTING) is still never served.
+
+Entries live in Django's default cache. With the default per-process
+LocMemCache invalidations only reach the process that made them, so
+production deployments with several workers should configure a shared
+cache backend.
+"""
+
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from apps.animals.search import fold_turkish
+
+DEFAULTS = {
+    'TIMEOUT': 300,
+    'DEPTH': 50,
+    'MAX_KEYS_PER_LISTING': 500,
+}
+
+
+def get_setting(name):
+    """Read a RECOMMENDATION_CACHE setting, falling back to DEFAULTS."""
+    return getattr(settings, 'RECOMMENDATION_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class RecommendationCache:
+    """
+    Ranked recommendation lists keyed by user or anonymous location context.
+
+    Usage:
+        items = recommendation_cache.get(user, city, district, model_version)
+        recommendation_cache.set(user, city, district, model_version, items)
+        recommendation_cache.invalidate_users([user_id])
+        recommendation_cache.invalidate_listing(listing_id)
+
+    Items are (listing_id, score, reasons) tuples, best first.
+    """
+
+    prefix = 'recs'
+
+    @property
+    def enabled(self):
+        return bool(get_setting('TIMEOUT'))
+
+    def get(self, user, city, district, model_version=None):
+        """Cached items of this context, or None on a miss."""
+        if not self.enabled:
+            return None
+        items = cache.get(self._key(user, city, district, model_version))
+        return [tuple(item) for item in items] if items is not None else None
+
+    def set(self, user, city, district, model_version, items):
+        if not self.enabled:
+            return
+        key = self._key(user, city, district, model_version)
+        timeout = get_setting('TIMEOUT')
+        cache.set(key, [list(item) for item in items], timeout)
+
+        # Remember which entries each listing appears in
+        index_keys = [self._listing_key(item[0]) for item in items]
+        indexes = cache.get_many(index_keys)
+        limit = get_setting('MAX_KEYS_PER_LISTING')
+        cache.set_many({
+            index_key: (indexes.get(index_key, []) + [key])[-limit:]
+            for index_key in index_keys
+        }, timeout)
+
+    def invalidate_users(self, user_ids):
+        """Drop all cached results of these users."""
+        if not self.enabled:
+            return
+        for user_id in set(user_ids):
+            try:
+                cache.incr(self._generation_key(user_id))
+            except ValueError:
+                # No generation yet: entries were cached under 0
+                cache.set(self._generation_key(user_id), 1, None)
+
+    def invalidate_listing(self, listing_id):
+        """Drop every cached result that contains this listing."""
+        if not self.enabled:
+            return
+        index_key = self._listing_key(listing_id)
+        keys = cache.get(index_key)
+        if keys:
+            cache.delete_many(keys + [index_key])
+
+    def _key(self, user, city, district, model_version):
+        context = hashlib.md5('|'.join(
+            fold_turkish(value.strip()) if value else '' for value in (city, district)
+        ).encode()).hexdigest()
+        if user is not None and user.is_authenticated:
+            generation = cache.get(self._generation_key(user.id), 0)
+            return f'{self.prefix}:user:{user.id}:{generation}:{model_version}:{context}'
+        return f'{self.prefix}:anon:{context}'
+
+    def _generation_key(self, user_id):
+        return f'{self.prefix}:user:{user_id}:generation'
+
+    def _listing_key(self, listing_id):
+        return f'{self.prefix}:listing:{listing_id}'
+
+
+recommendation_cache = RecommendationCache()
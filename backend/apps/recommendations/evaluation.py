@@ -0,0 +1,202 @@
+"""
+Synthetic interaction logs and offline evaluation of the recommender.
+
+Used by `manage.py benchmark_recommendations`. Synthetic logs are generated
+with numpy so 10M events fit in a few hundred MB:
+
+- listings belong to one of `clusters` interest groups and have a
+  log-normal popularity
+- each user prefers one group; PREFERENCE_SHARE of their events go to
+  listings of that group, the rest to any listing (by popularity)
+- events are spread uniformly over `days` days and sorted by time
+
+Quality is measured on a time split: the model is trained on the events
+before the cutoff (decayed to the cutoff), and for each user with history
+before and new listings after it, the top-k recommendations computed from
+the pre-cutoff history are compared with the listings they interacted with
+after the cutoff:
+
+- precision@k: hits / k
+- recall@k:    hits / new listings of the user
+- coverage:    distinct recommended listings / listings in the model
+
+A popularity baseline (most interacted listings before the cutoff) is
+evaluated on the same users for comparison.
+"""
+
+import time
+import tracemalloc
+from dataclasses import dataclass
+import numpy as np
+from scipy import sparse
+from .artifacts import get_setting
+from .ml_services import INTERACTION_WEIGHTS
+
+TYPES = ('VIEW', 'FAVORITE', 'PHONE_CLICK', 'WHATSAPP_CLICK')
+TYPE_SHARES = (0.80, 0.10, 0.06, 0.04)
+PREFERENCE_SHARE = 0.8
+
+
+@dataclass
+class SyntheticLog:
+    users: int
+    listings: int
+    user: np.ndarray       # (events,) user index
+    listing: np.ndarray    # (events,) listing index; listing id = index + 1
+    type: np.ndarray       # (events,) index into TYPES
+    timestamp: np.ndarray  # (events,) POSIX seconds, ascending
+
+    def __len__(self):
+        return len(self.user)
+
+
+def generate(events, users, listings, days=180, clusters=None, seed=0, now=None):
+    """Generate a clustered synthetic interaction log (see module docstring)."""
+    rng = np.random.default_rng(seed)
+    clusters = clusters or max(listings // 100, 1)
+    now = now or time.time()
+
+    listing_cluster = rng.integers(0, clusters, listings)
+    popularity = rng.lognormal(0.0, 1.0, listings)
+    # Listings grouped by cluster, with cumulative popularity for sampling
+    by_cluster = np.argsort(listing_cluster, kind='stable')
+    cumulative = np.cumsum(popularity[by_cluster])
+    bounds = np.searchsorted(listing_cluster[by_cluster], np.arange(clusters + 1))
+    cluster_low = np.concatenate(([0.0], cumulative))[bounds[:-1]]
+    cluster_high = np.concatenate(([0.0], cumulative))[bounds[1:]]
+
+    activity = rng.lognormal(0.0, 1.0, users)
+    user = rng.choice(users, size=events, p=activity / activity.sum()).astype(np.int32)
+    preferred = rng.integers(0, clusters, users)[user]
+
+    # Sample by popularity within the preferred cluster, or over all listings
+    in_cluster = rng.random(events) < PREFERENCE_SHARE
+    low = np.where(in_cluster, cluster_low[preferred], 0.0)
+    high = np.where(in_cluster, cluster_high[preferred], cumulative[-1])
+    draw = low + rng.random(events) * (high - low)
+    positions = np.minimum(np.searchsorted(cumulative, draw, side='right'), listings - 1)
+    listing = by_cluster[positions].astype(np.int32)
+
+    interaction_type = rng.choice(len(TYPES), size=events, p=TYPE_SHARES).astype(np.int8)
+    # Timestamps are drawn independently of everything else, so sorting
+    # them alone keeps the events in time order
+    timestamp = np.sort(now - rng.random(events) * days * 86400)
+    return SyntheticLog(users, listings, user, listing, interaction_type, timestamp)
+
+
+def time_split(log, holdout=0.1):
+    """Timestamp before which (1 - holdout) of the events fall."""
+    return float(log.timestamp[int(len(log) * (1 - holdout))]) if len(log) else 0.0
+
+
+def interaction_matrix(log, before):
+    """
+    Decayed listing x user weights of the events before `before`, built the
+    same way as load_interaction_matrix().
+
+    Returns:
+        (listing_ids, matrix): only listings with events get a row
+    """
+    mask = log.timestamp < before
+    weights = np.array([INTERACTION_WEIGHTS.get(name, 1) for name in TYPES], dtype=np.float32)[log.type[mask]]
+    age = np.maximum(before - log.timestamp[mask], 0)
+    weights *= (0.5 ** (age / (get_setting('HALF_LIFE_DAYS') * 86400))).astype(np.float32)
+
+    listings, rows = np.unique(log.listing[mask], return_inverse=True)
+    matrix = sparse.coo_matrix(
+        (weights, (rows, log.user[mask])), shape=(len(listings), log.users)
+    ).tocsr()
+    return listings.astype(np.int64) + 1, matrix
+
+
+def user_listings(log, mask):
+    """Binary user x listing CSR matrix of the masked events."""
+    matrix = sparse.coo_matrix(
+        (np.ones(int(mask.sum()), dtype=np.int8), (log.user[mask], log.listing[mask])),
+        shape=(log.users, log.listings)
+    ).tocsr()
+    matrix.data[:] = 1
+    return matrix
+
+
+def evaluate(model, log, before, k=10, max_users=2000, seed=0):
+    """
+    Offline quality of `model` and of the popularity baseline on the time
+    split at `before`, plus the model's retrieval latency per user.
+
+    Returns:
+        {'users', 'model': {precision, recall, coverage},
+         'popularity': {...}, 'timings_ms': [...]}
+    """
+    train = user_listings(log, log.timestamp < before)
+    test = user_listings(log, log.timestamp >= before)
+    # Only listings the user had not interacted with before count as hits
+    test = (test - test.multiply(train)).tocsr()
+    test.eliminate_zeros()
+
+    candidates = np.flatnonzero((np.diff(train.indptr) > 0) & (np.diff(test.indptr) > 0))
+    if len(candidates) > max_users:
+        candidates = np.sort(np.random.default_rng(seed).choice(candidates, max_users, replace=False))
+
+    popular = np.argsort(-np.asarray(train.sum(axis=0)).ravel(), kind='stable')
+    catalog = max(int(model.current.listing_ids.shape[0]) if model.is_trained else 0, 1)
+    scores = {'model': [], 'popularity': []}
+    recommended = {'model': set(), 'popularity': set()}
+    timings = []
+
+    for user in candidates:
+        history = train.indices[train.indptr[user]:train.indptr[user + 1]]
+        relevant = set(test.indices[test.indptr[user]:test.indptr[user + 1]].tolist())
+
+        started = time.perf_counter()
+        results = model.get_similar_listings((history + 1).tolist(), top_n=k)
+        timings.append((time.perf_counter() - started) * 1000)
+        head = popular[:k + len(history)]
+        ranked = {
+            'model': [item['listing_id'] - 1 for item in results],
+            'popularity': head[~np.isin(head, history)][:k].tolist(),
+        }
+        for name, listings in ranked.items():
+            hits = len(relevant.intersection(listings))
+            scores[name].append((hits / k, hits / len(relevant)))
+            recommended[name].update(listings)
+
+    report = {'users': len(candidates), 'timings_ms': timings}
+    for name, values in scores.items():
+        precision, recall = np.mean(values, axis=0) if values else (0.0, 0.0)
+        report[name] = {
+            'precision': float(precision),
+            'recall': float(recall),
+            'coverage': len(recommended[name]) / catalog,
+        }
+    return report
+
+
+def measure(function, *args, trace_memory=True, **kwargs):
+    """
+    Run function once untraced for wall time, then once under tracemalloc
+    (which slows Python code down) for peak memory.
+
+    Returns:
+        (result, seconds, peak bytes or None)
+    """
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    seconds = time.perf_counter() - started
+    if not trace_memory:
+        return result, seconds, None
+
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def percentiles(timings):
+    """(p50, p99) of timings, or (nan, nan) if there are none."""
+    if not timings:
+        return float('nan'), float('nan')
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
@@ -0,0 +1,238 @@
+"""
+Buffered ingestion of listing interactions.
+
+Interaction events (views, phone/WhatsApp clicks, favorites) are the
+highest-QPS write path. Instead of one INSERT per event inside the
+request, events are queued in a bounded in-process buffer and written with
+bulk_create once INTERACTION_INGESTION['BATCH_SIZE'] events are waiting or
+every FLUSH_INTERVAL seconds.
+
+- Repeated views of a listing by the same user (or anonymous IP) within
+  DEDUP_WINDOW seconds are dropped before they reach the queue.
+- When the queue is full a request first triggers a synchronous flush;
+  events that still don't fit are rejected and counted, and the view
+  answers 429 so clients back off (see InteractionBuffer.metrics()).
+- Events for listings deleted before the flush are discarded.
+- created_at is the flush time, at most FLUSH_INTERVAL after the event.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2,
+    'MAX_QUEUE': 10000,
+    'DEDUP_WINDOW': 300,
+    'MAX_EVENTS_PER_REQUEST': 50,
+}
+
+
+def get_setting(name):
+    """Read an INTERACTION_INGESTION setting, falling back to DEFAULTS."""
+    return getattr(settings, 'INTERACTION_INGESTION', {}).get(name, DEFAULTS[name])
+
+
+@dataclass
+class InteractionEvent:
+    listing_id: int
+    interaction_type: str
+    user_id: int = None
+    ip_address: str = None
+
+    @property
+    def actor(self):
+        return ('u', self.user_id) if self.user_id else ('ip', self.ip_address)
+
+
+@dataclass
+class IngestResult:
+    accepted: int = 0
+    duplicates: int = 0
+    dropped: int = 0
+
+
+class InteractionBuffer:
+    """
+    Bounded queue of interaction events flushed with bulk_create.
+
+    Usage:
+        result = interaction_buffer.add(events)
+        interaction_buffer.metrics()
+    """
+
+    def __init__(self):
+        self._queue = deque()
+        self._recent_views = {}  # (actor, listing_id) -> monotonic time of last accepted view
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stats = {
+            'accepted': 0,
+            'duplicates': 0,
+            'dropped': 0,
+            'written': 0,
+            'discarded': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'last_flush_at': None,
+            'last_flush_ms': None,
+            'last_batch_size': 0,
+        }
+
+    def add(self, events):
+        """
+        Queue events, skipping duplicate views and events that don't fit.
+
+        Returns:
+            IngestResult with accepted/duplicates/dropped counts
+        """
+        from apps.animals.counters import view_counter
+        from .models import ListingInteraction
+
+        result = IngestResult()
+        fresh = []
+        now = time.monotonic()
+        window = get_setting('DEDUP_WINDOW')
+        with self._lock:
+            for event in events:
+                if event.interaction_type == ListingInteraction.VIEW:
+                    key = (event.actor, event.listing_id)
+                    seen_at = self._recent_views.get(key)
+                    if seen_at is not None and now - seen_at < window:
+                        result.duplicates += 1
+                        continue
+                    self._recent_views[key] = now
+                fresh.append(event)
+            self._stats['duplicates'] += result.duplicates
+
+        if len(fresh) > self._free_slots():
+            # Make room before rejecting anything
+            self.flush()
+
+        with self._lock:
+            free = get_setting('MAX_QUEUE') - len(self._queue)
+            accepted, rejected = fresh[:max(free, 0)], fresh[max(free, 0):]
+            self._queue.extend(accepted)
+            for event in rejected:
+                # A rejected view should count again when it is retried
+                self._recent_views.pop((event.actor, event.listing_id), None)
+            result.accepted = len(accepted)
+            result.dropped = len(rejected)
+            self._stats['accepted'] += result.accepted
+            self._stats['dropped'] += result.dropped
+            full = len(self._queue) >= get_setting('BATCH_SIZE')
+
+        for event in accepted:
+            if event.interaction_type == ListingInteraction.VIEW:
+                view_counter.increment(event.listing_id)
+
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+        return result
+
+    def flush(self):
+        """
+        Write all queued events. On failure the events are put back at the
+        front of the queue for the next flush.
+
+        Returns:
+            Number of rows written
+        """
+        from apps.animals.models import AnimalListing
+        from .cache import recommendation_cache
+        from .models import ListingInteraction
+
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._queue)
+                self._queue.clear()
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                existing = set(AnimalListing.objects.filter(
+                    id__in={event.listing_id for event in batch}
+                ).values_list('id', flat=True))
+                rows = [
+                    ListingInteraction(
+                        listing_id=event.listing_id,
+                        interaction_type=event.interaction_type,
+                        user_id=event.user_id,
+                        ip_address=event.ip_address,
+                    )
+                    for event in batch if event.listing_id in existing
+                ]
+                ListingInteraction.objects.bulk_create(rows, batch_size=get_setting('BATCH_SIZE'))
+            except Exception:
+                logger.exception('Writing %d listing interactions failed, retrying later', len(batch))
+                with self._lock:
+                    self._queue.extendleft(reversed(batch))
+                    self._stats['failed_flushes'] += 1
+                return 0
+
+            with self._lock:
+                self._stats['written'] += len(rows)
+                self._stats['discarded'] += len(batch) - len(rows)
+                self._stats['flushes'] += 1
+                self._stats['last_flush_at'] = time.time()
+                self._stats['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 2)
+                self._stats['last_batch_size'] = len(rows)
+                self._prune_recent_views()
+
+            # New interactions change these users' recommendations
+            try:
+                recommendation_cache.invalidate_users(row.user_id for row in rows if row.user_id)
+            except Exception:
+                logger.exception('Invalidating cached recommendations failed')
+            return len(rows)
+
+    def metrics(self):
+        """Counters since process start plus the current queue state."""
+        with self._lock:
+            capacity = get_setting('MAX_QUEUE')
+            return {
+                **self._stats,
+                'queue_depth': len(self._queue),
+                'queue_capacity': capacity,
+                'queue_utilization': round(len(self._queue) / capacity, 4) if capacity else 1.0,
+                'dedup_keys': len(self._recent_views),
+            }
+
+    def _free_slots(self):
+        with self._lock:
+            return get_setting('MAX_QUEUE') - len(self._queue)
+
+    def _prune_recent_views(self):
+        cutoff = time.monotonic() - get_setting('DEDUP_WINDOW')
+        self._recent_views = {key: seen for key, seen in self._recent_views.items() if seen >= cutoff}
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='interaction-ingestion', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(get_setting('FLUSH_INTERVAL'))
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+
+interaction_buffer = InteractionBuffer()
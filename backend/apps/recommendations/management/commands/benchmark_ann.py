@@ -0,0 +1,101 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from apps.recommendations.ann import EMBEDDING_DIM, LSHIndex, exact_top_n, user_vector
+from apps.recommendations.artifacts import get_setting
+from apps.recommendations.ml_services import ml_model
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures recall@n and per-query latency of the LSH index against exact '
+        '(brute-force) cosine search over the listing embeddings. Uses the '
+        'published model, or synthetic clustered embeddings with --items.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=0,
+                            help='Benchmark synthetic embeddings for this many listings instead of the published model')
+        parser.add_argument('--dim', type=int, default=EMBEDDING_DIM, help='Synthetic embedding size')
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--top-n', type=int, default=20)
+        parser.add_argument('--history', type=int, default=5, help='Listings in each query user\'s history')
+        parser.add_argument('--tables', type=int, default=None, help='LSH tables (default: RECOMMENDATION_MODEL setting)')
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        tables = options['tables'] or get_setting('LSH_TABLES')
+
+        if options['items']:
+            embeddings, histories = self.synthetic(rng, options)
+            started = time.perf_counter()
+            index = LSHIndex.build(embeddings, tables=tables)
+            self.stdout.write(f'Built index over {len(embeddings)} synthetic listings in '
+                              f'{(time.perf_counter() - started) * 1000:.0f} ms')
+        else:
+            if not ml_model.is_trained or ml_model.current.index is None:
+                raise CommandError('No published model with an embedding index. Run train_ml_recs or pass --items.')
+            index = ml_model.current.index
+            if options['tables'] and options['tables'] != index.planes.shape[0]:
+                index = LSHIndex.build(np.asarray(index.embeddings), tables=tables)
+            embeddings = index.embeddings
+            active = np.flatnonzero(np.linalg.norm(embeddings, axis=1) > 0)
+            if len(active) < options['history']:
+                raise CommandError('Not enough listings with interactions in the published model.')
+            histories = [rng.choice(active, options['history'], replace=False) for _ in range(options['queries'])]
+            self.stdout.write(f'Published model {ml_model.version}: {len(embeddings)} listings')
+
+        top_n = options['top_n']
+        self.stdout.write(f'{index.planes.shape[0]} tables x {index.planes.shape[1]} bits, '
+                          f'top {top_n}, {len(histories)} queries\n')
+
+        recalls, candidates = [], []
+        exact_ms, ann_ms, neighbor_ms = [], [], []
+        for history in histories:
+            vector = user_vector(embeddings, history)
+            if vector is None:
+                continue
+
+            started = time.perf_counter()
+            exact_rows, _ = exact_top_n(embeddings, vector, top_n, exclude_rows=history)
+            exact_ms.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            ann_rows, _ = index.query(vector, top_n, exclude_rows=history)
+            ann_ms.append((time.perf_counter() - started) * 1000)
+
+            candidates.append(len(index.candidates(vector)))
+            if len(exact_rows):
+                recalls.append(len(np.intersect1d(exact_rows, ann_rows)) / len(exact_rows))
+
+            if not options['items']:
+                started = time.perf_counter()
+                ml_model._neighbor_candidates(ml_model.current, np.asarray(history), np.asarray(history), top_n)
+                neighbor_ms.append((time.perf_counter() - started) * 1000)
+
+        if not recalls:
+            raise CommandError('No query produced results.')
+
+        self.stdout.write(f'recall@{top_n}: {np.mean(recalls):.3f} (min {np.min(recalls):.3f})')
+        self.stdout.write(f'candidates re-ranked per query: {np.mean(candidates):.0f} of {len(embeddings)}')
+        self.stdout.write(f'{"method":<22}{"p50 ms":>10}{"p99 ms":>10}')
+        for name, timings in (('exact (brute force)', exact_ms), ('lsh', ann_ms), ('top-k neighbours', neighbor_ms)):
+            if timings:
+                self.stdout.write(f'{name:<22}{np.percentile(timings, 50):>10.3f}{np.percentile(timings, 99):>10.3f}')
+
+    @staticmethod
+    def synthetic(rng, options):
+        """Clustered unit embeddings and per-query histories drawn from one cluster."""
+        n_items, dim = options['items'], options['dim']
+        n_clusters = max(n_items // 200, 1)
+        centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+        assignment = rng.integers(0, n_clusters, n_items)
+        embeddings = centers[assignment] + 0.6 * rng.standard_normal((n_items, dim)).astype(np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        histories = []
+        for _ in range(options['queries']):
+            members = np.flatnonzero(assignment == rng.integers(0, n_clusters))
+            if len(members) >= options['history']:
+                histories.append(rng.choice(members, options['history'], replace=False))
+        return embeddings, histories
@@ -0,0 +1,153 @@
+import random
+import tempfile
+import time
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.animals.models import AnimalListing
+from apps.recommendations import evaluation
+from apps.recommendations.artifacts import ArtifactStore
+from apps.recommendations.ml_services import TOP_K, CollaborativeFilteringModel
+from apps.recommendations.models import ListingInteraction
+from apps.recommendations.services import RecommendationEngine
+
+User = get_user_model()
+
+BENCHMARK_USER_DOMAIN = 'benchmark.kurbanlink.local'
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the recommender on a synthetic interaction log: training wall '
+        'time and peak memory, retrieval p50/p99 latency, and precision@k, recall@k '
+        'and coverage on a time-split holdout against a popularity baseline. '
+        'With --database the log is also written to the database to time '
+        'train_model() and RecommendationEngine.get_recommendations() end to end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100000, help='Synthetic interactions (10k - 10M)')
+        parser.add_argument('--users', type=int, default=None, help='Default: events / 20')
+        parser.add_argument('--listings', type=int, default=None, help='Default: events / 50')
+        parser.add_argument('--days', type=int, default=180, help='Time span of the log')
+        parser.add_argument('--holdout', type=float, default=0.1, help='Share of the newest events held out')
+        parser.add_argument('--k', type=int, default=10, help='Cut-off of precision/recall@k')
+        parser.add_argument('--top-k', type=int, default=TOP_K, help='Neighbours kept per listing')
+        parser.add_argument('--eval-users', type=int, default=2000, help='Users sampled for quality metrics')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--skip-memory', action='store_true',
+                            help='Skip the second, tracemalloc-instrumented training run')
+        parser.add_argument('--database', action='store_true',
+                            help='Also write the log to the database (benchmark users on existing active '
+                                 'listings) and benchmark train_model() and get_recommendations()')
+        parser.add_argument('--queries', type=int, default=200, help='get_recommendations() calls with --database')
+        parser.add_argument('--cleanup', action='store_true', help='Delete benchmark users and their interactions and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            users = User.objects.filter(email__endswith=f'@{BENCHMARK_USER_DOMAIN}')
+            interactions, _ = ListingInteraction.objects.filter(user__in=users).delete()
+            deleted, _ = users.delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {interactions} interactions and {deleted} benchmark rows.'))
+            return
+
+        events = options['events']
+        users = options['users'] or max(events // 20, 1)
+        listings = options['listings'] or max(events // 50, 1)
+        if options['database']:
+            active = AnimalListing.objects.filter(is_active=True).count()
+            if active < 2:
+                raise CommandError('Not enough active listings. Seed some with benchmark_listing_filters --listings N.')
+            if listings > active:
+                self.stdout.write(self.style.WARNING(f'Only {active} active listings, using --listings {active}.'))
+                listings = active
+
+        started = time.perf_counter()
+        log = evaluation.generate(events, users, listings, days=options['days'], seed=options['seed'])
+        before = evaluation.time_split(log, options['holdout'])
+        self.stdout.write(f'{events} events, {users} users, {listings} listings over {options["days"]} days '
+                          f'(generated in {time.perf_counter() - started:.1f}s), '
+                          f'holdout: newest {options["holdout"]:.0%}\n')
+
+        listing_ids, matrix = evaluation.interaction_matrix(log, before)
+        model = CollaborativeFilteringModel(store=ArtifactStore(tempfile.mkdtemp(prefix='kurbanlink-bench-')))
+        _, seconds, peak = evaluation.measure(
+            model.fit, listing_ids, matrix, k=options['top_k'], trace_memory=not options['skip_memory']
+        )
+        self.stdout.write(f'Training on {matrix.nnz} listing/user pairs: {seconds:.2f}s'
+                          + (f', peak {peak / 2 ** 20:.0f} MB traced' if peak is not None else ''))
+
+        report = evaluation.evaluate(model, log, before, k=options['k'],
+                                     max_users=options['eval_users'], seed=options['seed'])
+        p50, p99 = evaluation.percentiles(report['timings_ms'])
+        self.stdout.write(f'Retrieval (get_similar_listings): p50 {p50:.3f} ms, p99 {p99:.3f} ms\n')
+
+        k = options['k']
+        self.stdout.write(f'Quality on {report["users"]} users with new listings after the split')
+        self.stdout.write(f'{"method":<14}{f"precision@{k}":>14}{f"recall@{k}":>12}{"coverage":>10}')
+        for name in ('model', 'popularity'):
+            metrics = report[name]
+            self.stdout.write(f'{name:<14}{metrics["precision"]:>14.4f}{metrics["recall"]:>12.4f}'
+                              f'{metrics["coverage"]:>10.3f}')
+
+        if options['database']:
+            self.benchmark_database(log, before, options)
+
+    def benchmark_database(self, log, before, options):
+        """Time train_model() and get_recommendations() on the log written to the database."""
+        self.stdout.write('')
+        user_ids, listing_ids = self.seed(log, before)
+
+        model = CollaborativeFilteringModel(store=ArtifactStore(tempfile.mkdtemp(prefix='kurbanlink-bench-')))
+        _, seconds, peak = evaluation.measure(model.train_model, publish=False,
+                                              trace_memory=not options['skip_memory'])
+        self.stdout.write(f'train_model() on all interactions in the database: {seconds:.2f}s'
+                          + (f', peak {peak / 2 ** 20:.0f} MB traced' if peak is not None else ''))
+
+        engine = RecommendationEngine(model=model)
+        sample = random.Random(options['seed']).sample(user_ids, min(options['queries'], len(user_ids)))
+        timings = []
+        for user in User.objects.filter(id__in=sample):
+            started = time.perf_counter()
+            engine.get_recommendations(user=user, limit=20, use_cache=False)
+            timings.append((time.perf_counter() - started) * 1000)
+        p50, p99 = evaluation.percentiles(timings)
+        self.stdout.write(f'get_recommendations(): p50 {p50:.1f} ms, p99 {p99:.1f} ms over {len(timings)} users')
+        self.stdout.write('Remove the benchmark data with --cleanup.')
+
+    def seed(self, log, before):
+        """
+        Write the pre-split events as interactions of benchmark users on
+        existing active listings. created_at is the insert time (auto_now_add).
+
+        Returns:
+            (user ids, listing ids)
+        """
+        listing_ids = np.array(list(
+            AnimalListing.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)[:log.listings]
+        ), dtype=np.int64)
+        run = int(time.time())
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(email=f'user{i}-{run}@{BENCHMARK_USER_DOMAIN}', is_active=True)
+                for i in range(log.users)
+            ], batch_size=BATCH_SIZE)
+            user_ids = np.array(list(User.objects.filter(
+                email__endswith=f'-{run}@{BENCHMARK_USER_DOMAIN}'
+            ).order_by('id').values_list('id', flat=True)), dtype=np.int64)
+
+            mask = log.timestamp < before
+            users, listings, types = user_ids[log.user[mask]], listing_ids[log.listing[mask]], log.type[mask]
+            for start in range(0, len(users), BATCH_SIZE):
+                ListingInteraction.objects.bulk_create([
+                    ListingInteraction(user_id=user, listing_id=listing, interaction_type=evaluation.TYPES[kind])
+                    for user, listing, kind in zip(
+                        users[start:start + BATCH_SIZE].tolist(),
+                        listings[start:start + BATCH_SIZE].tolist(),
+                        types[start:start + BATCH_SIZE].tolist(),
+                    )
+                ])
+        self.stdout.write(self.style.SUCCESS(f'Seeded {len(user_ids)} users and {len(users)} interactions.'))
+        return user_ids.tolist(), listing_ids
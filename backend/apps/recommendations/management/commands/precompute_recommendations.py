@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.recommendations.precompute import get_setting, precompute
+
+
+class Command(BaseCommand):
+    help = (
+        'Precomputes ANIMAL, SELLER and BUTCHER recommendations of recently active '
+        'users into the Recommendation table (see apps/recommendations/precompute.py)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, nargs='+', help='Only these user ids (default: recently active users)')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (1 = in process)')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Users per chunk')
+        parser.add_argument('--top-n', type=int, default=None, help='Recommendations kept per user and type')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] if options['workers'] is not None else get_setting('WORKERS')
+        self.stdout.write(self.style.NOTICE(f'Precomputing recommendations with {workers} worker(s)...'))
+        started = time.perf_counter()
+        users, rows = precompute(
+            user_ids=options['users'],
+            workers=workers,
+            chunk_size=options['chunk_size'],
+            top_n=options['top_n'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {rows} recommendations for {users} users in {time.perf_counter() - started:.1f}s.'
+        ))
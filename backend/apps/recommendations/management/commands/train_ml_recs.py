@@ -1,15 +1,34 @@
 from django.core.management.base import BaseCommand
-from apps.recommendations.ml_services import ml_model
+from apps.recommendations.ml_services import TOP_K, ml_model
 
 class Command(BaseCommand):
-    help = 'Trains the Machine Learning Collaborative Filtering model for recommendations'
+    help = 'Trains the Machine Learning Collaborative Filtering model for recommendations and publishes it to the artifact store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K, help='Neighbours kept per listing (full training)')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only apply interactions logged since the published model (full training if none)')
 
     def handle(self, *args, **options):
+        if options['incremental']:
+            self.stdout.write(self.style.NOTICE('Updating ML model incrementally...'))
+            updated = ml_model.update_model()
+            if updated is None:
+                self.stdout.write(self.style.WARNING('No published model to update, ran a full training.'))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Recomputed neighbours of {updated} listings. Current version: {ml_model.version}.'
+                ))
+            return
+
         self.stdout.write(self.style.NOTICE('Starting ML model training...'))
         
-        success = ml_model.train_model()
+        success = ml_model.train_model(k=options['top_k'])
         
         if success:
-            self.stdout.write(self.style.SUCCESS(f'Successfully trained ML model. Matrix shape: {ml_model.item_similarity_df.shape}'))
+            self.stdout.write(self.style.SUCCESS(
+                f'Successfully trained ML model version {ml_model.version}. {len(ml_model.listing_ids)} listings, '
+                f'top {ml_model.neighbors.shape[1]} neighbours each, stored in {ml_model.store.root}.'
+            ))
         else:
             self.stdout.write(self.style.WARNING('ML model training completed, but no data was processed or an error occurred.'))
@@ -1,137 +1,545 @@
 import logging
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from django.db.models import Count
-from apps.recommendations.models import ListingInteraction
+import threading
+import time
+from array import array
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from django.utils import timezone
 from apps.animals.models import AnimalListing
+from apps.recommendations.ann import (
+    INDEX_ARRAYS, LSHIndex, exact_top_n, item_embeddings, project_items, user_vector
+)
+from apps.recommendations.artifacts import ArtifactStore, get_setting, sort_by_listing_id
+from apps.recommendations.models import ListingInteraction
 
 logger = logging.getLogger(__name__)
 
+# Implicit feedback weight of each interaction type
+INTERACTION_WEIGHTS = {
+    ListingInteraction.VIEW: 1,
+    ListingInteraction.FAVORITE: 3,
+    ListingInteraction.PHONE_CLICK: 5,
+    ListingInteraction.WHATSAPP_CLICK: 5
+}
+
+# Neighbours kept per listing
+TOP_K = 50
+# Listings whose similarity rows are computed together; bounds the size of
+# the intermediate sparse product
+BLOCK_SIZE = 512
+# Rows fetched per database round trip while streaming interactions
+CHUNK_SIZE = 5000
+
+LoadedModel = namedtuple('LoadedModel', ['version', 'listing_ids', 'neighbors', 'scores', 'index'])
+
+
+def prune_weights(matrix):
+    """Drop weights decayed below MIN_WEIGHT, so fully faded history stops costing memory."""
+    matrix = matrix.tocsr()
+    matrix.data[matrix.data < get_setting('MIN_WEIGHT')] = 0
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def decay_factor(seconds):
+    """Weight left after `seconds` with a half-life of HALF_LIFE_DAYS."""
+    return 0.5 ** (max(seconds, 0) / (get_setting('HALF_LIFE_DAYS') * 86400))
+
+
+def load_interaction_matrix(listings=None, users=None, after_id=0, now=None):
+    """
+    Stream interactions into a sparse listing x user weight matrix.
+
+    Anonymous users are identified by IP. Repeated interactions of a user
+    with a listing are summed, each decayed by its age at `now` (see
+    decay_factor), so old seasons count less than recent ones.
+
+    Args:
+        listings: {listing id: row} to extend, for adding to an existing matrix
+        users: {user key: column} to extend
+        after_id: Only read interactions with a larger id (incremental runs)
+        now: Time the weights are decayed to (default: now)
+
+    Returns:
+        (matrix, last_id): CSR matrix of shape (len(listings), len(users))
+        holding only the interactions read, and the largest id read
+    """
+    listings = {} if listings is None else listings
+    users = {} if users is None else users
+    now = now or timezone.now()
+    rows, cols, weights = array('l'), array('l'), array('f')
+    last_id = after_id
+
+    interactions = ListingInteraction.objects.filter(
+        id__gt=after_id, listing__is_active=True
+    ).values_list('id', 'user_id', 'ip_address', 'listing_id', 'interaction_type', 'created_at').order_by()
+
+    for pk, user_id, ip_address, listing_id, interaction_type, created_at in interactions.iterator(chunk_size=CHUNK_SIZE):
+        last_id = max(last_id, pk)
+        # Treat anonymous IPs and logged-in users equally
+        if user_id is not None:
+            user_key = f'u:{user_id}'
+        elif ip_address:
+            user_key = f'ip:{ip_address}'
+        else:
+            continue
+        rows.append(listings.setdefault(listing_id, len(listings)))
+        cols.append(users.setdefault(user_key, len(users)))
+        weights.append(INTERACTION_WEIGHTS.get(interaction_type, 1) * decay_factor((now - created_at).total_seconds()))
+
+    matrix = sparse.coo_matrix(
+        (np.frombuffer(weights, dtype=np.float32), (np.frombuffer(rows, dtype=np.int64), np.frombuffer(cols, dtype=np.int64))),
+        shape=(len(listings), len(users))
+    ).tocsr()  # sums duplicate (listing, user) entries
+    return matrix, last_id
+
+
+def similarity_blocks(item_user_matrix, rows=None, block_size=BLOCK_SIZE):
+    """
+    Yield (rows, similarities) for blocks of rows of an item x user matrix,
+    where similarities is a CSR matrix of cosine similarities of those rows
+    against every item (self-similarity removed).
+
+    Each block is one sparse product, so memory is bounded by the
+    non-zeros of one block's rows, never items x items.
+    """
+    normalized = normalize(item_user_matrix.astype(np.float32), norm='l2', axis=1, copy=True).tocsr()
+    transposed = normalized.T.tocsc()
+    rows = np.arange(item_user_matrix.shape[0]) if rows is None else np.asarray(rows)
+
+    for start in range(0, len(rows), block_size):
+        block_rows = rows[start:start + block_size]
+        block = (normalized[block_rows] @ transposed).tocoo()
+        # A listing is not its own neighbour
+        keep = (block.col != block_rows[block.row]) & (block.data > 0)
+        block = sparse.csr_matrix(
+            (block.data[keep], (block.row[keep], block.col[keep])), shape=block.shape
+        )
+        yield block_rows, block
+
+
+def top_k_neighbors(item_user_matrix, k=TOP_K, rows=None, block_size=BLOCK_SIZE):
+    """
+    Cosine top-k neighbours of rows of a sparse item x user matrix
+    (all rows by default).
+
+    Memory is bounded by one similarity block plus the (rows x k) result.
+
+    Returns:
+        (neighbors, scores): int32 and float32 arrays of shape (rows, k),
+        best first; slots without a neighbour hold -1 and 0.0
+    """
+    n_rows = item_user_matrix.shape[0] if rows is None else len(rows)
+    neighbors = np.full((n_rows, k), -1, dtype=np.int32)
+    scores = np.zeros((n_rows, k), dtype=np.float32)
+
+    position = 0
+    for block_rows, block in similarity_blocks(item_user_matrix, rows, block_size):
+        for offset in range(len(block_rows)):
+            row_start, row_end = block.indptr[offset], block.indptr[offset + 1]
+            columns, values = _top_k(block.indices[row_start:row_end], block.data[row_start:row_end], k)
+            neighbors[position + offset, :len(columns)] = columns
+            scores[position + offset, :len(columns)] = values
+        position += len(block_rows)
+
+    return neighbors, scores
+
+
+def _top_k(columns, values, k):
+    """The k largest values (and their columns), best first."""
+    if len(values) > k:
+        keep = np.argpartition(values, -k)[-k:]
+        columns, values = columns[keep], values[keep]
+    order = np.argsort(-values, kind='stable')
+    return columns[order], values[order]
+
+
 class CollaborativeFilteringModel:
     """
     ML Service for generating recommendations using Item-Based Collaborative Filtering.
+
+    Only the TOP_K most similar listings of each listing are kept, so the
+    model takes O(listings x k) memory. Trained models are published to the
+    ArtifactStore; every process memory-maps the current version and
+    switches to newer ones as they appear (see artifacts.py).
     """
-    
-    def __init__(self):
-        self.item_similarity_df = None
-        self.is_trained = False
 
-    def train_model(self):
+    def __init__(self, store=None):
+        self.store = store or ArtifactStore()
+        # Swapped as a whole so readers always see arrays of one version
+        self.current = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_trained(self):
+        self.refresh()
+        return self.current is not None
+
+    @property
+    def version(self):
+        return self.current.version if self.is_trained else None
+
+    @property
+    def listing_ids(self):
+        return self.current.listing_ids if self.is_trained else None
+
+    @property
+    def neighbors(self):
+        return self.current.neighbors if self.is_trained else None
+
+    @property
+    def scores(self):
+        return self.current.scores if self.is_trained else None
+
+    def train_model(self, k=TOP_K, publish=True):
         """
-        Loads user interaction data and builds an item-item cosine similarity matrix.
+        Loads user interaction data and builds the item-item top-k cosine neighbours.
         Should be called periodically (e.g., via a Celery task or cron job).
+
+        With publish=True the result is saved as the new current artifact
+        version, which web workers pick up without a restart, together with
+        the interaction matrix that update_model() continues from.
         """
         logger.info("Starting Collaborative Filtering model training...")
-        
-        # 1. Fetch relevant interactions (Views, Favorites, Phone clicks, WhatsApp clicks)
-        interactions = ListingInteraction.objects.filter(
-            listing__is_active=True
-        ).values('user_id', 'ip_address', 'listing_id', 'interaction_type')
 
-        if not interactions:
+        now = timezone.now()
+        listings, users = {}, {}
+        matrix, last_id = load_interaction_matrix(listings, users, now=now)
+        if not listings:
             logger.warning("No interactions found to train the model.")
-            self.is_trained = False
             return False
 
-        # Convert to Pandas DataFrame
-        df = pd.DataFrame(list(interactions))
-        
-        # Create a unified 'user_identifier' treating anonymous IPs and logged-in users equally
-        df['user_identifier'] = df['user_id'].fillna(df['ip_address'])
-        
-        # Drop rows where we can't identify the user at all
-        df = df.dropna(subset=['user_identifier'])
-
-        if df.empty:
-            logger.warning("No valid user identifiers found in interactions.")
-            self.is_trained = False
-            return False
-
-        # 2. Map interaction types to numerical weights (implicit feedback)
-        interaction_weights = {
-            ListingInteraction.VIEW: 1,
-            ListingInteraction.FAVORITE: 3,
-            ListingInteraction.PHONE_CLICK: 5,
-            ListingInteraction.WHATSAPP_CLICK: 5
-        }
-        df['weight'] = df['interaction_type'].map(interaction_weights)
-
-        # 3. Create User-Item Interaction Matrix
-        # Group by user and listing, summing weights if a user interacted multiple times
-        user_item_grouped = df.groupby(['user_identifier', 'listing_id'])['weight'].sum().reset_index()
-        
-        # Pivot into matrix (Rows: Users, Columns: Listings, Values: Weights)
-        user_item_matrix = user_item_grouped.pivot(
-            index='user_identifier', 
-            columns='listing_id', 
-            values='weight'
-        ).fillna(0)
-
-        # 4. Compute Item-Item Cosine Similarity Matrix
-        # Transpose matrix so rows are items (Listings)
-        item_user_matrix = user_item_matrix.T
-        
-        # Calculate cosine similarity between items
-        # If two items were viewed/interacted by the same users, their similarity score will be high (~1.0)
-        similarity_matrix = cosine_similarity(item_user_matrix)
-        
-        # Convert back to DataFrame with listing IDs as index/columns for easy lookup
-        self.item_similarity_df = pd.DataFrame(
-            similarity_matrix, 
-            index=user_item_matrix.columns, 
-            columns=user_item_matrix.columns
+        matrix = prune_weights(matrix)
+        listing_ids = np.fromiter(listings, dtype=np.int64, count=len(listings))
+        neighbors, scores = top_k_neighbors(matrix, k=k)
+        if publish:
+            self._publish(listing_ids, neighbors, scores, matrix, users, last_id, now, mode='full')
+        else:
+            arrays, _ = self._prepare(listing_ids, neighbors, scores, matrix)
+            self.load(arrays)
+        logger.info(
+            f"Model trained successfully. {len(listing_ids)} listings, {matrix.shape[1]} users, "
+            f"{matrix.nnz} interactions, k={k}"
         )
-        
-        self.is_trained = True
-        logger.info(f"Model trained successfully. Matrix shape: {self.item_similarity_df.shape}")
         return True
 
+    def fit(self, listing_ids, matrix, k=TOP_K):
+        """
+        Train from an in-memory listing x user weight matrix without
+        publishing (benchmarks and offline evaluation).
+
+        Args:
+            listing_ids: Listing id of each matrix row
+            matrix: Sparse (decayed) weights, as built by load_interaction_matrix
+        """
+        matrix = prune_weights(matrix)
+        neighbors, scores = top_k_neighbors(matrix, k=k)
+        arrays, _ = self._prepare(np.asarray(listing_ids, dtype=np.int64), neighbors, scores, matrix)
+        self.load(arrays)
+
+    def update_model(self):
+        """
+        Incrementally update the published model with interactions logged
+        since its checkpoint.
+
+        The stored matrix is decayed by the time elapsed since the
+        checkpoint and the new (decayed) interactions are added. Neighbour
+        lists are recomputed exactly for listings with new interactions
+        (or deactivated since), and those listings' new similarities are
+        merged into the lists of all other listings. A list that loses one
+        of its members is not backfilled from outside the list; the
+        periodic full train_model() restores exact lists.
+
+        The same listings are projected onto the published SVD fit and
+        re-hashed into the ANN index (see _update_index); the embeddings
+        are refitted only once EMBEDDING_REFRESH_FRACTION of the catalog
+        has been projected since the last fit.
+
+        Falls back to train_model() if there is no published state.
+
+        Returns:
+            Number of listings whose neighbours were recomputed, or None
+            after a full retrain
+        """
+        version = self.store.current_version()
+        state = self.store.load_state(version) if version else None
+        if state is None:
+            logger.info("No published model state, running a full training")
+            self.train_model()
+            return None
+
+        matrix, user_keys, meta = state
+        arrays, _ = self.store.load(version)
+        listing_ids = np.array(arrays['listing_ids'])
+        neighbors, scores = np.array(arrays['neighbors']), np.array(arrays['scores'])
+        k = neighbors.shape[1]
+
+        now = timezone.now()
+        checkpoint_at = datetime.fromtimestamp(meta['checkpoint_at'], tz=dt_timezone.utc)
+        listings = {int(listing_id): row for row, listing_id in enumerate(listing_ids)}
+        users = {key: column for column, key in enumerate(user_keys)}
+        delta, last_id = load_interaction_matrix(listings, users, after_id=meta['checkpoint_id'], now=now)
+
+        # Listings deactivated or deleted since the checkpoint
+        active = np.isin(listing_ids, np.fromiter(
+            AnimalListing.objects.filter(is_active=True).values_list('id', flat=True).iterator(), dtype=np.int64
+        ))
+        inactive_rows = np.flatnonzero(~active & (np.diff(matrix.indptr) > 0))
+
+        # Grow to the new listings/users, decay the old weights, add the new ones
+        n_items, n_users = len(listings), len(users)
+        matrix = sparse.csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=matrix.shape)
+        matrix.resize((n_items, n_users))
+        matrix = matrix * decay_factor((now - checkpoint_at).total_seconds()) + delta
+        keep = np.ones(n_items, dtype=np.float32)
+        keep[inactive_rows] = 0
+        matrix = prune_weights(sparse.diags(keep) @ matrix)
+
+        grown = n_items - len(listing_ids)
+        listing_ids = np.concatenate([listing_ids, np.fromiter(list(listings)[len(listing_ids):], dtype=np.int64, count=grown)])
+        neighbors = np.vstack([neighbors, np.full((grown, k), -1, dtype=np.int32)])
+        scores = np.vstack([scores, np.zeros((grown, k), dtype=np.float32)])
+
+        affected = np.union1d(np.unique(delta.nonzero()[0]), inactive_rows).astype(np.int64)
+        if len(affected) == 0:
+            logger.info("No new interactions since the last checkpoint")
+            return 0
+
+        self._merge_neighbors(matrix, affected, neighbors, scores)
+        index, components, projected = self._update_index(arrays, meta, matrix, affected)
+        self._publish(
+            listing_ids, neighbors, scores, matrix, users, last_id, now, mode='incremental',
+            index=index, components=components, projected=projected
+        )
+        logger.info(
+            f"Model updated incrementally: {len(affected)} listings recomputed, {delta.nnz} new interactions, "
+            f"embeddings {'projected' if index is not None else 'refitted'}"
+        )
+        return len(affected)
+
+    @staticmethod
+    def _update_index(arrays, meta, matrix, affected):
+        """
+        Patch the published ANN index for the `affected` rows (new listings
+        included, rows in the published order): project them onto the
+        stored SVD components and re-hash only their LSH entries.
+
+        Returns:
+            (index, components, projected items since the last fit), or
+            (None, None, 0) when the embeddings should be refitted: no
+            published index, or EMBEDDING_REFRESH_FRACTION reached
+        """
+        if not all(name in arrays for name in (*INDEX_ARRAYS, 'svd_components')):
+            return None, None, 0
+        projected = meta.get('projected_items', 0) + len(affected)
+        if projected > get_setting('EMBEDDING_REFRESH_FRACTION') * matrix.shape[0]:
+            return None, None, 0
+
+        components = np.asarray(arrays['svd_components'])
+        published = LSHIndex.from_arrays(arrays)
+        embeddings = np.zeros((matrix.shape[0], published.embeddings.shape[1]), dtype=np.float32)
+        embeddings[:len(published.embeddings)] = published.embeddings
+        embeddings[affected] = project_items(matrix[affected], components)
+        return published.updated(embeddings, affected), components, projected
+
+    @staticmethod
+    def _merge_neighbors(matrix, affected, neighbors, scores):
+        """Recompute the lists of `affected` rows and fold their new similarities into all other lists (in place)."""
+        k = neighbors.shape[1]
+        is_affected = np.zeros(len(neighbors), dtype=bool)
+        is_affected[affected] = True
+
+        # Entries pointing at affected rows are stale everywhere
+        stale = (neighbors >= 0) & is_affected[np.maximum(neighbors, 0)]
+        neighbors[stale], scores[stale] = -1, 0
+
+        candidates = {}  # unaffected row -> [(affected row, similarity)]
+        for block_rows, block in similarity_blocks(matrix, affected):
+            for offset, row in enumerate(block_rows):
+                row_start, row_end = block.indptr[offset], block.indptr[offset + 1]
+                columns, values = block.indices[row_start:row_end], block.data[row_start:row_end]
+                top_columns, top_values = _top_k(columns, values, k)
+                neighbors[row], scores[row] = -1, 0
+                neighbors[row, :len(top_columns)], scores[row, :len(top_columns)] = top_columns, top_values
+                # Similarity is symmetric: offer `row` to the lists of its neighbours
+                for column, value in zip(columns.tolist(), values.tolist()):
+                    if not is_affected[column]:
+                        candidates.setdefault(column, []).append((row, value))
+
+        for row, offered in candidates.items():
+            present = neighbors[row] >= 0
+            columns = np.concatenate([neighbors[row][present], np.array([c for c, _ in offered], dtype=np.int32)])
+            values = np.concatenate([scores[row][present], np.array([v for _, v in offered], dtype=np.float32)])
+            columns, values = _top_k(columns, values, k)
+            neighbors[row], scores[row] = -1, 0
+            neighbors[row, :len(columns)], scores[row, :len(columns)] = columns, values
+
+        # Close the gaps left by removed entries
+        order = np.argsort(-scores, axis=1, kind='stable')
+        neighbors[:] = np.take_along_axis(neighbors, order, axis=1)
+        scores[:] = np.take_along_axis(scores, order, axis=1)
+
+    @staticmethod
+    def _prepare(listing_ids, neighbors, scores, matrix, index=None, components=None):
+        """
+        Sort rows by listing id and attach the embedding ANN index.
+
+        Without `index` the embeddings are fitted and the index is built
+        from scratch; incremental updates pass the index they patched (rows
+        in the unsorted order) and the SVD components it was fitted with.
+
+        Returns:
+            ({name: array} as stored in the artifact, sorted matrix)
+        """
+        listing_ids, neighbors, scores, order = sort_by_listing_id(listing_ids, neighbors, scores)
+        matrix = matrix[order]
+        arrays = {'listing_ids': listing_ids, 'neighbors': neighbors, 'scores': scores}
+        if index is None:
+            embeddings, components = item_embeddings(matrix, dim=get_setting('EMBEDDING_DIM'))
+            if embeddings is not None:
+                index = LSHIndex.build(embeddings, tables=get_setting('LSH_TABLES'))
+        else:
+            index = index.reordered(order)
+        if index is not None:
+            arrays.update(index.arrays(), svd_components=components)
+        return arrays, matrix
+
+    def _publish(self, listing_ids, neighbors, scores, matrix, users, last_id, now, mode,
+                 index=None, components=None, projected=0):
+        arrays, matrix = self._prepare(listing_ids, neighbors, scores, matrix, index, components)
+        version = self.store.save(
+            arrays.pop('listing_ids'), arrays.pop('neighbors'), arrays.pop('scores'),
+            meta={
+                'mode': mode,
+                'users': int(matrix.shape[1]),
+                'interactions': int(matrix.nnz),
+                'checkpoint_id': int(last_id),
+                'checkpoint_at': now.timestamp(),
+                'projected_items': int(projected),
+            },
+            state={'matrix': matrix, 'user_keys': list(users)},
+            extra=arrays,
+        )
+        self.refresh(force=True)
+        logger.info(f"Published model version {version}")
+
+    def load(self, arrays, version=None):
+        """Install model arrays (rows sorted by listing id), as stored in an artifact."""
+        index = LSHIndex.from_arrays(arrays) if all(name in arrays for name in INDEX_ARRAYS) else None
+        self.current = LoadedModel(
+            version=version,
+            listing_ids=arrays['listing_ids'],
+            neighbors=arrays['neighbors'],
+            scores=arrays['scores'],
+            index=index,
+        )
+
+    def refresh(self, force=False):
+        """
+        Switch to the current artifact version if it changed. Checks the
+        store at most every CHECK_INTERVAL seconds unless forced.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < get_setting('CHECK_INTERVAL'):
+            return
+        with self._lock:
+            self._checked_at = now
+            version = self.store.current_version()
+            # Not self.version: it refreshes, and self._lock is not reentrant
+            loaded = self.current.version if self.current else None
+            if version is None or version == loaded:
+                return
+            try:
+                arrays, meta = self.store.load(version)
+            except (OSError, ValueError):
+                logger.exception(f"Could not load recommendation model version {version}")
+                return
+            self.load(arrays, version=version)
+            logger.info(f"Loaded recommendation model version {version} ({meta.get('items')} listings)")
+
+    @staticmethod
+    def _rows(listing_ids, listing_index):
+        """Rows of the given listing ids that exist in the model."""
+        ids = np.fromiter(listing_ids, dtype=np.int64)
+        if len(ids) == 0 or len(listing_index) == 0:
+            return np.empty(0, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(listing_index, ids), len(listing_index) - 1)
+        return rows[listing_index[rows] == ids]
+
     def get_similar_listings(self, interacted_listing_ids, top_n=20, exclude_ids=None):
         """
         Given a list of listing IDs a user interacted with, returns recommended listing IDs based on ML.
-        
+
+        Uses the embedding ANN index when RECOMMENDATION_MODEL['RETRIEVAL']
+        is 'ann' and the model has one, the top-k neighbour lists otherwise.
+        Either way the cost depends on the history length, not the catalog
+        size.
+
         Args:
             interacted_listing_ids (list): IDs of listings the user has viewed/liked.
             top_n (int): Number of recommendations to return.
             exclude_ids (list): IDs to exclude from recommendations.
-            
+
         Returns:
             list: List of dictionaries with 'listing_id' and 'ml_score'
         """
-        if not self.is_trained or self.item_similarity_df is None:
+        if not self.is_trained:
             return []
-            
+
         if exclude_ids is None:
             exclude_ids = []
 
-        # Filter out interacted_ids that aren't in our trained matrix
-        valid_ids = [lid for lid in interacted_listing_ids if lid in self.item_similarity_df.columns]
-        
-        if not valid_ids:
+        # Read one consistent version even if a swap happens meanwhile
+        model = self.current
+
+        # Filter out interacted_ids that aren't in our trained model
+        rows = self._rows(interacted_listing_ids, model.listing_ids)
+
+        if len(rows) == 0:
             return []
 
-        # Sum the similarity scores across all items the user has interacted with
-        # This provides a ranked list of items similar to the ones the user liked
-        summed_similarities = self.item_similarity_df[valid_ids].sum(axis=1)
-
-        # Remove items the user has already interacted with or excluded intentionally
-        items_to_drop = set(interacted_listing_ids + exclude_ids)
-        items_in_matrix = set(summed_similarities.index)
-        drop_list = list(items_to_drop.intersection(items_in_matrix))
-        
-        recommendations = summed_similarities.drop(index=drop_list)
-        
-        # Sort descending and get top N
-        top_recommendations = recommendations.sort_values(ascending=False).head(top_n)
-        
-        # Format output
-        results = [
-            {'listing_id': int(idx), 'ml_score': float(score)} 
-            for idx, score in top_recommendations.items() 
-            if score > 0
+        # Items the user has already interacted with or excluded intentionally
+        drop_rows = self._rows(set(interacted_listing_ids) | set(exclude_ids), model.listing_ids)
+
+        if model.index is not None and get_setting('RETRIEVAL') == 'ann':
+            candidates, summed = self._ann_candidates(model, rows, drop_rows, top_n)
+        else:
+            candidates, summed = self._neighbor_candidates(model, rows, drop_rows, top_n)
+
+        return [
+            {'listing_id': int(model.listing_ids[row]), 'ml_score': float(score)}
+            for row, score in zip(candidates, summed)
         ]
-        
-        return results
 
-# Singleton instance to be used across the app (ideally, state should be cached in Redis for production)
+    @staticmethod
+    def _ann_candidates(model, rows, drop_rows, top_n):
+        """Nearest listings to the user's embedding (exact search for small catalogs)."""
+        vector = user_vector(model.index.embeddings, rows)
+        if vector is None:
+            return [], []
+        if len(model.listing_ids) <= get_setting('EXACT_SEARCH_MAX_ITEMS'):
+            return exact_top_n(model.index.embeddings, vector, top_n, exclude_rows=drop_rows)
+        return model.index.query(vector, top_n, exclude_rows=drop_rows)
+
+    @staticmethod
+    def _neighbor_candidates(model, rows, drop_rows, top_n):
+        """Sum the similarity scores of the neighbours of every item the user has interacted with."""
+        neighbor_rows = np.asarray(model.neighbors[rows]).ravel()
+        neighbor_scores = np.asarray(model.scores[rows]).ravel()
+        valid = (neighbor_rows >= 0) & ~np.isin(neighbor_rows, drop_rows)
+        candidates, inverse = np.unique(neighbor_rows[valid], return_inverse=True)
+        summed = np.bincount(inverse, weights=neighbor_scores[valid], minlength=len(candidates))
+        keep = summed > 0
+        candidates, summed = candidates[keep], summed[keep]
+        if len(candidates) > top_n:
+            best = np.argpartition(summed, -top_n)[-top_n:]
+            candidates, summed = candidates[best], summed[best]
+        order = np.argsort(-summed, kind='stable')
+        return candidates[order], summed[order]
+
+# Singleton instance to be used across the app; loads the published model lazily
 ml_model = CollaborativeFilteringModel()
@@ -10,8 +10,9 @@ class Recommendation(models.Model):
     """
     Represents a recommendation for a user.
     
-    Recommendations are immutable once created.
-    Based on rule-based/heuristic logic (not ML).
+    Rows are materialised offline by `manage.py precompute_recommendations`
+    (see precompute.py); each run upserts a user's rows and deletes the
+    ones it did not refresh. created_at is the time of the last refresh.
     """
     
     # Recommendation types
@@ -0,0 +1,199 @@
+"""
+Offline materialisation of recommendations into the Recommendation table.
+
+`manage.py precompute_recommendations` ranks, for every user active in the
+last ACTIVE_DAYS days (logged in or logged an interaction):
+
+- ANIMAL:  the top TOP_N listings of RecommendationEngine.rank_listings()
+- SELLER:  sellers of those listings, scored by the sum of their listings'
+           scores over a deeper ranking (SELLER_POOL listings)
+- BUTCHER: active butchers, by rating and location match
+
+Users are processed in chunks of CHUNK_SIZE across a pool of WORKERS
+processes. Workers only read and rank; the parent writes each chunk with a
+bulk upsert on the unique_recommendation constraint and then deletes the
+chunk's rows that were not refreshed in this run.
+
+Authenticated users with precomputed ANIMAL rows get them from
+ListingRecommendationViewSet; the online engine serves anonymous and
+cold-start users (and requests for another location).
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+import django
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ACTIVE_DAYS': 30,
+    'TOP_N': 50,
+    'SELLER_POOL': 200,
+    'CHUNK_SIZE': 200,
+    'WORKERS': 4,
+}
+
+# Weights of the butcher score (rating is 0-5)
+BUTCHER_WEIGHTS = {
+    'rating': 0.50,
+    'location_city': 0.30,
+    'location_district': 0.15,
+}
+TOP_RATED = 4.5
+
+
+def get_setting(name):
+    """Read a RECOMMENDATION_PRECOMPUTE setting, falling back to DEFAULTS."""
+    return getattr(settings, 'RECOMMENDATION_PRECOMPUTE', {}).get(name, DEFAULTS[name])
+
+
+def active_user_ids(days=None):
+    """Ids of active users who logged in or interacted in the last `days` days."""
+    from apps.accounts.models import User
+    from .models import ListingInteraction
+
+    since = timezone.now() - timedelta(days=days or get_setting('ACTIVE_DAYS'))
+    interacted = ListingInteraction.objects.filter(
+        created_at__gte=since, user__isnull=False
+    ).values('user_id')
+    return list(User.objects.filter(is_active=True).filter(
+        Q(last_login__gte=since) | Q(id__in=interacted)
+    ).order_by('id').values_list('id', flat=True))
+
+
+def compute_recommendations(user_ids, top_n=None):
+    """
+    Rank listings, sellers and butchers for each user.
+
+    Returns:
+        list of (user_id, type, object_id, score, reason) rows
+    """
+    from apps.accounts.models import User
+    from apps.animals.models import AnimalListing
+    from apps.animals.search import fold_turkish
+    from apps.butchers.models import ButcherProfile
+    from .models import Recommendation
+    from .services import RecommendationEngine
+
+    top_n = top_n or get_setting('TOP_N')
+    engine = RecommendationEngine()
+    butchers = [
+        (butcher.id, butcher.user_id, fold_turkish(butcher.city.strip()),
+         fold_turkish(butcher.district.strip()), butcher.rating)
+        for butcher in ButcherProfile.objects.filter(is_active=True).only('id', 'user_id', 'city', 'district', 'rating')
+    ]
+
+    rows = []
+    for user in User.objects.filter(id__in=user_ids, is_active=True):
+        ranked = engine.rank_listings(user, user.city, user.district, max(top_n, get_setting('SELLER_POOL')))
+        rows += [
+            (user.id, Recommendation.ANIMAL, listing_id, score, ','.join(reasons))
+            for listing_id, score, reasons in ranked[:top_n]
+        ]
+
+        sellers = dict(AnimalListing.objects.filter(
+            id__in=[item[0] for item in ranked]
+        ).values_list('id', 'seller_id'))
+        seller_scores = {}
+        for listing_id, score, _ in ranked:
+            seller_id = sellers.get(listing_id)
+            if seller_id is not None:
+                seller_scores[seller_id] = seller_scores.get(seller_id, 0.0) + score
+        rows += [
+            (user.id, Recommendation.SELLER, seller_id, score, 'RECOMMENDED_LISTINGS')
+            for seller_id, score in sorted(seller_scores.items(), key=lambda item: -item[1])[:top_n]
+        ]
+
+        rows += _rank_butchers(user, butchers, fold_turkish(user.city.strip()),
+                               fold_turkish(user.district.strip()), top_n)
+    return rows
+
+
+def _rank_butchers(user, butchers, city, district, top_n):
+    from .models import Recommendation
+
+    w = BUTCHER_WEIGHTS
+    scored = []
+    for butcher_id, butcher_user_id, butcher_city, butcher_district, rating in butchers:
+        if butcher_user_id == user.id:
+            continue
+        score = min(max(rating, 0.0), 5.0) / 5.0 * w['rating']
+        reasons = []
+        if city and butcher_city == city:
+            score += w['location_city']
+            reasons.append('SAME_CITY')
+            if district and butcher_district == district:
+                score += w['location_district']
+                reasons.append('SAME_DISTRICT')
+        if rating >= TOP_RATED:
+            reasons.append('TOP_RATED')
+        scored.append((user.id, Recommendation.BUTCHER, butcher_id, score, ','.join(reasons)))
+    scored.sort(key=lambda row: -row[3])
+    return scored[:top_n]
+
+
+def save_recommendations(user_ids, rows, started_at):
+    """
+    Upsert one chunk's rows and delete the chunk users' rows that were not
+    refreshed since started_at.
+    """
+    from .models import Recommendation
+
+    now = timezone.now()
+    objects = [
+        Recommendation(user_id=user_id, type=type_, object_id=object_id,
+                       score=score, reason=reason[:255], created_at=now)
+        for user_id, type_, object_id, score, reason in rows
+    ]
+    with transaction.atomic():
+        Recommendation.objects.bulk_create(
+            objects,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'type', 'object_id'],
+            update_fields=['score', 'reason', 'created_at'],
+        )
+        Recommendation.objects.filter(user_id__in=user_ids, created_at__lt=started_at).delete()
+    return len(objects)
+
+
+def precompute(user_ids=None, workers=None, chunk_size=None, top_n=None, log=None):
+    """
+    Materialise recommendations for `user_ids` (default: active_user_ids()).
+
+    Returns:
+        (users, rows) written
+    """
+    user_ids = active_user_ids() if user_ids is None else list(user_ids)
+    workers = get_setting('WORKERS') if workers is None else workers
+    chunk_size = chunk_size or get_setting('CHUNK_SIZE')
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+    started_at = timezone.now()
+
+    written = 0
+    if workers > 1 and len(chunks) > 1:
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = pool.map(compute_recommendations, chunks, [top_n] * len(chunks))
+            for done, (chunk, rows) in enumerate(zip(chunks, results), 1):
+                written += save_recommendations(chunk, rows, started_at)
+                if log:
+                    log(f'{done}/{len(chunks)} chunks, {written} rows')
+    else:
+        for done, chunk in enumerate(chunks, 1):
+            written += save_recommendations(chunk, compute_recommendations(chunk, top_n), started_at)
+            if log:
+                log(f'{done}/{len(chunks)} chunks, {written} rows')
+    return len(user_ids), written
+
+
+def _init_worker():
+    # Needed with the 'spawn' start method (macOS, Windows); no-op after fork
+    django.setup()
+    connections.close_all()
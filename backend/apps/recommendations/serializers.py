@@ -16,11 +16,12 @@ class RecommendationSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Recommendation
-        fields = ['id', 'user', 'animal', 'animal_details', 'score', 'reason', 'created_at']
-        read_only_fields = ['id', 'user', 'score', 'reason', 'created_at']
+        fields = ['id', 'user', 'type', 'object_id', 'score', 'reason', 'created_at']
+        read_only_fields = fields
         labels = {
             'user': 'Kullanıcı',
-            'animal': 'Önerilen İlan',
+            'type': 'Öneri Türü',
+            'object_id': 'Önerilen Kayıt',
             'score': 'Puan',
             'reason': 'Öneri Nedeni',
             'created_at': 'Oluşturulma Tarihi'
@@ -38,6 +39,31 @@ class ListingInteractionSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at']
 
 
+class InteractionEventSerializer(serializers.Serializer):
+    """
+    One interaction event in an ingestion batch.
+    
+    The listing is not looked up here; events for unknown listings are
+    discarded when the batch is written.
+    """
+    listing = serializers.IntegerField(min_value=1)
+    interaction_type = serializers.ChoiceField(choices=ListingInteraction.INTERACTION_CHOICES)
+
+
+class InteractionBatchSerializer(serializers.Serializer):
+    """
+    Batch of interaction events: { events: [{ listing, interaction_type }, ...] }.
+    """
+    events = serializers.ListField(child=InteractionEventSerializer(), allow_empty=False)
+    
+    def validate_events(self, value):
+        from .ingestion import get_setting
+        limit = get_setting('MAX_EVENTS_PER_REQUEST')
+        if len(value) > limit:
+            raise serializers.ValidationError(f"Bir istekte en fazla {limit} etkileşim gönderilebilir.")
+        return value
+
+
 class RecommendedListingSerializer(serializers.Serializer):
     """
     Serializer for dynamic recommendations (calculated on the fly).
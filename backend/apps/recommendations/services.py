@@ -1,9 +1,13 @@
 import logging
 from datetime import timedelta
-from django.db.models import Q, F, Count, Avg
+import numpy as np
+from django.db.models import Q, Count, Avg
 from django.utils import timezone
 from apps.animals.models import AnimalListing
+from apps.animals.search import fold_turkish
 from apps.accounts.models import User
+from .cache import get_setting as get_cache_setting, recommendation_cache
+from .ingestion import InteractionEvent, interaction_buffer
 from .models import ListingInteraction
 from .ml_services import ml_model
 
@@ -15,7 +19,9 @@ class RecommendationEngine:
     Deterministic and explainable ranking for MVP.
     """
     
-    def __init__(self):
+    def __init__(self, model=None):
+        # Collaborative filtering model (default: the published one)
+        self.ml_model = model or ml_model
         self.weights = {
             'location_city': 0.30,
             'location_district': 0.15,
@@ -25,10 +31,15 @@ class RecommendationEngine:
             'diversity_penalty': 0.10,
             'ml_similarity': 0.80  # High weight for AI matches
         }
+        # Listings scored per request; only the final `limit` are loaded as models
+        self.candidate_pool = 2000
 
-    def get_recommendations(self, user=None, city=None, district=None, limit=20, exclude_ids=None):
+    def get_recommendations(self, user=None, city=None, district=None, limit=20, exclude_ids=None, use_cache=True):
         """
         Main entry point for retrieving recommended listings.
+        
+        Ranked ids are cached per user / location context (see cache.py);
+        listings are loaded in one query from the ranked ids.
         """
         if exclude_ids is None:
             exclude_ids = []
@@ -47,6 +58,30 @@ class RecommendationEngine:
             except AttributeError:
                 pass
         
+        depth = get_cache_setting('DEPTH')
+        if not use_cache or not recommendation_cache.enabled or limit > depth:
+            return self.hydrate(self.rank_listings(user, target_city, target_district, limit, exclude_ids))
+        
+        model_version = self.ml_model.version if user and user.is_authenticated else None
+        ranked = recommendation_cache.get(user, target_city, target_district, model_version)
+        if ranked is None:
+            ranked = self.rank_listings(user, target_city, target_district, depth)
+            recommendation_cache.set(user, target_city, target_district, model_version, ranked)
+        
+        excluded = set(exclude_ids)
+        results = self.hydrate([item for item in ranked if item[0] not in excluded][:limit])
+        if len(results) < limit and len(ranked) == depth:
+            # Exclusions or deactivated listings used up the cached depth
+            return self.hydrate(self.rank_listings(user, target_city, target_district, limit, exclude_ids))
+        return results
+
+    def rank_listings(self, user, target_city, target_district, limit, exclude_ids=()):
+        """
+        Rank candidate listings for a user / location without loading them.
+        
+        Returns:
+            list of (listing_id, score, reasons), best first
+        """
         # 2. Get User Interactions for ML
         user_interacted_ids = []
         user_identifier = user.id if user and user.is_authenticated else None
@@ -60,36 +95,51 @@ class RecommendationEngine:
             
         # Get ML Suggestions
         ml_suggestions = {}
-        if ml_model.is_trained and user_interacted_ids:
-            ml_results = ml_model.get_similar_listings(user_interacted_ids, top_n=50, exclude_ids=exclude_ids)
+        if self.ml_model.is_trained and user_interacted_ids:
+            ml_results = self.ml_model.get_similar_listings(user_interacted_ids, top_n=50, exclude_ids=list(exclude_ids))
             ml_suggestions = {item['listing_id']: item['ml_score'] for item in ml_results}
 
-        # 3. Candidate Generation
+        # 3. Candidate Generation (columns only)
         candidates = self._generate_candidates(user, target_city, exclude_ids, list(ml_suggestions.keys()))
+        if not len(candidates['id']):
+            return []
         
-        # 4. Scoring
-        scored_listings = []
-        for listing in candidates:
-            ml_score = ml_suggestions.get(listing.id, 0.0)
-            score, reasons = self._score_listing(listing, user, target_city, target_district, ml_score)
-            scored_listings.append({
+        # 4. Scoring, diversity and top-k selection on arrays
+        rows, scores = self._rank(candidates, target_city, target_district, ml_suggestions, limit)
+        return [
+            (listing_id, float(score), self._reasons(candidates, row))
+            for row, listing_id, score in zip(rows, candidates['id'][rows].tolist(), scores)
+        ]
+
+    def hydrate(self, ranked):
+        """
+        Load the listings of (listing_id, score, reasons) items in one query.
+        Listings deactivated since ranking are skipped and their cached
+        results dropped.
+        """
+        listings = AnimalListing.objects.filter(is_active=True).select_related(
+            'seller', 'primary_image'
+        ).in_bulk([item[0] for item in ranked])
+        results = []
+        for listing_id, score, reasons in ranked:
+            listing = listings.get(listing_id)
+            if listing is None:
+                recommendation_cache.invalidate_listing(listing_id)
+                continue
+            results.append({
                 'listing': listing,
                 'score': score,
                 'reasons': reasons
             })
-            
-        # 5. Sorting & Re-ranking (Diversity)
-        # Sort by score desc
-        scored_listings.sort(key=lambda x: x['score'], reverse=True)
-        
-        # Apply diversity penalty (simple version: reduce score if seller appeared recently)
-        final_list = self._apply_diversity(scored_listings)
-        
-        return final_list[:limit]
+        return results
 
     def _generate_candidates(self, user, target_city, exclude_ids, ml_candidate_ids):
         """
-        Fetch active listings to be scored.
+        Fetch the columns needed for scoring of active candidate listings.
+        
+        Returns:
+            dict of numpy arrays: id, seller_id, city, district, created_at
+            (POSIX seconds), view_count
         """
         # Base filter: Active listings only
         queryset = AnimalListing.objects.filter(is_active=True)
@@ -101,111 +151,121 @@ class RecommendationEngine:
         # Exclude own listings
         if user and user.is_authenticated:
             queryset = queryset.exclude(seller=user)
-            
-        # If we have ML candidates, make sure they are included.
-        # Fallback to city/recent if ML candidates don't fill the pool.
-        q_conditions = Q()
-        if ml_candidate_ids:
-            q_conditions |= Q(id__in=ml_candidate_ids)
-            
+        
+        # Same city OR recent listings
         if target_city:
-            # Priority: Same city OR Recent
-            q_conditions |= Q(city__iexact=target_city) | Q(created_at__gte=timezone.now() - timedelta(days=30))
+            pool = Q(city_normalized=fold_turkish(target_city.strip())) | Q(created_at__gte=timezone.now() - timedelta(days=30))
         else:
             # No location context: just recent listings
-            q_conditions |= Q(created_at__gte=timezone.now() - timedelta(days=60))
-            
-        queryset = queryset.filter(q_conditions)
-            
-        # Limit candidate pool size for performance (score max 200 items)
-        return queryset.select_related('seller').order_by('-created_at')[:200]
+            pool = Q(created_at__gte=timezone.now() - timedelta(days=60))
+        
+        columns = ('id', 'seller_id', 'city_normalized', 'district_normalized', 'created_at', 'view_count')
+        rows = list(queryset.filter(pool).order_by('-created_at').values_list(*columns)[:self.candidate_pool])
+        
+        # ML candidates are always scored, even outside the pool
+        if ml_candidate_ids:
+            seen = {row[0] for row in rows}
+            missing = [listing_id for listing_id in ml_candidate_ids if listing_id not in seen]
+            if missing:
+                rows += list(queryset.filter(id__in=missing).values_list(*columns))
+        
+        ids, sellers, cities, districts, created, views = zip(*rows) if rows else ([],) * 6
+        return {
+            'id': np.array(ids, dtype=np.int64),
+            'seller_id': np.array(sellers, dtype=np.int64),
+            'city': np.array(cities, dtype=object),
+            'district': np.array(districts, dtype=object),
+            'created_at': np.fromiter((value.timestamp() for value in created), dtype=np.float64, count=len(created)),
+            'view_count': np.array(views, dtype=np.float64),
+        }
 
-    def _score_listing(self, listing, user, target_city, target_district, ml_score=0.0):
+    def _rank(self, candidates, target_city, target_district, ml_suggestions, limit):
         """
-        Calculate score for a single listing.
-        Returns (score, reasons_list)
+        Score all candidates at once, penalize repeated sellers and select
+        the top `limit`.
+        
+        Score = ml_score * ml_similarity
+              + location_city (+ location_district)
+              + recency (created in the last 7 days)
+              + min(views / 100, 1) * popularity
+        A seller's n-th listing in score order loses n * diversity_penalty
+        (clamped at 0).
+        
+        Returns:
+            (rows, scores) of the selected candidates, best first
         """
-        score = 0.0
-        reasons = []
+        n = len(candidates['id'])
+        w = self.weights
         
-        # 1. AI/ML Suggestion (Collaborative Filtering)
-        if ml_score > 0:
-            score += ml_score * self.weights['ml_similarity']
-            reasons.append('AI_RECOMMENDED')
+        ml_ids = np.fromiter(ml_suggestions.keys(), dtype=np.int64, count=len(ml_suggestions))
+        ml_scores = np.fromiter(ml_suggestions.values(), dtype=np.float64, count=len(ml_suggestions))
+        candidates['ml_score'] = np.zeros(n)
+        if len(ml_ids):
+            order = np.argsort(ml_ids)
+            positions = np.minimum(np.searchsorted(ml_ids[order], candidates['id']), len(ml_ids) - 1)
+            found = ml_ids[order][positions] == candidates['id']
+            candidates['ml_score'][found] = ml_scores[order][positions[found]]
+        
+        candidates['same_city'] = np.zeros(n, dtype=bool)
+        candidates['same_district'] = np.zeros(n, dtype=bool)
+        if target_city:
+            candidates['same_city'] = candidates['city'] == fold_turkish(target_city.strip())
+            if target_district:
+                candidates['same_district'] = candidates['same_city'] & (
+                    candidates['district'] == fold_turkish(target_district.strip())
+                )
+        candidates['new'] = candidates['created_at'] >= (timezone.now() - timedelta(days=7)).timestamp()
+        candidates['popularity'] = np.minimum(candidates['view_count'] / 100.0, 1.0) * w['popularity']
+        
+        scores = (
+            candidates['ml_score'] * w['ml_similarity']
+            + candidates['same_city'] * w['location_city']
+            + candidates['same_district'] * w['location_district']
+            + candidates['new'] * w['recency']
+            + candidates['popularity']
+        )
+        
+        # Diversity: how many higher-scored listings the same seller already has
+        by_score = np.argsort(-scores, kind='stable')
+        sellers = candidates['seller_id'][by_score]
+        by_seller = np.argsort(sellers, kind='stable')
+        grouped = sellers[by_seller]
+        group_start = np.maximum.accumulate(np.where(
+            np.concatenate(([True], grouped[1:] != grouped[:-1])), np.arange(n), 0
+        ))
+        earlier = np.empty(n, dtype=np.int64)
+        earlier[by_seller] = np.arange(n) - group_start
+        adjusted = np.maximum(scores[by_score] - w['diversity_penalty'] * earlier, 0.0)
+        
+        # Top `limit` by adjusted score; ties keep the original score order,
+        # so a shorter list is always a prefix of a longer one
+        positions = np.lexsort((np.arange(n), -adjusted))[:limit]
+        return by_score[positions], adjusted[positions]
 
-        # 2. Location Match
-        if target_city and listing.city and listing.city.lower() == target_city.lower():
-            score += self.weights['location_city']
+    def _reasons(self, candidates, row):
+        """Explanation codes of one scored candidate."""
+        reasons = []
+        if candidates['ml_score'][row] > 0:
+            reasons.append('AI_RECOMMENDED')
+        if candidates['same_city'][row]:
             reasons.append('SAME_CITY')
-            
-            if target_district and listing.district and listing.district.lower() == target_district.lower():
-                score += self.weights['location_district']
+            if candidates['same_district'][row]:
                 reasons.append('SAME_DISTRICT')
-
-        # 2. Recency (New Listing)
-        # Is created in last 7 days?
-        if listing.created_at >= timezone.now() - timedelta(days=7):
-            score += self.weights['recency']
+        if candidates['new'][row]:
             reasons.append('NEW_LISTING')
-            
-        # 3. Popularity (View Count)
-        # Simple normalization: cap at 100 views -> max boost
-        views = listing.view_count
-        popularity_boost = min(views / 100.0, 1.0) * self.weights['popularity']
-        if popularity_boost > 0.05: # Threshold to mention
-            score += popularity_boost
+        if candidates['popularity'][row] > 0.05:  # Threshold to mention
             reasons.append('POPULAR')
-        else:
-            score += popularity_boost
-
-        # 4. Price Match (Placeholder for MVP)
-        # If we had user history, we would compare price.
-        # For now, neutral.
-        
-        return score, reasons
-
-    def _apply_diversity(self, scored_listings):
-        """
-        Penalize consecutive listings from same seller.
-        """
-        seller_counts = {}
-        adjusted_list = []
-        
-        for item in scored_listings:
-            seller_id = item['listing'].seller_id
-            count = seller_counts.get(seller_id, 0)
-            
-            if count > 0:
-                # Penalty for subsequent listings from same seller
-                penalty = self.weights['diversity_penalty'] * count
-                item['score'] -= penalty
-                # Clamp at 0
-                item['score'] = max(0.0, item['score'])
-            
-            seller_counts[seller_id] = count + 1
-            adjusted_list.append(item)
-            
-        # Re-sort after penalties
-        adjusted_list.sort(key=lambda x: x['score'], reverse=True)
-        return adjusted_list
+        return reasons
 
     def log_interaction(self, user, listing_id, interaction_type, ip_address=None):
         """
         Log user interaction.
+        
+        The event is queued and written in a batch (see ingestion.py).
         """
-        try:
-            listing = AnimalListing.objects.get(id=listing_id)
-            ListingInteraction.objects.create(
-                user=user if user and user.is_authenticated else None,
-                listing=listing,
-                interaction_type=interaction_type,
-                ip_address=ip_address
-            )
-            
-            # Update view count directly on listing for simple tracking
-            if interaction_type == ListingInteraction.VIEW:
-                listing.view_count = F('view_count') + 1
-                listing.save(update_fields=['view_count'])
-                
-        except AnimalListing.DoesNotExist:
-            pass
+        interaction_buffer.add([InteractionEvent(
+            listing_id=listing_id,
+            interaction_type=interaction_type,
+            user_id=user.id if user and user.is_authenticated else None,
+            ip_address=ip_address
+        )])
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.animals.models import AnimalListing
+from .cache import recommendation_cache
+
+
+@receiver(post_save, sender=AnimalListing)
+def drop_cached_recommendations_on_deactivate(sender, instance, **kwargs):
+    """
+    Stop serving cached recommendations that contain a deactivated listing.
+    """
+    if not instance.is_active:
+        recommendation_cache.invalidate_listing(instance.pk)
+
+
+@receiver(post_delete, sender=AnimalListing)
+def drop_cached_recommendations_on_delete(sender, instance, **kwargs):
+    """
+    Stop serving cached recommendations that contain a deleted listing.
+    """
+    recommendation_cache.invalidate_listing(instance.pk)
@@ -8,16 +8,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .models import Recommendation
 from .serializers import RecommendationSerializer
-from .models import Recommendation
-from .serializers import RecommendationSerializer
 
 
 class RecommendationViewSet(viewsets.ReadOnlyModelViewSet):
     """
-    ViewSet for recommendations.
+    ViewSet for precomputed recommendations (see precompute.py).
     
-    - LIST: Get all user's recommendations
-    - generate: Custom action to generate new recommendations
+    - LIST: Get all user's recommendations (?type=ANIMAL|SELLER|BUTCHER)
+    - generate: Custom action to recompute the user's recommendations now
     """
     
     serializer_class = RecommendationSerializer
@@ -30,23 +28,35 @@ class RecommendationViewSet(viewsets.ReadOnlyModelViewSet):
         Returns:
             QuerySet of user's recommendations ordered by score and created_at
         """
-        return Recommendation.objects.filter(user=self.request.user)
+        queryset = Recommendation.objects.filter(user=self.request.user)
+        rec_type = self.request.query_params.get('type')
+        if rec_type:
+            queryset = queryset.filter(type=rec_type.upper())
+        return queryset.order_by('-score', '-created_at')
     
     @action(detail=False, methods=['post'])
     def generate(self, request):
         """
-        Generate new recommendations (Legacy/Stub).
+        Recompute the authenticated user's recommendations synchronously.
         """
+        from django.utils import timezone
+        from .precompute import compute_recommendations, save_recommendations
+        
+        started_at = timezone.now()
+        rows = compute_recommendations([request.user.id])
+        count = save_recommendations([request.user.id], rows, started_at)
+        serializer = self.get_serializer(self.get_queryset(), many=True)
         return Response({
-            'count': 0,
-            'recommendations': []
+            'count': count,
+            'recommendations': serializer.data
         })
 
 
 class ListingRecommendationViewSet(viewsets.ViewSet):
     """
     ViewSet for dynamic "Animal Listing" recommendations.
-    Calculated on-the-fly based on rules.
+    Calculated on-the-fly based on rules; ranked ids are cached per user
+    and location context (see cache.py).
     """
     permission_classes = [permissions.AllowAny] # Allow anon
     
@@ -77,13 +87,18 @@ class ListingRecommendationViewSet(viewsets.ViewSet):
                 pass
             
         engine = RecommendationEngine()
-        results = engine.get_recommendations(
-            user=request.user,
-            city=city,
-            district=district,
-            limit=limit,
-            exclude_ids=exclude_ids
-        )
+        results = []
+        if request.user.is_authenticated and not city and not district:
+            # Precomputed rows; the engine covers cold-start users
+            results = self._precomputed(engine, request.user, limit, exclude_ids)
+        if len(results) < limit:
+            results = engine.get_recommendations(
+                user=request.user,
+                city=city,
+                district=district,
+                limit=limit,
+                exclude_ids=exclude_ids
+            )
         
         # Serialize
         serializer = RecommendedListingSerializer(results, many=True)
@@ -91,44 +106,87 @@ class ListingRecommendationViewSet(viewsets.ViewSet):
             'items': serializer.data
         })
 
+    def _precomputed(self, engine, user, limit, exclude_ids):
+        """
+        The user's precomputed ANIMAL recommendations as engine results.
+        """
+        excluded = set(exclude_ids)
+        rows = Recommendation.objects.filter(
+            user=user, type=Recommendation.ANIMAL
+        ).order_by('-score', '-created_at').values_list('object_id', 'score', 'reason')[:limit + len(excluded)]
+        ranked = [
+            (listing_id, score, reason.split(',') if reason else [])
+            for listing_id, score, reason in rows if listing_id not in excluded
+        ]
+        return engine.hydrate(ranked[:limit])
+
 
 class ListingInteractionViewSet(viewsets.ViewSet):
     """
     ViewSet for logging interactions (clicks/views).
+    
+    Events are queued and written in batches (see ingestion.py).
     """
     permission_classes = [permissions.AllowAny]
     
+    def get_permissions(self):
+        if self.action == 'metrics':
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+    
     def create(self, request):
         """
         POST /api/recommendations/interactions/
         Body: { listing: ID, interaction_type: 'VIEW'|... }
+           or { events: [{ listing, interaction_type }, ...] }
+        
+        Returns 202 with accepted/duplicates/dropped counts, or 429 if the
+        queue is full and nothing was accepted.
         """
-        from .serializers import ListingInteractionSerializer
-        from .services import RecommendationEngine
+        from .ingestion import InteractionEvent, interaction_buffer
+        from .serializers import InteractionBatchSerializer
         
-        serializer = ListingInteractionSerializer(data=request.data)
-        if serializer.is_valid():
-            # Log it via Engine (handles logic like update view count)
-            engine = RecommendationEngine()
-            
-            # Since serializer only validates fields, we manually extract needed data
-            # Or assume serializer.validated_data is correct
-            listing = serializer.validated_data['listing']
-            interaction_type = serializer.validated_data['interaction_type']
-            
-            # Get IP for anon users
-            x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-            if x_forwarded_for:
-                ip = x_forwarded_for.split(',')[0]
-            else:
-                ip = request.META.get('REMOTE_ADDR')
-                
-            engine.log_interaction(
-                user=request.user,
-                listing_id=listing.id,
-                interaction_type=interaction_type,
+        data = request.data if 'events' in request.data else {'events': [request.data]}
+        serializer = InteractionBatchSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Get IP for anon users
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if x_forwarded_for:
+            ip = x_forwarded_for.split(',')[0]
+        else:
+            ip = request.META.get('REMOTE_ADDR')
+        user_id = request.user.id if request.user.is_authenticated else None
+        
+        result = interaction_buffer.add([
+            InteractionEvent(
+                listing_id=event['listing'],
+                interaction_type=event['interaction_type'],
+                user_id=user_id,
                 ip_address=ip
             )
-            
-            return Response({'status': 'logged'}, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            for event in serializer.validated_data['events']
+        ])
+        
+        body = {
+            'status': 'queued',
+            'accepted': result.accepted,
+            'duplicates': result.duplicates,
+            'dropped': result.dropped,
+        }
+        if result.dropped and not result.accepted:
+            body['status'] = 'rejected'
+            return Response(body, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': '5'})
+        return Response(body, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'])
+    def metrics(self, request):
+        """
+        GET /api/recommendations/interactions/metrics/ (admin only)
+        
+        Queue depth/utilization and accepted, duplicate, dropped and written
+        event counts of this worker process.
+        """
+        from .ingestion import interaction_buffer
+        return Response(interaction_buffer.metrics())
@@ -0,0 +1,124 @@
+"""
+Running rating aggregates of butcher profiles.
+
+ButcherProfile carries rating_sum, rating_count and one counter per star
+(rating_count_1 ... rating_count_5); `rating` is their average. A review
+write changes them by its delta with a single UPDATE of F-expressions in
+the review's transaction (see ButcherReview.save/delete and signals.py):
+
+- created:        +rating to the sum, +1 to the count and to its star
+- rating changed: +(new - old) to the sum, -1 old star, +1 new star
+- deleted:        -rating from the sum, -1 from the count and its star
+
+Because the UPDATE only adds deltas, concurrent reviews of the same butcher
+never overwrite each other. `manage.py reconcile_butcher_ratings` recounts
+the aggregates from the review table to find (and with --fix repair) drift
+from writes that bypass the model, such as queryset.update().
+"""
+
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+STARS = (1, 2, 3, 4, 5)
+
+
+def histogram_field(star):
+    """ButcherProfile column counting `star`-star reviews."""
+    return f'rating_count_{star}'
+
+
+AGGREGATE_FIELDS = ('rating_sum', 'rating_count') + tuple(histogram_field(star) for star in STARS)
+
+
+def average(rating_sum, rating_count):
+    """The `rating` of the given sum and count (0.0 without reviews)."""
+    return rating_sum / rating_count if rating_count else 0.0
+
+
+def apply_rating_change(butcher_id, old=None, new=None):
+    """
+    Add one review change to the butcher's aggregates.
+
+    Args:
+        old: rating before the write (None for a new review)
+        new: rating after the write (None for a deleted review)
+    """
+    from apps.butchers.models import ButcherProfile
+
+    if old == new:
+        return
+    sum_delta = (new or 0) - (old or 0)
+    count_delta = (new is not None) - (old is not None)
+    changes = {
+        'rating_sum': F('rating_sum') + sum_delta,
+        'rating_count': F('rating_count') + count_delta,
+        # Right-hand sides see the row before the update, so the average is
+        # computed from the new sum and count explicitly
+        'rating': Coalesce(
+            ExpressionWrapper(
+                Cast(F('rating_sum') + sum_delta, FloatField()) / NullIf(F('rating_count') + count_delta, 0),
+                output_field=FloatField()
+            ),
+            Value(0.0)
+        ),
+    }
+    if old is not None:
+        changes[histogram_field(old)] = F(histogram_field(old)) - 1
+    if new is not None:
+        changes[histogram_field(new)] = F(histogram_field(new)) + 1
+    ButcherProfile.objects.filter(pk=butcher_id).update(**changes)
+
+
+def count_reviews(butcher_ids):
+    """
+    Aggregates of the given butchers recounted from the review table, in
+    one query.
+
+    Returns:
+        {butcher_id: {field: value}} for butchers with reviews
+    """
+    from .models import ButcherReview
+
+    rows = ButcherReview.objects.filter(butcher_id__in=butcher_ids).values('butcher_id').annotate(
+        rating_sum=Sum('rating'),
+        rating_count=Count('id'),
+        **{histogram_field(star): Count('id', filter=Q(rating=star)) for star in STARS}
+    )
+    return {row.pop('butcher_id'): row for row in rows}
+
+
+def reconcile(butchers, fix=False):
+    """
+    Compare the aggregates of `butchers` (a ButcherProfile queryset) with
+    the review table, locking the profiles so no review write interleaves.
+
+    Returns:
+        {butcher_id: {field: (stored, counted)}} of the inconsistent butchers
+    """
+    from apps.butchers.models import ButcherProfile
+
+    empty = dict.fromkeys(AGGREGATE_FIELDS, 0)
+    problems = {}
+    with transaction.atomic():
+        profiles = list(butchers.select_for_update().only('id', 'rating', *AGGREGATE_FIELDS))
+        counted = count_reviews([profile.id for profile in profiles])
+        repaired = []
+        for profile in profiles:
+            expected = counted.get(profile.id, empty)
+            diff = {
+                field: (getattr(profile, field), value)
+                for field, value in expected.items() if getattr(profile, field) != value
+            }
+            rating = average(expected['rating_sum'], expected['rating_count'])
+            if abs(profile.rating - rating) > 1e-9:
+                diff['rating'] = (profile.rating, rating)
+            if not diff:
+                continue
+            problems[profile.id] = diff
+            for field, (_, value) in diff.items():
+                setattr(profile, field, value)
+            repaired.append(profile)
+        if fix:
+            ButcherProfile.objects.bulk_update(repaired, ['rating', *AGGREGATE_FIELDS], batch_size=500)
+    return problems
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from apps.butchers.models import ButcherProfile
+from apps.reviews.aggregates import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Verifies the rating aggregates of butcher profiles against the review table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Repair inconsistent profiles instead of only reporting them',
+        )
+        parser.add_argument(
+            '--butcher',
+            type=int,
+            help='Only check the given profile id',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Profiles locked and recounted per transaction',
+        )
+
+    def handle(self, *args, **options):
+        ids = ButcherProfile.objects.order_by('id').values_list('id', flat=True)
+        if options['butcher']:
+            ids = ids.filter(pk=options['butcher'])
+        ids = list(ids)
+
+        inconsistent = 0
+        for start in range(0, len(ids), options['batch_size']):
+            batch = ButcherProfile.objects.filter(id__in=ids[start:start + options['batch_size']])
+            problems = reconcile(batch, fix=options['fix'])
+            inconsistent += len(problems)
+            for butcher_id, diff in problems.items():
+                details = ', '.join(f'{field}={stored}→{counted}' for field, (stored, counted) in diff.items())
+                self.stdout.write(self.style.WARNING(f'Butcher {butcher_id}: {details}'))
+
+        if inconsistent:
+            action = 'repaired' if options['fix'] else 'found'
+            self.stdout.write(self.style.WARNING(f'Checked {len(ids)} butchers, {action} {inconsistent} inconsistent.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Checked {len(ids)} butchers, all rating aggregates consistent.'))
@@ -3,10 +3,11 @@ Models for reviews app.
 
 Users can leave a 1-5 star rating + optional comment on a ButcherProfile.
 Each user can only review a specific butcher once.
-After every save/delete, the butcher's aggregate rating is recalculated.
+Every save/delete updates the butcher's running rating aggregates in the
+same transaction (see aggregates.py).
 """
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -61,3 +62,24 @@ class ButcherReview(models.Model):
 
     def __str__(self) -> str:
         return f"{self.user.email} → {self.butcher} ({self.rating}★)"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored rating, so signals can apply the old/new delta
+        instance._saved_rating = instance.__dict__.get('rating')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # post_save updates the butcher's aggregates inside this transaction
+        with transaction.atomic():
+            if self.pk is not None and not hasattr(self, '_saved_rating'):
+                self._saved_rating = ButcherReview.objects.filter(pk=self.pk).values_list(
+                    'rating', flat=True
+                ).first()
+            super().save(*args, **kwargs)
+        self._saved_rating = self.rating
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
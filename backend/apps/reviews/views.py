@@ -3,6 +3,8 @@ Views for reviews app.
 
 Endpoints:
   GET    /api/reviews/butchers/<butcher_id>/    – list all reviews for a butcher (public)
+  GET    /api/reviews/butchers/<butcher_id>/?summary=true
+                                                 – average, count and star histogram only
   POST   /api/reviews/butchers/<butcher_id>/    – submit a review (auth required)
   GET    /api/reviews/butchers/<butcher_id>/me/ – get current user's review for this butcher
   PUT    /api/reviews/butchers/<butcher_id>/me/ – update own review
@@ -32,6 +34,14 @@ class ButcherReviewListCreateView(APIView):
 
     def get(self, request, butcher_id):
         butcher = get_object_or_404(ButcherProfile, pk=butcher_id)
+        if request.query_params.get('summary') in ('1', 'true'):
+            # Served from the profile's running aggregates
+            return Response({
+                'butcher': butcher.id,
+                'rating': butcher.rating,
+                'rating_count': butcher.rating_count,
+                'histogram': butcher.rating_histogram,
+            })
         reviews = ButcherReview.objects.filter(butcher=butcher).select_related('user')
         serializer = ButcherReviewSerializer(reviews, many=True)
         return Response(serializer.data)
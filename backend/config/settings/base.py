@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'apps.recommendations',
     'apps.reports',
     'apps.logs',
+    'apps.realtime',
 ]
 
 MIDDLEWARE = [
@@ -143,6 +144,97 @@ SIMPLE_JWT = {
 }
 
 
+# Realtime push channel (SSE, served under ASGI)
+REALTIME = {
+    'BROKER': 'apps.realtime.broker.InProcessBroker',
+    'HEARTBEAT_SECONDS': 15,
+    'MAX_CONNECTIONS_PER_USER': 5,
+    'QUEUE_SIZE': 100,
+    'HISTORY_SIZE': 1000,
+    'POLL_INTERVAL': 0.5,
+    'RETENTION_MINUTES': 10,
+}
+
+# Listing view counts are buffered per process and written in batches
+# (apps.animals.counters)
+VIEW_COUNTER = {
+    'FLUSH_INTERVAL': 5,  # seconds
+    'MAX_PENDING': 1000,  # flush early once this many views are buffered
+}
+
+# Listing interactions are queued per process and written with bulk_create
+# (apps.recommendations.ingestion)
+INTERACTION_INGESTION = {
+    'BATCH_SIZE': 200,  # flush early once this many events are queued
+    'FLUSH_INTERVAL': 2,  # seconds
+    'MAX_QUEUE': 10000,  # events beyond this are rejected (HTTP 429)
+    'DEDUP_WINDOW': 300,  # seconds a repeated view by the same user/IP is ignored
+    'MAX_EVENTS_PER_REQUEST': 50,
+}
+
+# Listing change notifications are expanded to favouriting users in the
+# background (apps.notifications.fanout)
+NOTIFICATION_FANOUT = {
+    'CHUNK_SIZE': 500,  # favourites notified per transaction
+    'POLL_INTERVAL': 5,  # seconds between checks for pending events
+    'IN_PROCESS': True,  # False: only `manage.py process_notification_fanout` fans out
+    'RETENTION_DAYS': 7,  # completed events are deleted after this many days
+}
+
+# Trained recommendation models are published here and memory-mapped by
+# every worker (apps.recommendations.artifacts)
+RECOMMENDATION_MODEL = {
+    'ARTIFACT_DIR': BASE_DIR / 'var' / 'recommendations',
+    'KEEP_VERSIONS': 3,
+    'CHECK_INTERVAL': 30,  # seconds between checks for a newer version
+    'HALF_LIFE_DAYS': 180,  # interaction weight halves every half-life
+    'MIN_WEIGHT': 0.01,  # decayed weights below this are dropped
+    'RETRIEVAL': 'ann',  # 'ann' (SVD embeddings + LSH) or 'neighbors' (top-k item lists)
+    'EMBEDDING_DIM': 32,
+    'LSH_TABLES': 8,
+    # Incremental updates project changed listings onto the last SVD fit;
+    # refit once this share of the catalog has been projected since
+    'EMBEDDING_REFRESH_FRACTION': 0.2,
+    'EXACT_SEARCH_MAX_ITEMS': 2000,  # catalogs this small skip the LSH index
+}
+
+# Ranked recommendation lists are cached per user / location context
+# (apps.recommendations.cache). Use a shared cache backend in production so
+# invalidations reach every worker.
+RECOMMENDATION_CACHE = {
+    'TIMEOUT': 300,  # seconds; 0 disables the cache
+    'DEPTH': 50,  # listings kept per entry (the largest ?limit=)
+    'MAX_KEYS_PER_LISTING': 500,  # cached entries tracked per listing for invalidation
+}
+
+# Offline recommendations materialised by `manage.py precompute_recommendations`
+# (apps.recommendations.precompute)
+RECOMMENDATION_PRECOMPUTE = {
+    'ACTIVE_DAYS': 30,  # users who logged in or interacted within this many days
+    'TOP_N': 50,  # rows kept per user and type
+    'SELLER_POOL': 200,  # ranked listings sellers are scored from
+    'CHUNK_SIZE': 200,  # users per worker task
+    'WORKERS': 4,  # processes; 1 computes in process
+}
+
+# Bookable appointment slots materialised from butchers' working hours
+# (apps.butchers.availability); run `manage.py sync_butcher_slots` daily
+BUTCHER_AVAILABILITY = {
+    'HORIZON_DAYS': 21,  # days ahead slots are kept for
+    'MAX_RANGE_DAYS': 14,  # longest date range of one availability request
+    'MAX_BUTCHERS': 50,  # butchers per availability request
+    'HOLD_SECONDS': 300,  # a held slot must be confirmed within this time
+    'MAX_HOLDS_PER_USER': 3,  # live holds per user
+}
+
+# Butcher list search and ranking (apps.butchers.search)
+BUTCHER_SEARCH = {
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 50,
+    'AVAILABILITY_DAYS': 7,  # free places counted for the ranking
+}
+
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOW_ALL_ORIGINS = True
@@ -58,6 +58,9 @@ urlpatterns = [
 
     # Reviews API (butcher ratings)
     path('api/reviews/', include('apps.reviews.urls')),
+
+    # Realtime push (SSE, ASGI only)
+    path('api/realtime/', include('apps.realtime.urls')),
 ]
 
 # Serve media files in development
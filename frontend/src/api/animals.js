@@ -8,24 +8,33 @@ export const fetchAnimals = async (params = {}) => {
     return response.data;  // Returns { count, next, previous, results }
 };
 
-// Fetch ALL animals by following pagination
-export const fetchAllAnimals = async () => {
+// Fetch ALL animals by following cursor pagination
+// (keyset pages cost the same at any depth and skip the COUNT query)
+export const fetchAllAnimals = async (params = {}) => {
     let allAnimals = [];
-    let page = 1;
-    let hasMore = true;
+    let cursor = '';
 
-    while (hasMore) {
-        const data = await fetchAnimals(page);
+    do {
+        const data = await fetchAnimals({ ...params, cursor, page_size: 50 });
         allAnimals = [...allAnimals, ...data.results];
-
-        // Check if there's a next page
-        hasMore = data.next !== null;
-        page++;
-    }
+        cursor = data.next_cursor;
+    } while (cursor);
 
     return allAnimals;
 };
 
+// Typeahead suggestions (prefix match, Turkish characters folded)
+export const fetchSearchSuggestions = async (q, limit = 8) => {
+    const response = await apiClient.get('/api/animals/suggest/', { params: { q, limit } });
+    return response.data;  // [{ id, title, breed, animal_type, city, district }]
+};
+
+// Result counts per filter value, for the same filters as fetchAllAnimals
+export const fetchFacets = async (filters = {}) => {
+    const response = await apiClient.get('/api/animals/facets/', { params: filters });
+    return response.data;  // { total, source, facets: { animal_type, city, district, gender, price, age } }
+};
+
 export const fetchAnimal = async (id) => {
     const response = await apiClient.get(`/api/animals/${id}/`);
     return response.data;
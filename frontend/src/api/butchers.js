@@ -17,10 +17,11 @@ apiClient.interceptors.request.use(config => {
 });
 
 /**
- * Fetch all butcher profiles
+ * Search butcher profiles (paginated)
+ * params: city, district, services (comma separated), ordering, page, page_size
  */
-export const fetchButcherProfiles = async () => {
-    const response = await apiClient.get('/api/butchers/profiles/');
+export const fetchButcherProfiles = async (params = {}) => {
+    const response = await apiClient.get('/api/butchers/profiles/', { params });
     return response.data;
 };
 
@@ -32,6 +33,16 @@ export const fetchButcherProfile = async (id) => {
     return response.data;
 };
 
+/**
+ * Fetch free appointment slots of butchers between two dates (YYYY-MM-DD)
+ */
+export const fetchButcherAvailability = async (butcherIds, start, end) => {
+    const response = await apiClient.get('/api/butchers/profiles/availability/', {
+        params: { butchers: butcherIds.join(','), start, end }
+    });
+    return response.data;
+};
+
 /**
  * Fetch current user's butcher profile (for ButcherProfile page)
  */
@@ -64,6 +75,29 @@ export const createAppointment = async (appointmentData) => {
     return response.data;
 };
 
+/**
+ * Hold a slot ({ butcher, date, time }) for a few minutes before confirming it
+ */
+export const createSlotHold = async (holdData) => {
+    const response = await apiClient.post('/api/butchers/holds/', holdData);
+    return response.data;
+};
+
+/**
+ * Confirm a held slot ({ listing, note }); creates the appointment
+ */
+export const confirmSlotHold = async (holdId, data) => {
+    const response = await apiClient.post(`/api/butchers/holds/${holdId}/confirm/`, data);
+    return response.data;
+};
+
+/**
+ * Release a held slot
+ */
+export const releaseSlotHold = async (holdId) => {
+    await apiClient.delete(`/api/butchers/holds/${holdId}/`);
+};
+
 /**
  * Fetch all appointments (for butcher)
  */
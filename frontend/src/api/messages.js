@@ -113,3 +113,20 @@ export const deleteConversation = async (conversationId) => {
 export const hideGroupConversation = async (groupId) => {
     await apiClient.post(`/api/messages/groups/${groupId}/hide/`);
 };
+
+/**
+ * Fetch only messages created or changed since a sync cursor.
+ * Returns { cursor, unchanged, has_more, messages, removed }.
+ */
+export const syncConversationMessages = async (conversationId, since = 0) => {
+    const response = await apiClient.get(`/api/messages/sync/?conversation=${conversationId}&since=${since}`);
+    return response.data;
+};
+
+/**
+ * Fetch only group messages created or changed since a sync cursor.
+ */
+export const syncGroupMessages = async (groupId, since = 0) => {
+    const response = await apiClient.get(`/api/messages/groups/${groupId}/messages/sync/?since=${since}`);
+    return response.data;
+};
@@ -0,0 +1,38 @@
+import { getAccessToken } from '../utils/token';
+
+// The stream needs an ASGI server. Set VITE_REALTIME_URL at build time to
+// the stream URL it serves (e.g. https://kurbanlink.com/api/realtime/stream/);
+// on localhost it defaults to uvicorn on :8001. Without a URL clients poll.
+const getStreamURL = () => {
+    if (import.meta.env.VITE_REALTIME_URL) {
+        return import.meta.env.VITE_REALTIME_URL;
+    }
+    if (window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1') {
+        return 'http://localhost:8001/api/realtime/stream/';
+    }
+    return null;
+};
+
+/**
+ * Subscribe to realtime events (message, group_message, notification).
+ *
+ * EventSource reconnects on its own and resends Last-Event-ID, so missed
+ * events are replayed by the server. Returns null if SSE is unavailable;
+ * callers should keep polling in that case.
+ *
+ * @param {Object} handlers - Map of event type to callback(data)
+ * @returns {EventSource|null} Call .close() to unsubscribe
+ */
+export const subscribeToEvents = (handlers) => {
+    const token = getAccessToken();
+    const url = getStreamURL();
+    if (!token || !url || typeof EventSource === 'undefined') {
+        return null;
+    }
+
+    const source = new EventSource(`${url}?token=${encodeURIComponent(token)}`);
+    Object.entries(handlers).forEach(([type, callback]) => {
+        source.addEventListener(type, (event) => callback(JSON.parse(event.data)));
+    });
+    return source;
+};
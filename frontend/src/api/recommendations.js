@@ -1,5 +1,32 @@
 import api from './axios';
 
+// Interaction events are sent in batches; the server accepts up to 50 per request
+const MAX_BATCH = 50;
+const FLUSH_DELAY_MS = 2000;
+let pendingEvents = [];
+let flushTimer = null;
+
+const flushInteractions = async () => {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+    if (pendingEvents.length === 0) return null;
+    const events = pendingEvents.splice(0, MAX_BATCH);
+    if (pendingEvents.length > 0) {
+        flushTimer = setTimeout(flushInteractions, FLUSH_DELAY_MS);
+    }
+    try {
+        const response = await api.post('/api/recommendations/interactions/', { events });
+        return response.data;  // { status, accepted, duplicates, dropped }
+    } catch (error) {
+        // Analytics only: drop the batch rather than retrying
+        return null;
+    }
+};
+
+if (typeof window !== 'undefined') {
+    window.addEventListener('pagehide', () => { flushInteractions(); });
+}
+
 export const recommendationService = {
     // Get recommended listings
     getRecommendedListings: async (params = {}) => {
@@ -8,13 +35,16 @@ export const recommendationService = {
         return response.data;
     },
 
-    // Log user interaction
-    logInteraction: async (listingId, interactionType) => {
+    // Log user interaction (queued, sent in batches)
+    logInteraction: (listingId, interactionType) => {
         // interactionType: VIEW, PHONE_CLICK, WHATSAPP_CLICK, FAVORITE
-        const response = await api.post('/api/recommendations/interactions/', {
-            listing: listingId,
-            interaction_type: interactionType
-        });
-        return response.data;
-    }
+        pendingEvents.push({ listing: listingId, interaction_type: interactionType });
+        if (pendingEvents.length >= MAX_BATCH) {
+            flushInteractions();
+        } else if (!flushTimer) {
+            flushTimer = setTimeout(flushInteractions, FLUSH_DELAY_MS);
+        }
+    },
+
+    flushInteractions: () => flushInteractions()
 };
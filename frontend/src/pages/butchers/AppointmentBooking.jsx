@@ -3,17 +3,24 @@ import { useNavigate, useParams } from 'react-router-dom';
 import { useAuth } from '../../auth/AuthContext';
 import './AppointmentBooking.css';
 import { AlertTriangle } from '../../ui/icons';
-import { fetchButcherProfile, createAppointment } from '../../api/butchers';
+import {
+    fetchButcherProfile,
+    fetchButcherAvailability,
+    createSlotHold,
+    confirmSlotHold,
+    releaseSlotHold
+} from '../../api/butchers';
 import { fetchMyListings } from '../../api/sellers';
 import './AppointmentBooking.css';
 
-const TIME_SLOTS = [
-    '09:00:00', '09:30:00', '10:00:00', '10:30:00',
-    '11:00:00', '11:30:00', '12:00:00', '12:30:00',
-    '13:00:00', '13:30:00', '14:00:00', '14:30:00',
-    '15:00:00', '15:30:00', '16:00:00', '16:30:00',
-    '17:00:00'
-];
+const getErrorMessage = (err, fallback) => {
+    const data = err.response?.data;
+    return data?.error?.message
+        || data?.detail
+        || (typeof data?.error === 'string' ? data.error : null)
+        || (Array.isArray(data) ? data[0] : null)
+        || fallback;
+};
 
 const AppointmentBooking = () => {
     const { id } = useParams();
@@ -25,6 +32,9 @@ const AppointmentBooking = () => {
     const [submitting, setSubmitting] = useState(false);
     const [error, setError] = useState(null);
     const [success, setSuccess] = useState(false);
+    const [timeSlots, setTimeSlots] = useState([]);
+    const [slotsLoading, setSlotsLoading] = useState(false);
+    const [hold, setHold] = useState(null);
 
     const [formData, setFormData] = useState({
         date: '',
@@ -37,6 +47,25 @@ const AppointmentBooking = () => {
         loadData();
     }, [id]);
 
+    useEffect(() => {
+        loadTimeSlots(formData.date);
+    }, [id, formData.date]);
+
+    const loadTimeSlots = async (date) => {
+        setTimeSlots([]);
+        if (!date) return;
+        setSlotsLoading(true);
+        try {
+            const data = await fetchButcherAvailability([id], date, date);
+            const day = data.butchers[0]?.days.find(d => d.date === date);
+            setTimeSlots(day ? day.slots : []);
+        } catch (err) {
+            console.error('Failed to load time slots:', err);
+        } finally {
+            setSlotsLoading(false);
+        }
+    };
+
     const loadData = async () => {
         try {
             const butcherData = await fetchButcherProfile(id);
@@ -59,24 +88,55 @@ const AppointmentBooking = () => {
         }
     };
 
+    const releaseHold = () => {
+        if (hold) {
+            releaseSlotHold(hold.id).catch(err => console.error('Failed to release hold:', err));
+            setHold(null);
+        }
+    };
+
+    // Hold the slot while the user fills in the rest of the form
+    const holdTime = async (time) => {
+        const data = await createSlotHold({ butcher: parseInt(id), date: formData.date, time });
+        setHold(data);
+        return data;
+    };
+
+    const handleDateChange = (date) => {
+        releaseHold();
+        setFormData({ ...formData, date, time: '' });
+    };
+
+    const handleTimeChange = async (time) => {
+        releaseHold();
+        setFormData({ ...formData, time });
+        setError(null);
+        if (!time) return;
+        try {
+            await holdTime(time);
+        } catch (err) {
+            console.error('Failed to hold time slot:', err);
+            setError(getErrorMessage(err, 'Saat ayrılamadı. Lütfen başka bir saat seçin.'));
+            setFormData(current => ({ ...current, time: '' }));
+            loadTimeSlots(formData.date);
+        }
+    };
+
     const handleSubmit = async (e) => {
         e.preventDefault();
         setSubmitting(true);
         setError(null);
 
         try {
-            const appointmentData = {
-                butcher: parseInt(id),
-                date: formData.date,
-                time: formData.time,
-                note: formData.note
-            };
+            const currentHold = hold || await holdTime(formData.time);
+            const confirmData = { note: formData.note };
 
             if (formData.listing) {
-                appointmentData.listing = parseInt(formData.listing);
+                confirmData.listing = parseInt(formData.listing);
             }
 
-            await createAppointment(appointmentData);
+            await confirmSlotHold(currentHold.id, confirmData);
+            setHold(null);
             setSuccess(true);
 
             // Redirect after 2 seconds
@@ -86,12 +146,11 @@ const AppointmentBooking = () => {
         } catch (err) {
             console.error('Failed to create appointment:', err);
 
-            // Handle slot conflict error specifically
-            const errorMsg = err.response?.data?.detail
-                || err.response?.data?.error
-                || 'Randevu oluşturulamadı. Lütfen tekrar deneyin.';
-
-            setError(errorMsg);
+            setError(getErrorMessage(err, 'Randevu oluşturulamadı. Lütfen tekrar deneyin.'));
+            // The hold may have expired and the slot been taken meanwhile
+            setHold(null);
+            setFormData(current => ({ ...current, time: '' }));
+            loadTimeSlots(formData.date);
         } finally {
             setSubmitting(false);
         }
@@ -175,7 +234,7 @@ const AppointmentBooking = () => {
                             type="date"
                             id="date"
                             value={formData.date}
-                            onChange={(e) => setFormData({ ...formData, date: e.target.value })}
+                            onChange={(e) => handleDateChange(e.target.value)}
                             required
                             min={minDate}
                         />
@@ -186,16 +245,28 @@ const AppointmentBooking = () => {
                         <select
                             id="time"
                             value={formData.time}
-                            onChange={(e) => setFormData({ ...formData, time: e.target.value })}
+                            onChange={(e) => handleTimeChange(e.target.value)}
                             required
+                            disabled={!formData.date || slotsLoading}
                         >
-                            <option value="">Saat seçin</option>
-                            {TIME_SLOTS.map(slot => (
-                                <option key={slot} value={slot}>
-                                    {slot.substring(0, 5)}
+                            <option value="">
+                                {!formData.date ? 'Önce tarih seçin'
+                                    : slotsLoading ? 'Yükleniyor...'
+                                    : timeSlots.length === 0 ? 'Bu tarihte boş saat yok'
+                                    : 'Saat seçin'}
+                            </option>
+                            {timeSlots.map(slot => (
+                                <option key={slot.time} value={slot.time}>
+                                    {slot.time.substring(0, 5)}
                                 </option>
                             ))}
                         </select>
+                        {hold && (
+                            <small className="hold-hint">
+                                Bu saat {new Date(hold.expires_at).toLocaleTimeString('tr-TR', { hour: '2-digit', minute: '2-digit' })}
+                                {' '}saatine kadar sizin için ayrıldı.
+                            </small>
+                        )}
                     </div>
 
                     {user && listings.length > 0 && (
@@ -7,20 +7,29 @@ import { ButcherIcon } from '../../ui/icons';
 import SEO from '../../components/SEO';
 import './ButcherList.css';
 
+const PAGE_SIZE = 20;
+
 const ButcherList = () => {
     const navigate = useNavigate();
     const [butchers, setButchers] = useState([]);
+    const [currentPage, setCurrentPage] = useState(1);
+    const [totalPages, setTotalPages] = useState(1);
+    const [hasNext, setHasNext] = useState(false);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
 
     useEffect(() => {
         loadButchers();
-    }, []);
+    }, [currentPage]);
 
     const loadButchers = async () => {
+        setLoading(true);
+        setError(null);
         try {
-            const data = await fetchButcherProfiles();
-            setButchers(data);
+            const data = await fetchButcherProfiles({ page: currentPage, page_size: PAGE_SIZE });
+            setButchers(data.results);
+            setTotalPages(Math.max(1, Math.ceil(data.count / PAGE_SIZE)));
+            setHasNext(Boolean(data.next));
         } catch (err) {
             console.error('Failed to load butchers:', err);
             setError('Kasaplar yüklenirken bir hata oluştu.');
@@ -64,11 +73,37 @@ const ButcherList = () => {
                         <p>Henüz kayıtlı kasap bulunmamaktadır.</p>
                     </div>
                 ) : (
-                    <div className="butchers-grid">
-                        {butchers.map(butcher => (
-                            <ButcherCard key={butcher.id} butcher={butcher} />
-                        ))}
-                    </div>
+                    <>
+                        <div className="butchers-grid">
+                            {butchers.map(butcher => (
+                                <ButcherCard key={butcher.id} butcher={butcher} />
+                            ))}
+                        </div>
+
+                        {totalPages > 1 && (
+                            <div className="pagination">
+                                <button
+                                    className="btn-page"
+                                    onClick={() => setCurrentPage(currentPage - 1)}
+                                    disabled={currentPage === 1}
+                                >
+                                    Önceki
+                                </button>
+
+                                <span className="page-indicator">
+                                    Sayfa {currentPage} / {totalPages}
+                                </span>
+
+                                <button
+                                    className="btn-page"
+                                    onClick={() => setCurrentPage(currentPage + 1)}
+                                    disabled={!hasNext}
+                                >
+                                    Sonraki
+                                </button>
+                            </div>
+                        )}
+                    </>
                 )}
             </div>
         </div>
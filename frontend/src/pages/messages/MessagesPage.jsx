@@ -5,6 +5,8 @@ import {
   fetchInbox,
   fetchConversationMessages,
   fetchGroupMessages,
+  syncConversationMessages,
+  syncGroupMessages,
   sendMessage,
   sendGroupMessage,
   markAllRead,
@@ -14,6 +16,7 @@ import {
   deleteConversation,
   hideGroupConversation,
 } from '../../api/messages';
+import { subscribeToEvents } from '../../api/realtime';
 import { Send, User as UserIcon, Users as UsersIcon, ArrowLeft, Reply, X, Trash2 } from '../../ui/icons';
 import './MessagesPage.css';
 
@@ -35,6 +38,11 @@ const MessagesPage = () => {
   const sendingRef = useRef(false);
   const inputRef = useRef(null);
   const messagesEndRef = useRef(null);
+  // Sync cursor of the open conversation ({ key: 'DIRECT-12', cursor: 34 })
+  const syncRef = useRef({ key: null, cursor: null });
+  // True while the realtime stream is open; polling slows down meanwhile
+  const realtimeRef = useRef(false);
+  const selectedRef = useRef(null);
   const [isMobileView, setIsMobileView] = useState(window.innerWidth < 768);
 
   // Handle window resize for mobile detection
@@ -58,12 +66,34 @@ const MessagesPage = () => {
     return () => clearInterval(inboxInterval);
   }, []);
 
+  // Realtime push: sync as soon as a conversation changes
+  useEffect(() => {
+    const onChange = () => {
+      refreshMessages(selectedRef.current);
+      loadConversations(false);
+    };
+    const source = subscribeToEvents({ message: onChange, group_message: onChange });
+    if (!source) return;
+
+    source.onopen = () => { realtimeRef.current = true; };
+    source.onerror = () => { realtimeRef.current = false; };
+    return () => {
+      realtimeRef.current = false;
+      source.close();
+    };
+  }, []);
+
   // Polling for new messages in selected conversation
   useEffect(() => {
+    selectedRef.current = selectedConversation;
     if (!selectedConversation) return;
 
-    // Poll for new messages every 3 seconds
+    // Poll for new messages every 3 seconds; with the realtime stream open,
+    // only every 30 seconds to pick up read receipts (they are not pushed)
+    let ticks = 0;
     const messagesInterval = setInterval(() => {
+      ticks += 1;
+      if (realtimeRef.current && ticks % 10 !== 0) return;
       refreshMessages(selectedConversation);
     }, 3000);
 
@@ -127,36 +157,45 @@ const MessagesPage = () => {
     }
   };
 
+  const conversationKey = (conversation) => `${conversation.type}-${conversation.id}`;
+
+  // Start syncing from the newest change in a fully loaded message list
+  const resetSyncCursor = (conversation, data) => {
+    syncRef.current = {
+      key: conversationKey(conversation),
+      cursor: data.reduce((max, msg) => Math.max(max, msg.seq || 0), 0),
+    };
+  };
+
+  // Merge one sync response into the message list
+  const applyChanges = (conversation, changes) => {
+    const removed = new Set(changes.removed || []);
+    setMessages(prev => {
+      const byId = new Map(prev.filter(msg => !removed.has(msg.id)).map(msg => [msg.id, msg]));
+      changes.messages.forEach(msg => byId.set(msg.id, msg));
+      return [...byId.values()].sort((a, b) => new Date(a.created_at) - new Date(b.created_at));
+    });
+    // If there's an unread message for US, mark as read
+    const hasUnreadTheirs = changes.messages.some(msg => msg.sender !== user?.id && !msg.is_read);
+    if (hasUnreadTheirs && conversation.type !== 'GROUP' && user) markAllRead(conversation.id);
+  };
+
+  // Fetch only what changed since the last sync instead of the whole conversation
   const refreshMessages = async (conversation) => {
     if (!conversation) return;
+    const key = conversationKey(conversation);
     try {
-      let data;
-      if (conversation.type === 'GROUP') {
-        data = await fetchGroupMessages(conversation.id);
-      } else {
-        data = await fetchConversationMessages(conversation.id);
-      }
-      
-      // Update if message count changed OR if any existing message status changed
-      setMessages(prev => {
-        if (!Array.isArray(data)) return prev;
-        
-        const hasChanges = prev.length !== data.length || 
-                          prev.some((msg, idx) => msg?.is_read !== data[idx]?.is_read);
-                          
-        if (hasChanges) {
-          // If we are refreshing and there's a new message for US, mark as read
-          if (conversation.type === 'GROUP') {
-             // markGroupAllRead(conversation.id);
-          } else {
-             const hasNewTheirs = data.length > prev.length && 
-                                data[data.length-1]?.sender !== user?.id;
-             if (hasNewTheirs && user && conversation.id) markAllRead(conversation.id);
-          }
-          return data;
-        }
-        return prev;
-      });
+      let changes;
+      do {
+        if (syncRef.current.key !== key || syncRef.current.cursor === null) return;
+        changes = conversation.type === 'GROUP'
+          ? await syncGroupMessages(conversation.id, syncRef.current.cursor)
+          : await syncConversationMessages(conversation.id, syncRef.current.cursor);
+        // Another conversation was opened meanwhile
+        if (syncRef.current.key !== key) return;
+        syncRef.current.cursor = changes.cursor;
+        if (!changes.unchanged) applyChanges(conversation, changes);
+      } while (changes.has_more);
     } catch (error) {
       console.error('Failed to refresh messages:', error);
     }
@@ -164,6 +203,7 @@ const MessagesPage = () => {
 
   const loadMessages = async (conversation) => {
     setMessagesLoading(true);
+    syncRef.current = { key: conversationKey(conversation), cursor: null };
     try {
       let data;
       if (conversation.type === 'GROUP') {
@@ -173,7 +213,11 @@ const MessagesPage = () => {
         data = await fetchConversationMessages(conversation.id);
         await markAllRead(conversation.id);
       }
-      setMessages(Array.isArray(data) ? data : []);
+      // Skip if another conversation was opened meanwhile
+      if (syncRef.current.key === conversationKey(conversation)) {
+        setMessages(Array.isArray(data) ? data : []);
+        resetSyncCursor(conversation, Array.isArray(data) ? data : []);
+      }
 
       // Update local unread count
       setConversations(prev =>
@@ -266,7 +310,10 @@ const MessagesPage = () => {
       }
 
       // Replace the temporary message with the real one from the server
-      setMessages(prev => prev.map(msg => msg.id === tempId ? { ...newMessage, is_read: false } : msg));
+      // (a sync may already have brought it in)
+      setMessages(prev => prev
+        .filter(msg => msg.id !== newMessage.id)
+        .map(msg => msg.id === tempId ? { ...newMessage, is_read: false } : msg));
 
     } catch (error) {
       console.error('Failed to send message:', error);